@@ -0,0 +1,68 @@
+# Benchmark: CSV vs the partitioned Parquet store for the largest table
+# Writes a fixture PORTFOLIOPERFORMANCE table at each scale both ways (CSV the way the
+# checked-in exports were written, index included) and reports disk size, full reload
+# time and a pruned reload (two portfolios, one year, three columns).
+#
+#   python -m benchmarks.bench_columnar --portfolios 10 100 --days 2520
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import fixtures
+
+PRUNED_COLUMNS = ["PORTFOLIOCODE", "HISTORYDATE", "PERFORMANCEFACTOR"]
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV and Parquet table storage.")
+    parser.add_argument("--portfolios", nargs="+", type=int, default=[10, 50])
+    parser.add_argument("--days", type=int, default=2520, help="Business days of history per portfolio")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("pyarrow is not installed; pip install -r requirements.txt")
+        sys.exit(1)
+    import pandas as pd
+
+    from source_code.utils.columnar_store import disk_size, read_table, write_table
+
+    scratch = Path(tempfile.mkdtemp(prefix="tdf_columnar_"))
+    print(f"{'portfolios':>10}{'rows':>10}{'CSV MB':>9}{'PQ MB':>8}{'CSV load':>10}{'PQ load':>9}{'PQ pruned':>11}")
+    try:
+        for portfolios in args.portfolios:
+            df = fixtures.performance_table(portfolios, args.days)
+            csv_path = scratch / f"perf_{portfolios}.csv"
+            df.to_csv(csv_path)
+            root = scratch / f"store_{portfolios}"
+            write_table(df, "PORTFOLIOPERFORMANCE", root)
+
+            year = datetime.fromisoformat(fixtures.LAST_DATE).replace(month=1, day=1)
+            pruned = [("PORTFOLIOCODE", "in", ["PORT001", "PORT002"]), ("HISTORYDATE", ">=", year)]
+            csv_s = best_of(lambda: pd.read_csv(csv_path, index_col=0, parse_dates=["HISTORYDATE"]), args.repeat)
+            pq_s = best_of(lambda: read_table("PORTFOLIOPERFORMANCE", root), args.repeat)
+            pruned_s = best_of(lambda: read_table("PORTFOLIOPERFORMANCE", root, PRUNED_COLUMNS, pruned), args.repeat)
+            print(f"{portfolios:>10}{len(df):>10}{disk_size(csv_path) / 2 ** 20:>9.1f}"
+                  f"{disk_size(root) / 2 ** 20:>8.1f}{csv_s:>10.3f}{pq_s:>9.3f}{pruned_s:>11.3f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Benchmark: CLI startup and import-time budget
+# Runs the CLI entry under `python -X importtime` and fails (exit 1) when its
+# imports exceed the budget, when it pulls in pandas, or when importing any
+# source_code module loads a network/warehouse client at module level.
+#
+#   python -m benchmarks.bench_import_time --budget-ms 300
+
+import argparse
+import pkgutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CLI_COMMANDS = [["--help"], ["tables"]]
+# Loaded on first use only; never at import time
+HEAVY_MODULES = ("yfinance", "yahooquery", "IPython", "snowflake", "babel", "dotenv", "requests")
+# Modules that must not even import pandas
+LIGHT_MODULES = ("source_code.__main__", "source_code.pipeline", "source_code.utils.rate_limiter",
+                 "source_code.utils.metadata_cache")
+
+
+def import_times(args: List[str]) -> Dict[str, int]:
+    """Top-level module -> cumulative import time (us) reported by -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                          capture_output=True, text=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):  # nested imports are indented
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def cli_import_ms(command: List[str], startup: set, repeat: int) -> tuple:
+    """Best-of-`repeat` import time of the CLI beyond interpreter startup, plus the slowest imports."""
+    runs = []
+    for _ in range(repeat):
+        times = {m: t for m, t in import_times(["-m", "source_code", *command]).items() if m not in startup}
+        runs.append((sum(times.values()) / 1000, times))
+    total, times = min(runs, key=lambda r: r[0])
+    return total, sorted(times.items(), key=lambda kv: -kv[1])[:3]
+
+
+def loaded_modules(module: str, watch: tuple) -> List[str]:
+    code = (f"import sys, importlib; importlib.import_module({module!r}); "
+            f"print(' '.join(m for m in {watch!r} if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        return [f"import failed: {proc.stderr.strip().splitlines()[-1]}"]
+    return proc.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enforce the CLI import-time budget.")
+    parser.add_argument("--budget-ms", type=float, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failures = []
+    startup = set(import_times(["-c", "pass"]))
+
+    for command in CLI_COMMANDS:
+        total, slowest = cli_import_ms(command, startup, args.repeat)
+        top = ", ".join(f"{m} {t / 1000:.0f} ms" for m, t in slowest)
+        print(f"source_code {' '.join(command):<8} {total:6.0f} ms  ({top})")
+        if total > args.budget_ms:
+            failures.append(f"`source_code {' '.join(command)}` imports take {total:.0f} ms > {args.budget_ms:.0f} ms")
+
+    modules = ["source_code.__main__"] + [
+        m.name for m in pkgutil.walk_packages([str(ROOT / "source_code")], "source_code.") if m.name != "source_code.__main__"
+    ]
+    for module in modules:
+        watch = HEAVY_MODULES + (("pandas",) if module in LIGHT_MODULES else ())
+        loaded = loaded_modules(module, watch)
+        if loaded:
+            failures.append(f"{module}: {', '.join(loaded)}")
+
+    print(f"checked {len(modules)} modules for import-time dependencies")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Benchmark: hash-diff incremental load vs truncate-and-reload for HOLDINGDETAILS
+# Loads a fixture holdings history into the SQLite warehouse stand-in, then re-sends the
+# same window with a share of rows changed (QUANTITY and MARKETVALUE moved) and reports
+# the rows pushed and wall time of the incremental MERGE (utils/incremental_load.py)
+# against deleting the window and inserting it again.
+#
+#   python -m benchmarks.bench_incremental_load --portfolios 200 --days 60 --changed 0 0.01 0.1 1
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+
+TABLE = "HOLDINGDETAILS"
+
+
+def holdings_table(portfolios: int, days: int, funds_per_portfolio: int = 10, seed: int = 0) -> pd.DataFrame:
+    """HOLDINGDETAILS rows: one per portfolio, fund and business day."""
+    rng = np.random.default_rng(seed)
+    funds = fixtures.fund_tickers(funds_per_portfolio)
+    dates = fixtures.business_days(days).date
+    per_portfolio = funds_per_portfolio * days
+    n = portfolios * per_portfolio
+    quantity = rng.integers(100, 1000, n).astype(float)
+    price = np.round(rng.uniform(10, 200, n), 2)
+    return pd.DataFrame({
+        "PORTFOLIOCODE":    np.repeat([f"PORT{i + 1:03d}" for i in range(portfolios)], per_portfolio),
+        "TICKER":           np.tile(np.repeat(funds, days), portfolios),
+        "ISSUEDISPLAYNAME": np.tile(np.repeat([f"{f} fund" for f in funds], days), portfolios),
+        "CURRENCYCODE":     "USD",
+        "ISSUETYPE":        None,
+        "PRICE":            price,
+        "ASSETCLASSNAME":   "Equity",
+        "QUANTITY":         quantity,
+        "COSTBASIS":        np.round(quantity * price * 0.95, 2),
+        "MARKETVALUE":      np.round(quantity * price, 2),
+        "HISTORYDATE":      np.tile(dates, portfolios * funds_per_portfolio),
+    })
+
+
+def changed_copy(df: pd.DataFrame, share: float, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    out = df.copy()
+    rows = rng.random(len(df)) < share
+    out.loc[rows, "QUANTITY"] += 1
+    out.loc[rows, "MARKETVALUE"] = np.round(out.loc[rows, "QUANTITY"] * out.loc[rows, "PRICE"], 2)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash-diff incremental load vs full reload of holdings.")
+    parser.add_argument("--portfolios", type=int, default=200)
+    parser.add_argument("--days", type=int, default=60, help="Business days re-sent per load")
+    parser.add_argument("--changed", nargs="+", type=float, default=[0.0, 0.01, 0.1, 1.0],
+                        help="Share of rows changed between loads")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from source_code.utils.incremental_load import add_row_hashes, load_incremental
+    from source_code.utils.warehouse import sqlite_pool
+
+    db = os.path.join(tempfile.mkdtemp(prefix="tdf_bench_"), "warehouse.db")
+    pool = sqlite_pool(db, size=1)
+    base = holdings_table(args.portfolios, args.days)
+    start = time.perf_counter()
+    load_incremental(base, TABLE, pool)
+    print(f"{len(base)} rows, initial load {time.perf_counter() - start:.2f}s")
+    print(f"{'changed':>8}{'pushed':>10}{'incremental s':>15}{'full reload s':>15}{'speedup':>9}")
+
+    for share in args.changed:
+        batch = changed_copy(base, share)
+        start = time.perf_counter()
+        stats = load_incremental(batch, TABLE, pool)
+        incremental = time.perf_counter() - start
+
+        # the reload writes the base rows back, so every share is measured against the same stored state
+        start = time.perf_counter()
+        with pool.cursor() as cs:
+            cs.execute(f"DELETE FROM {TABLE} WHERE HISTORYDATE BETWEEN %s AND %s",
+                       (str(base["HISTORYDATE"].min()), str(base["HISTORYDATE"].max())))
+            pool.insert_frame(cs, TABLE, add_row_hashes(base, TABLE))
+        full = time.perf_counter() - start
+        print(f"{share:>8.0%}{stats.inserted + stats.updated:>10}{incremental:>15.2f}{full:>15.2f}"
+              f"{full / incremental:>8.1f}x")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Benchmark: memory of the largest table before and after the dtype policy
+# Builds a fixture PORTFOLIOPERFORMANCE table shaped the way the generator produced it
+# (string codes, datetime.date objects), applies utils/schema.py, and reports deep memory
+# both ways plus the time of a typical downstream query (one year, mean factor per
+# portfolio and type) on each representation.
+#
+#   python -m benchmarks.bench_memory --portfolios 10 100 --days 2520
+
+import argparse
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks import fixtures
+from source_code.utils.schema import apply_schema, memory_report
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def query(df: pd.DataFrame, since) -> pd.DataFrame:
+    recent = df[df["HISTORYDATE"] >= since]
+    return recent.groupby(["PORTFOLIOCODE", "PERFORMANCETYPE"], observed=True)["PERFORMANCEFACTOR"].mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of PORTFOLIOPERFORMANCE before and after the dtype policy.")
+    parser.add_argument("--portfolios", nargs="+", type=int, default=[10, 50])
+    parser.add_argument("--days", type=int, default=2520, help="Business days of history per portfolio")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--columns", action="store_true", help="Also print the per-column report")
+    args = parser.parse_args()
+
+    year = datetime.fromisoformat(fixtures.LAST_DATE).replace(month=1, day=1)
+    print(f"{'portfolios':>10}{'rows':>10}{'MB before':>11}{'MB after':>10}{'ratio':>7}{'query before':>14}{'query after':>13}")
+    for portfolios in args.portfolios:
+        df = fixtures.performance_table(portfolios, args.days)
+        report = memory_report(df, "PORTFOLIOPERFORMANCE")
+        typed = apply_schema(df, "PORTFOLIOPERFORMANCE")
+        before_s = best_of(lambda: query(df, year.date()), args.repeat)
+        after_s = best_of(lambda: query(typed, year), args.repeat)
+        before, after = report["MB_BEFORE"].iloc[-1], report["MB_AFTER"].iloc[-1]
+        print(f"{portfolios:>10}{len(df):>10}{before:>11.1f}{after:>10.1f}{before / after:>6.1f}x"
+              f"{before_s:>14.3f}{after_s:>13.3f}")
+        if args.columns:
+            print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Benchmark: PORTFOLIOPERFORMANCE built serially vs sharded across worker processes
+# Fixture factors for the 12 funds (~5 years) go to shared memory once; PORTFOLIOCODEs are
+# sharded across the pool. Reports wall time per worker count and the speedup over one
+# process, and checks every parallel result equals the serial one. Inception dates are
+# drawn from a wide window so each portfolio keeps a few years of rows.
+#
+#   python -m benchmarks.bench_parallel_performance --portfolios 2000 --workers 1 2 4 8
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+import pandas as pd
+
+from benchmarks import fixtures
+
+DAYS = 1260
+
+
+def merged_holdings(portfolios: int, funds_per_portfolio: int = 4, seed: int = 42) -> pd.DataFrame:
+    """The merged-holdings columns the performance build reads: one row per (portfolio, fund)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(portfolios):
+        for fund in rng.sample(fixtures.FUND_TICKERS, funds_per_portfolio):
+            rows.append({"PORTFOLIOCODE": f"PORT{i + 1:06d}", "FUND TICKER": fund, "CURRENCYCODE": "USD"})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs process-pool portfolio performance.")
+    parser.add_argument("--portfolios", type=int, default=2000)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ["TDF_CACHE_DIR"] = tempfile.mkdtemp(prefix="tdf_bench_")
+    logging.disable(logging.WARNING)
+    from benchmarks.bench_stages import _seed_currency_cache
+    from source_code.Portfolio_Performance.PortfolioPerformance_Table import (
+        compute_performance_factors,
+        generate_portfolio_performance,
+    )
+
+    _seed_currency_cache()
+    tickers = fixtures.FUND_TICKERS
+    factors = compute_performance_factors(fixtures.grouped_download(tickers, DAYS), fixtures.expense_ratios(tickers))
+    merged = merged_holdings(args.portfolios)
+    window = dict(start_date=date(2021, 1, 1), end_date=date(2022, 12, 31))
+
+    print(f"{os.cpu_count()} CPUs, {args.portfolios} portfolios, {len(factors)} factor rows")
+    print(f"{'workers':>8}{'rows':>10}{'seconds':>10}{'speedup':>9}")
+    serial, baseline = None, None
+    for workers in args.workers:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            df = generate_portfolio_performance(df_merged=merged, df_performance_dict=factors, workers=workers, **window)
+            timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+        if serial is None:
+            serial, baseline = df, seconds
+        elif not df.equals(serial):  # assert_frame_equal boxes categoricals row by row: minutes at this size
+            raise AssertionError(f"{workers} workers: result differs from the serial build")
+        print(f"{workers:>8}{len(df):>10}{seconds:>10.2f}{baseline / seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
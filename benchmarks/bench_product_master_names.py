@@ -0,0 +1,88 @@
+# Benchmark: fund-name inference for the product master at fund-universe scale
+# Compares the per-ticker create_ticker_to_name_mapping with infer_fund_names_batch
+# on a synthetic target-date universe (no network).
+#
+#   python -m benchmarks.bench_product_master_names --funds 10000
+
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from source_code.Product_Master.Product_Master_table import (
+    create_ticker_to_name_mapping,
+    infer_fund_names_batch,
+)
+
+PROVIDERS = ["Vanguard", "Fidelity", "T. Rowe Price", "BlackRock", "American Funds", "Schwab"]
+PREFIXES = ["VT", "FF", "FI", "TR", "AA", "SW"]
+YEARS = [2025, 2030, 2035, 2040, 2045, 2050, 2055, 2060, 2065, 2070]
+DESCRIPTIONS = [
+    "The {p} Target Retirement {y} Fund invests in a mix of index funds.",
+    "{p} target date {y} portfolio with an automatic glide path.",
+    "A retirement income fund managed by {p}.",
+    "The fund seeks capital appreciation and current income ({p}).",
+]
+# Yahoo summaries run to several hundred characters of prospectus boilerplate
+BOILERPLATE = (
+    " The fund's asset allocation becomes more conservative over time, following a glide path"
+    " that shifts from equity funds toward fixed income and short-term reserves as the stated"
+    " date approaches. Under normal circumstances the fund invests substantially all of its assets"
+    " in underlying mutual funds and may hold domestic and international stocks, investment-grade"
+    " bonds, inflation-protected securities and cash equivalents. An investment in the fund is not"
+    " guaranteed at any time, including on or after the stated date."
+)
+
+
+def make_universe(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    tickers, fund_info = [], {}
+    for i in range(n):
+        ticker = f"{rng.choice(PREFIXES)}{i:05d}"
+        provider, year = rng.choice(PROVIDERS), rng.choice(YEARS)
+        info = {}
+        if rng.random() < 0.5:
+            info["longName"] = f"{provider} Target {year} Fund Class {rng.choice('ACIRZ')}"
+        for field in ("description", "longBusinessSummary"):
+            if rng.random() < 0.6:
+                info[field] = rng.choice(DESCRIPTIONS).format(p=provider, y=year) + BOILERPLATE
+        tickers.append(ticker)
+        fund_info[ticker] = info
+    return tickers, fund_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark product master name inference.")
+    parser.add_argument("--funds", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tickers, fund_info = make_universe(args.funds)
+
+    def best_of(fn):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    scalar = best_of(lambda: create_ticker_to_name_mapping(tickers, fund_info))
+    batch = best_of(lambda: infer_fund_names_batch(tickers, fund_info))
+    frame = pd.DataFrame.from_dict(fund_info, orient="index")
+    columnar = best_of(lambda: infer_fund_names_batch(tickers, frame))
+
+    per_ticker = create_ticker_to_name_mapping(tickers, fund_info)
+    batched = infer_fund_names_batch(tickers, fund_info)
+    mismatches = sum(per_ticker[t] != name for t, name in zip(batched["TICKER"], batched["PRODUCTNAME"]))
+
+    print(f"funds:       {args.funds}")
+    print(f"per-ticker:  {scalar * 1000:.1f} ms")
+    print(f"batch:       {batch * 1000:.1f} ms  ({scalar / batch:.1f}x)")
+    print(f"batch/frame: {columnar * 1000:.1f} ms  ({scalar / columnar:.1f}x)")
+    print(f"mismatches:  {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
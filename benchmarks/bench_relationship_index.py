@@ -0,0 +1,68 @@
+# Benchmark: deriving portfolio-benchmark associations and resolving them at scale
+# Compares per-portfolio DataFrame filters with RelationshipIndex lookups on a
+# synthetic universe (no network).
+#
+#   python -m benchmarks.bench_relationship_index --portfolios 100000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from source_code.Portfolio_Benchmark_Association.Portfolio_Benchmark_Association import (
+    RelationshipIndex,
+    generate_portfolio_benchmark_association,
+)
+
+
+def make_universe(portfolios: int, holdings_per_portfolio: int = 8, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"PORT{i:06d}" for i in range(1, portfolios + 1)], dtype=object)
+    df_general = pd.DataFrame({
+        "PORTFOLIOCODE": codes,
+        "PRODUCTCODE":   rng.choice([f"PRD{i:03d}" for i in range(1, 13)], portfolios),
+    })
+    rows = portfolios * holdings_per_portfolio
+    df_holdings = pd.DataFrame({
+        "PORTFOLIOCODE":  np.repeat(codes, holdings_per_portfolio),
+        "ASSETCLASSNAME": rng.choice(["Equity", "Fixed Income", "Unknown"], rows, p=[0.55, 0.4, 0.05]),
+        "MARKETVALUE":    rng.uniform(1e3, 1e6, rows),
+    })
+    return df_general, df_holdings
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark relationship index lookups.")
+    parser.add_argument("--portfolios", type=int, default=100_000)
+    parser.add_argument("--filter-sample", type=int, default=1_000,
+                        help="portfolios resolved with DataFrame filters (extrapolated)")
+    args = parser.parse_args()
+
+    df_general, df_holdings = make_universe(args.portfolios)
+    df_assoc, t_derive = timed(lambda: generate_portfolio_benchmark_association(df_general, df_holdings))
+    index, t_build = timed(lambda: RelationshipIndex(df_assoc, df_general))
+
+    codes = df_general["PORTFOLIOCODE"].tolist()
+    _, t_index = timed(lambda: index.primary_benchmarks(codes))
+    sample = codes[: args.filter_sample]
+    _, t_filter = timed(lambda: [
+        df_assoc.loc[(df_assoc["PORTFOLIOCODE"] == c) & (df_assoc["RANK"] == 1), "BENCHMARKCODE"].iloc[0]
+        for c in sample
+    ])
+
+    print(f"portfolios:        {args.portfolios}")
+    print(f"derive table:      {t_derive * 1000:.0f} ms ({len(df_assoc)} rows)")
+    print(f"build index:       {t_build * 1000:.0f} ms")
+    print(f"resolve (index):   {t_index * 1000:.1f} ms")
+    print(f"resolve (filters): ~{t_filter / len(sample) * args.portfolios:.1f} s extrapolated")
+
+
+if __name__ == "__main__":
+    main()
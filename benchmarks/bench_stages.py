@@ -0,0 +1,264 @@
+# Benchmark: every pipeline stage on fixture data, at several scales
+# Each stage runs against deterministic provider-shaped fixtures (benchmarks/fixtures.py)
+# with the metadata and currency caches pre-seeded in a scratch cache dir, so nothing
+# touches Yahoo, REST Countries or Snowflake. Wall time (best of --repeat) and peak
+# traced memory are appended per (stage, scale) to a JSON-lines results file tagged
+# with the current commit; --compare REF prints the change against an earlier run.
+#
+#   python -m benchmarks.bench_stages --scales 1 4 16
+#   python -m benchmarks.bench_stages --stages performance_factors --compare HEAD~1
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks import fixtures
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_FILE = ROOT / "benchmarks" / "results" / "stages.jsonl"
+DAYS = 1260  # ~5 years of business days per price series
+
+
+# ---- stages: scale -> (timed callable, rows it produces); setup is not timed ----
+
+def performance_factors(scale: int) -> Tuple[Callable, int]:
+    from source_code.Portfolio_Performance.PortfolioPerformance_Table import compute_performance_factors
+
+    tickers = fixtures.fund_tickers(12 * scale)
+    raw = fixtures.grouped_download(tickers, DAYS)
+    ratios = fixtures.expense_ratios(tickers)
+    return (lambda: compute_performance_factors(raw, ratios, tickers)), 2 * len(tickers) * (DAYS - 1)
+
+
+def _performance_inputs(scale: int) -> Tuple:
+    """Merged holdings, performance factors and portfolios for 10 * scale portfolios."""
+    from source_code.Holding_Details.HoldingDetails_Table import generate_merged_holdings
+    from source_code.Portfolio_General_Information.PortfolioGeneralInformation_table import generate_portfolio_general
+    from source_code.Portfolio_Performance.PortfolioPerformance_Table import compute_performance_factors
+    from source_code.utils.metadata_cache import get_cache
+    from source_code.utils.metadata_cache.yahoo import INFO_NAMESPACE
+
+    tickers = fixtures.FUND_TICKERS
+    get_cache().put_many(INFO_NAMESPACE, fixtures.ticker_infos(tickers))
+    factors = compute_performance_factors(fixtures.grouped_download(tickers, DAYS), fixtures.expense_ratios(tickers))
+    holdings = fixtures.fund_holdings(tickers, 20, 200)
+    _seed_modules(["defaultKeyStatistics", "price", "fundProfile"],
+                  fixtures.holding_modules(holdings["symbol"].unique().tolist()))
+    portfolios = generate_portfolio_general(10 * scale, rng=random.Random(42))
+    merged = generate_merged_holdings(holdings, df_portfolios=portfolios)
+    return merged, factors, portfolios
+
+
+def portfolio_performance(scale: int) -> Tuple[Callable, int]:
+    from source_code.Portfolio_Performance.PortfolioPerformance_Table import generate_portfolio_performance
+
+    merged, factors, portfolios = _performance_inputs(scale)
+
+    def run():
+        return generate_portfolio_performance(df_merged=merged, df_performance_dict=factors, df_portfolios=portfolios)
+    return run, len(merged)
+
+
+def portfolio_performance_stream(scale: int) -> Tuple[Callable, int]:
+    """Same table streamed to a CSV in blocks of 10 portfolios: peak memory should stay flat with scale."""
+    from source_code.Portfolio_Performance.PortfolioPerformance_Table import iter_portfolio_performance
+
+    merged, factors, portfolios = _performance_inputs(scale)
+
+    def run():
+        with open(os.devnull, "w") as sink:
+            for i, df in enumerate(iter_portfolio_performance(
+                df_merged=merged, df_performance_dict=factors, df_portfolios=portfolios, portfolios_per_chunk=10
+            )):
+                df.to_csv(sink, index=False, header=i == 0)
+    return run, len(merged)
+
+
+def holdings_dictionary(scale: int) -> Tuple[Callable, int]:
+    from source_code.Holding_Details.HoldingDetails_Table import create_holdings_dictionary
+
+    holdings = fixtures.fund_holdings(fixtures.FUND_TICKERS, 40 * scale, 600 * scale)
+    _seed_modules(["defaultKeyStatistics", "price", "fundProfile"],
+                  fixtures.holding_modules(holdings["symbol"].unique().tolist()))
+    return (lambda: create_holdings_dictionary(holdings)), len(holdings)
+
+
+def benchmark_characteristics(scale: int) -> Tuple[Callable, int]:
+    from source_code.Benchmark_Characteristic import BenchmarkCharacteristic_table as bc
+    from source_code.Benchmark_Characteristic.Constituent_Characteristics import (
+        FUNDAMENTAL_MODULES,
+        register_constituent_source,
+    )
+    from source_code.utils.metadata_cache import get_cache
+    from source_code.utils.metadata_cache.yahoo import INFO_NAMESPACE
+
+    benchmark_map = {f"fixture{i}": f"^FX{i}" for i in range(2 * scale)}
+    tickers = list(benchmark_map.values()) + bc.ETF_PROXIES
+    get_cache().put_many(INFO_NAMESPACE, fixtures.ticker_infos(tickers))
+    close = fixtures.single_download(252 * max(bc.RETURN_WINDOWS))["Close"]
+    for t in tickers:
+        bc._history_cache[t] = (max(bc.RETURN_WINDOWS), close)
+
+    members = fixtures.symbols("C", 500)
+    _seed_modules(FUNDAMENTAL_MODULES, fixtures.constituent_modules(members))
+    for code in benchmark_map:
+        register_constituent_source(code, lambda: members)
+
+    return (lambda: bc.build_benchmark_characteristics_table(benchmark_map)), len(benchmark_map) * len(bc.CHARACTERISTICS)
+
+
+def benchmark_load(scale: int) -> Tuple[Callable, int]:
+    from source_code.Benchmark_Performance.Benchmark_Performance_table import shape_benchmark_performance
+
+    downloads = {f"^BM{i}": fixtures.single_download(DAYS * 4, seed=i) for i in range(2 * scale)}
+
+    def run():
+        frames = [shape_benchmark_performance(raw, ticker) for ticker, raw in downloads.items()]
+        return load_benchmarks_sqlite(frames)
+    return run, 2 * scale * DAYS * 4
+
+
+def currency_parsing(scale: int) -> Tuple[Callable, int]:
+    from source_code.utils.Currency_table import CurrencyReference, parse_countries
+
+    payload = fixtures.countries_payload(250 * scale)
+    return (lambda: CurrencyReference(parse_countries(payload))), len(payload)
+
+
+STAGES: Dict[str, Callable[[int], Tuple[Callable, int]]] = {
+    "performance_factors":       performance_factors,
+    "portfolio_performance":     portfolio_performance,
+    "performance_stream":        portfolio_performance_stream,
+    "holdings_dictionary":       holdings_dictionary,
+    "benchmark_characteristics": benchmark_characteristics,
+    "benchmark_load":            benchmark_load,
+    "currency_parsing":          currency_parsing,
+}
+
+
+# ---- helpers ----
+
+def _seed_modules(modules: List[str], data: Dict[str, dict]) -> None:
+    from source_code.utils.metadata_cache import get_cache
+    from source_code.utils.metadata_cache.yahoo import MODULES_NAMESPACE
+
+    get_cache().put_many(f"{MODULES_NAMESPACE}:{'+'.join(sorted(modules))}", data)
+
+
+def _seed_currency_cache(countries: int = 250) -> None:
+    from source_code.utils.Currency_table import _cache_paths
+
+    data_path, meta_path = _cache_paths()
+    data_path.write_text(json.dumps(fixtures.countries_payload(countries)))
+    meta_path.write_text(json.dumps({"checked_at": time.time()}))
+
+
+def load_benchmarks_sqlite(frames: list) -> int:
+    """
+    orchestrate_benchmark_load's warehouse half (validate, temp table, MERGE) on a
+    fresh in-memory SQLite stand-in. Returns the number of rows merged.
+    """
+    import pandas as pd
+
+    from source_code.Benchmark_Performance.Benchmark_Performance_to_Snowflake import (
+        KEY_COLUMNS,
+        TABLE,
+        load_benchmark_frame,
+    )
+    from source_code.utils.warehouse import sqlite_pool
+
+    df_all = pd.concat(frames, ignore_index=True)
+    pool = sqlite_pool(":memory:", size=1)
+    try:
+        with pool.cursor() as cs:
+            pool.ensure_table(cs, TABLE, df_all.columns.tolist(), KEY_COLUMNS)
+            return load_benchmark_frame(cs, df_all, pool)
+    finally:
+        pool.close()
+
+
+def measure(fn: Callable, repeat: int) -> Tuple[float, float]:
+    """Best wall time over `repeat` untraced runs, and peak traced memory (MB) of one more."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / 2 ** 20
+
+
+def current_commit() -> str:
+    proc = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or "unknown"
+
+
+def resolve_commit(ref: str) -> str:
+    proc = subprocess.run(["git", "rev-parse", "--short", ref], cwd=ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or ref
+
+
+def load_results(path: Path) -> List[dict]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage offline.")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE, help="JSON-lines file results are appended to")
+    parser.add_argument("--compare", default=None, metavar="REF",
+                        help="Print changes against the latest results recorded for this commit")
+    args = parser.parse_args()
+
+    # Scratch caches, set before any source_code module opens them
+    os.environ["TDF_CACHE_DIR"] = tempfile.mkdtemp(prefix="tdf_bench_")
+    logging.disable(logging.WARNING)
+    _seed_currency_cache()
+
+    commit = current_commit()
+    baseline = {}
+    if args.compare:
+        ref = resolve_commit(args.compare)
+        baseline = {(r["stage"], r["scale"]): r for r in load_results(args.output) if r["commit"].startswith(ref)}
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    print(f"{'stage':<26}{'scale':>6}{'rows':>10}{'seconds':>10}{'peak MB':>10}{'vs base':>10}")
+    with args.output.open("a") as out:
+        for stage in args.stages:
+            for scale in args.scales:
+                fn, rows = STAGES[stage](scale)
+                seconds, peak_mb = measure(fn, args.repeat)
+                record = {
+                    "commit": commit, "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "stage": stage, "scale": scale, "rows": rows,
+                    "seconds": round(seconds, 6), "peak_mb": round(peak_mb, 3),
+                    "python": platform.python_version(),
+                }
+                out.write(json.dumps(record) + "\n")
+                base = baseline.get((stage, scale))
+                change = f"{seconds / base['seconds']:.2f}x" if base else ""
+                print(f"{stage:<26}{scale:>6}{rows:>10}{seconds:>10.3f}{peak_mb:>10.1f}{change:>10}")
+    print(f"results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
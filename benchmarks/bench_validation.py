@@ -0,0 +1,80 @@
+# Benchmark: pre-load validation of a million-row batch
+# Builds synthetic PORTFOLIOGENERALINFORMATION / PRODUCTMASTER / CURRENCY parents and
+# a HOLDINGDETAILS + PORTFOLIOPERFORMANCE batch, seeds a few known violations, and
+# times validate_tables (no network).
+#
+#   python -m benchmarks.bench_validation --rows 1000000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from source_code.utils.validation import validate_tables
+
+
+def make_batch(rows: int, seed: int = 42) -> dict:
+    rng = np.random.default_rng(seed)
+    portfolios = np.array([f"PORT{i:03d}" for i in range(1, 501)], dtype=object)
+    products = np.array([f"PRD{i:03d}" for i in range(1, 13)], dtype=object)
+    tickers = np.array([f"TK{i:04d}" for i in range(2000)], dtype=object)
+    dates = pd.date_range("2020-01-01", periods=rows // len(portfolios) + 1, freq="D")
+
+    general = pd.DataFrame({
+        "PORTFOLIOCODE":    portfolios,
+        "PRODUCTCODE":      rng.choice(products, len(portfolios)),
+        "BASECURRENCYCODE": "USD",
+    })
+    holdings = pd.DataFrame({
+        "PORTFOLIOCODE": np.repeat(portfolios, rows // len(portfolios) + 1)[:rows],
+        "TICKER":        tickers[np.arange(rows) % len(tickers)],
+        "HISTORYDATE":   np.tile(dates, len(portfolios))[:rows],
+        "CURRENCYCODE":  "USD",
+        "PRICE":         rng.uniform(5, 500, rows),
+        "QUANTITY":      rng.uniform(1, 1000, rows),
+        "MARKETVALUE":   rng.uniform(10, 1e6, rows),
+    })
+    performance = pd.DataFrame({
+        "PORTFOLIOCODE":     holdings["PORTFOLIOCODE"],
+        "HISTORYDATE":       holdings["HISTORYDATE"],
+        "PERFORMANCETYPE":   "Portfolio Gross",
+        "CURRENCYCODE":      "USD",
+        "PERFORMANCEFACTOR": rng.normal(0, 0.01, rows),
+    })
+
+    # known violations: 3 orphans, 2 duplicate keys, 1 negative price, 1 null factor
+    holdings.loc[[10, 20, 30], "PORTFOLIOCODE"] = "PORT999"
+    holdings.loc[[41, 42], ["PORTFOLIOCODE", "TICKER", "HISTORYDATE"]] = holdings.loc[40, ["PORTFOLIOCODE", "TICKER", "HISTORYDATE"]].values
+    holdings.loc[50, "PRICE"] = -1.0
+    performance.loc[60, "PERFORMANCEFACTOR"] = np.nan
+
+    return {
+        "PRODUCTMASTER":               pd.DataFrame({"PRODUCTCODE": products}),
+        "CURRENCY":                    pd.DataFrame({"currency_code": ["USD", "EUR", "GBP"]}),
+        "PORTFOLIOGENERALINFORMATION": general,
+        "HOLDINGDETAILS":              holdings,
+        "PORTFOLIOPERFORMANCE":        performance,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pre-load validation.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tables = make_batch(args.rows)
+    timings, issues = [], None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        issues = validate_tables(tables)
+        timings.append(time.perf_counter() - start)
+
+    print(f"rows/table:  {args.rows}")
+    print(f"validation:  {min(timings) * 1000:.0f} ms")
+    print(issues[["TABLE", "CHECK", "COLUMN", "FAILED"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# Deterministic stand-ins for provider responses, shaped like the real payloads
+# (yfinance downloads, yahooquery modules, REST Countries JSON) so every stage
+# can run at any scale without network access.
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+FUND_TICKERS = ['VSVNX', 'VLXVX', 'VTTSX', 'VFFVX', 'VFIFX', 'VTIVX',
+                'VFORX', 'VTTHX', 'VTHRX', 'VTTVX', 'VTWNX', 'VTINX']
+LAST_DATE = "2025-06-30"  # fixed so results do not drift with the calendar
+CATEGORIES = ["Large Blend", "Intermediate Core Bond", "Foreign Large Blend", "Inflation-Protected Bond", "Money Market"]
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "CAD", "CHF"]
+REGIONS = ["Americas", "Europe", "Asia", "Africa", "Oceania", "Antarctic"]
+
+
+def symbols(prefix: str, n: int) -> List[str]:
+    return [f"{prefix}{i:05d}" for i in range(n)]
+
+
+def fund_tickers(n: int) -> List[str]:
+    """The 12 real fund tickers first, then synthetic ones."""
+    return (FUND_TICKERS + symbols("TDF", max(0, n - len(FUND_TICKERS))))[:n]
+
+
+def business_days(days: int) -> pd.DatetimeIndex:
+    return pd.bdate_range(end=LAST_DATE, periods=days)
+
+
+def price_paths(n: int, days: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.01, size=(days, n))
+    return 100 * np.exp(np.cumsum(returns, axis=0))
+
+
+def grouped_download(tickers: List[str], days: int, seed: int = 0) -> pd.DataFrame:
+    """yf.download(tickers, group_by='ticker'): columns (ticker, field)."""
+    close = price_paths(len(tickers), days, seed)
+    frames = {t: pd.DataFrame({"Close": close[:, i], "Adj Close": close[:, i]}) for i, t in enumerate(tickers)}
+    out = pd.concat(frames, axis=1)
+    out.index = business_days(days)
+    return out
+
+
+def single_download(days: int, seed: int = 0) -> pd.DataFrame:
+    """yf.download(ticker, auto_adjust=True) for one ticker: a "Close" column."""
+    return pd.DataFrame({"Close": price_paths(1, days, seed)[:, 0]}, index=business_days(days).rename("Date"))
+
+
+def expense_ratios(tickers: List[str]) -> Dict[str, float]:
+    return {t: 0.0008 + 0.0001 * (i % 5) for i, t in enumerate(tickers)}
+
+
+def fund_holdings(funds: List[str], per_fund: int, universe: int, seed: int = 0) -> pd.DataFrame:
+    """Ticker(funds).fund_holding_info flattened the way fetch_holdings_ticker does."""
+    rng = np.random.default_rng(seed)
+    pool = symbols("H", universe)
+    rows = []
+    for fund in funds:
+        members = rng.choice(pool, size=min(per_fund, universe), replace=False)
+        weights = rng.dirichlet(np.ones(len(members)))
+        rows += [{"symbol": s, "holdingName": f"{s} Fund", "holdingPercent": float(w), "fund": fund}
+                 for s, w in zip(members, weights)]
+    return pd.DataFrame(rows)
+
+
+def holding_modules(syms: List[str]) -> Dict[str, dict]:
+    """get_quote_modules(syms, ['defaultKeyStatistics', 'price', 'fundProfile'])."""
+    return {
+        s: {
+            "defaultKeyStatistics": {"totalAssets": 1e9 + i},
+            "price": {"shortName": f"{s} Fund", "currency": CURRENCIES[i % 2],
+                      "quoteType": "MUTUALFUND", "regularMarketPreviousClose": 10.0 + i % 90},
+            "fundProfile": {"categoryName": CATEGORIES[i % len(CATEGORIES)]},
+        }
+        for i, s in enumerate(syms)
+    }
+
+
+def ticker_infos(tickers: List[str]) -> Dict[str, dict]:
+    """yfinance Ticker.info subset read by BenchmarkCharacteristic_table."""
+    return {
+        t: {"currency": "USD", "regularMarketPrice": 500.0 + i, "trailingPE": 24.0, "forwardPE": 21.0,
+            "priceToBook": 4.5, "priceToSalesTrailing12Months": 2.8, "dividendYield": 0.013,
+            "trailingAnnualDividendRate": 6.5, "trailingEps": 20.0, "earningsQuarterlyGrowth": 0.08,
+            "returnOnEquity": 0.18, "marketCap": 4e11, "totalAssets": 4e11}
+        for i, t in enumerate(tickers)
+    }
+
+
+def constituent_modules(members: List[str], seed: int = 0) -> Dict[str, dict]:
+    """get_quote_modules(members, FUNDAMENTAL_MODULES) for index constituents."""
+    rng = np.random.default_rng(seed)
+    caps = rng.lognormal(24, 1.2, len(members))
+    out = {}
+    for i, s in enumerate(members):
+        price = float(rng.uniform(10, 900))
+        out[s] = {
+            "price": {"marketCap": float(caps[i]), "regularMarketPrice": price},
+            "defaultKeyStatistics": {"sharesOutstanding": float(caps[i] / price), "priceToBook": float(rng.uniform(1, 10)),
+                                     "trailingEps": price / 25, "forwardEps": price / 21,
+                                     "earningsQuarterlyGrowth": float(rng.normal(0.05, 0.1))},
+            "summaryDetail": {"trailingPE": float(rng.uniform(8, 60)), "forwardPE": float(rng.uniform(8, 45)),
+                              "priceToSalesTrailing12Months": float(rng.uniform(0.5, 12)),
+                              "dividendYield": float(rng.uniform(0, 0.05)), "dividendRate": price * 0.015},
+            "financialData": {"returnOnEquity": float(rng.normal(0.15, 0.08))},
+        }
+    return out
+
+
+def countries_payload(n: int) -> List[dict]:
+    """REST Countries /v3.1/all?fields=name,currencies,cca2,region,subregion."""
+    payload = []
+    for i in range(n):
+        codes = [CURRENCIES[i % len(CURRENCIES)]] + ([CURRENCIES[(i + 1) % len(CURRENCIES)]] if i % 7 == 0 else [])
+        payload.append({
+            "name": {"common": f"Country {i}", "official": f"Republic of Country {i}"},
+            "cca2": f"{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}",
+            "region": REGIONS[i % len(REGIONS)],
+            "subregion": f"Subregion {i % 20}",
+            "currencies": {c: {"name": f"{c} currency", "symbol": "$"} for c in codes},
+        })
+    return payload
+
+
+def performance_table(portfolios: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """PORTFOLIOPERFORMANCE rows: gross and net daily factors per portfolio."""
+    rng = np.random.default_rng(seed)
+    dates = business_days(days).date
+    n = portfolios * days * 2
+    return pd.DataFrame({
+        "PORTFOLIOCODE":            np.repeat([f"PORT{i + 1:03d}" for i in range(portfolios)], days * 2),
+        "HISTORYDATE":              np.tile(np.repeat(dates, 2), portfolios),
+        "CURRENCYCODE":             "USD",
+        "CURRENCY":                 "US Dollar",
+        "PERFORMANCECATEGORY":      "Asset Class",
+        "PERFORMANCECATEGORYNAME":  "Total Portfolio",
+        "PERFORMANCETYPE":          np.tile(["Portfolio Gross", "Portfolio Net"], portfolios * days),
+        "PERFORMANCEINCEPTIONDATE": dates[0],
+        "PORTFOLIOINCEPTIONDATE":   dates[0],
+        "PERFORMANCEFREQUENCY":     "D",
+        "PERFORMANCEFACTOR":        rng.normal(0.0003, 0.01, n),
+    })
@@ -1,12 +1,22 @@
-import time
 import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from typing import Optional, List
+import numpy as np
 import pandas as pd
-import yfinance as yf
-from IPython.display import display
 from dateutil.relativedelta import relativedelta
 
+from source_code.Benchmark_Characteristic.Characteristic_Snapshots import record_characteristic_snapshot
+from source_code.Benchmark_Characteristic.Constituent_Characteristics import build_constituent_characteristics
+from source_code.utils.Currency_table import DISPLAY_NAMES
+from source_code.utils.instrumentation import bind
+from source_code.utils.metadata_cache import get_ticker_info
+from source_code.utils.providers import get_provider
+from source_code.utils.rate_limiter import TokenBucket
+from source_code.utils.schema import apply_schema
+
 # ---- display config: disable scientific notation ----
 pd.set_option("display.float_format", lambda x: f"{x:.6f}" if pd.notna(x) and isinstance(x, float) else x)
 
@@ -32,41 +42,49 @@ CHARACTERISTICS = [
 ]
 
 ETF_PROXIES = ["SPY", "IVV", "VOO"]  # fallback universe for index metrics
-DELAY_BETWEEN_BMARKS = 1.0  # throttle between benchmark processing
+REQUESTS_PER_SECOND = 2.0  # sustained Yahoo request rate shared by all workers
+REQUEST_BURST = 4  # requests allowed to go out back-to-back before throttling
+MAX_WORKERS = 8  # concurrent fetch threads across benchmarks and fallback ETFs
+RETURN_WINDOWS = (1, 3, 5, 10)  # trailing return horizons (years) served from one history download
 
-CURRENCY_NAME_MAP = {
-    "USD": "US Dollar",
-    "EUR": "Euro",
-    "GBP": "British Pound",
-    "JPY": "Japanese Yen",
-}
+SP500_CODES = ("sp500", "gspc")  # benchmark codes of the S&P 500: the original script's and the warehouse's
+CURRENCY_NAME_MAP = DISPLAY_NAMES  # shared with the portfolio tables, see utils/Currency_table
 
-# caches
-_info_cache: dict[str, dict] = {}
+# caches (ticker metadata lives in the shared on-disk cache, see utils/metadata_cache)
 _constituent_cache: Optional[int] = None
+_history_cache: dict[str, tuple[int, Optional[pd.Series]]] = {}
+_fetch_locks: defaultdict = defaultdict(threading.Lock)  # one in-flight fetch per ticker/resource
+_limiter = TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
+
+
+def set_rate_limit(requests_per_second: float, burst: Optional[int] = None) -> None:
+    """
+    Reconfigure the shared limiter that every Yahoo request in this module waits on.
+    """
+    _limiter.configure(requests_per_second, burst)
+
+
+def _throttle(limiter: Optional[TokenBucket] = None) -> None:
+    # replayed responses cost no request, so only live traffic waits on the limiter
+    if get_provider().remote:
+        (limiter or _limiter).acquire()
 
 
 # ---- yfinance helpers ----
-def get_info(ticker: str) -> dict:
-    if ticker in _info_cache:
-        return _info_cache[ticker]
-    try:
-        tkr = yf.Ticker(ticker)
-        info = tkr.info or {}
-    except Exception as e:
-        logger.warning(f"{ticker} info fetch failed: {e}")
-        info = {}
-    _info_cache[ticker] = info
-    return info
+# `limiter` lets one build run at its own rate; None waits on the shared bucket
+def get_info(ticker: str, limiter: Optional[TokenBucket] = None) -> dict:
+    with _fetch_locks[("info", ticker)]:
+        return get_ticker_info(ticker, throttle=(limiter or _limiter).acquire)
 
 
-def get_price(ticker: str) -> Optional[float]:
-    info = get_info(ticker)
+def get_price(ticker: str, limiter: Optional[TokenBucket] = None) -> Optional[float]:
+    info = get_info(ticker, limiter)
     price = info.get("regularMarketPrice") or info.get("previousClose")
     if price is not None:
         return price
     try:
-        hist = yf.Ticker(ticker).history(period="5d", interval="1d")
+        _throttle(limiter)
+        hist = get_provider().history(ticker, period="5d", interval="1d")
         if hist is not None and "Close" in hist and len(hist) > 0:
             return hist["Close"].iloc[-1]
     except Exception as e:
@@ -74,41 +92,92 @@ def get_price(ticker: str) -> Optional[float]:
     return None
 
 
-def get_return(ticker: str, years: int) -> Optional[float]:
+def get_close_history(
+    ticker: str, years: int = max(RETURN_WINDOWS), limiter: Optional[TokenBucket] = None
+) -> Optional[pd.Series]:
+    """
+    Daily Close series covering the trailing `years`, downloaded once per ticker.
+    A cached series is reused for any window it covers; a longer request refetches.
+    """
+    cached = _history_cache.get(ticker)
+    if cached is not None and cached[0] >= years:
+        return cached[1]
+    with _fetch_locks[("history", ticker)]:
+        cached = _history_cache.get(ticker)
+        if cached is not None and cached[0] >= years:
+            return cached[1]
+        close = None
+        try:
+            end_date = pd.Timestamp("today").normalize()
+            start_date = end_date - relativedelta(years=years)
+            _throttle(limiter)
+            hist = get_provider().history(
+                ticker,
+                start=start_date.strftime("%Y-%m-%d"),
+                end=end_date.strftime("%Y-%m-%d"),
+                interval="1d",
+            )
+            if hist is not None and "Close" in hist and len(hist) > 0:
+                close = hist["Close"].dropna()
+        except Exception as e:
+            logger.warning(f"{ticker} {years}y history fetch failed: {e}")
+        _history_cache[ticker] = (years, close)
+    return close
+
+
+def get_trailing_returns(
+    ticker: str, windows: tuple = RETURN_WINDOWS, limiter: Optional[TokenBucket] = None
+) -> dict[int, Optional[float]]:
+    """
+    Annualized trailing returns (%) for every window in `windows`, all sliced
+    from a single cached Close history.
+    """
+    out: dict[int, Optional[float]] = {y: None for y in windows}
+    close = get_close_history(ticker, max(max(windows), max(RETURN_WINDOWS)), limiter)
+    if close is None or len(close) < 2:
+        return out
+
+    end_date = pd.Timestamp("today").normalize()
+    if close.index.tz is not None:
+        end_date = end_date.tz_localize(close.index.tz)
+    years = np.asarray(windows, dtype=float)
+    starts = pd.DatetimeIndex([end_date - relativedelta(years=int(y)) for y in windows])
+    pos = close.index.searchsorted(starts, side="left")
+
+    values = close.to_numpy(dtype=float)
+    valid = pos < len(values) - 1
+    start_px = values[np.minimum(pos, len(values) - 1)]
+    valid &= start_px > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = values[-1] / start_px
+        ann = np.where(years <= 1, total - 1, total ** (1 / years) - 1) * 100
+
+    for y, ok, val in zip(windows, valid, ann):
+        if ok and np.isfinite(val):
+            out[y] = float(val)
+    return out
+
+
+def get_return(ticker: str, years: int, limiter: Optional[TokenBucket] = None) -> Optional[float]:
     """
     Annualized return over `years` using Close price.
     """
-    try:
-        end_date = pd.Timestamp("today").normalize()
-        start_date = end_date - relativedelta(years=years)
-        hist = yf.Ticker(ticker).history(
-            start=start_date.strftime("%Y-%m-%d"),
-            end=end_date.strftime("%Y-%m-%d"),
-            interval="1d",
-        )
-        if hist is None or "Close" not in hist or len(hist) < 2:
-            return None
-        close = hist["Close"]
-        start = close.iloc[0]
-        end = close.iloc[-1]
-        if start <= 0 or end is None:
-            return None
-        total = end / start
-        if years <= 1:
-            ann = total - 1
-        else:
-            ann = total ** (1 / years) - 1
-        return ann * 100
-    except Exception as e:
-        logger.warning(f"{ticker} {years}y return failed: {e}")
-        return None
+    return get_trailing_returns(ticker, (years,), limiter)[years]
+
+
+def first_available_return(tickers: List[str], years: int, limiter: Optional[TokenBucket] = None) -> Optional[float]:
+    for t in tickers:
+        ret = get_return(t, years, limiter)
+        if ret is not None:
+            return ret
+    return None
 
 
 # ---- characteristic-specific computation with fallback across tickers ----
-def compute_pe_ttm(tickers: List[str]) -> Optional[float]:
+def compute_pe_ttm(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
-        price = get_price(t)
+        info = get_info(t, limiter)
+        price = get_price(t, limiter)
         trailing_eps = info.get("trailingEps")
         if price is not None and trailing_eps not in (None, 0):
             try:
@@ -120,10 +189,10 @@ def compute_pe_ttm(tickers: List[str]) -> Optional[float]:
     return None
 
 
-def compute_forward_pe(tickers: List[str]) -> Optional[float]:
+def compute_forward_pe(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
-        price = get_price(t)
+        info = get_info(t, limiter)
+        price = get_price(t, limiter)
 
         if info.get("forwardPE") is not None:
             return info.get("forwardPE")
@@ -147,12 +216,12 @@ def compute_forward_pe(tickers: List[str]) -> Optional[float]:
     return None
 
 
-def compute_price_to_book(tickers: List[str]) -> Optional[float]:
+def compute_price_to_book(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
+        info = get_info(t, limiter)
         if info.get("priceToBook") is not None:
             return info.get("priceToBook")
-        price = get_price(t)
+        price = get_price(t, limiter)
         book_value = info.get("bookValue")
         if price is not None and book_value not in (None, 0):
             try:
@@ -162,9 +231,9 @@ def compute_price_to_book(tickers: List[str]) -> Optional[float]:
     return None
 
 
-def compute_price_to_sales(tickers: List[str]) -> Optional[float]:
+def compute_price_to_sales(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
+        info = get_info(t, limiter)
         if info.get("priceToSalesTrailing12Months") is not None:
             return info.get("priceToSalesTrailing12Months")
         market_cap = info.get("marketCap")
@@ -177,13 +246,13 @@ def compute_price_to_sales(tickers: List[str]) -> Optional[float]:
     return None
 
 
-def compute_dividend_yield(tickers: List[str]) -> Optional[float]:
+def compute_dividend_yield(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
+        info = get_info(t, limiter)
         if info.get("dividendYield") is not None:
             return info.get("dividendYield")
         dividend_rate = info.get("dividendRate") or info.get("trailingAnnualDividendRate")
-        price = get_price(t)
+        price = get_price(t, limiter)
         if dividend_rate not in (None,) and price not in (None, 0):
             try:
                 return dividend_rate / price
@@ -192,9 +261,9 @@ def compute_dividend_yield(tickers: List[str]) -> Optional[float]:
     return None
 
 
-def compute_dividends_per_share(tickers: List[str]) -> Optional[float]:
+def compute_dividends_per_share(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
+        info = get_info(t, limiter)
         if info.get("dividendRate") is not None:
             return info.get("dividendRate")
         if info.get("trailingAnnualDividendRate") is not None:
@@ -202,36 +271,36 @@ def compute_dividends_per_share(tickers: List[str]) -> Optional[float]:
     return None
 
 
-def compute_eps_ltm(tickers: List[str]) -> Optional[float]:
+def compute_eps_ltm(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
+        info = get_info(t, limiter)
         if info.get("trailingEps") is not None:
             return info.get("trailingEps")
     return None
 
 
-def compute_eps_growth(tickers: List[str]) -> Optional[float]:
+def compute_eps_growth(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
+        info = get_info(t, limiter)
         if info.get("earningsQuarterlyGrowth") is not None:
             return info.get("earningsQuarterlyGrowth")
     return None
 
 
-def compute_roe(tickers: List[str]) -> Optional[float]:
+def compute_roe(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
+        info = get_info(t, limiter)
         if info.get("returnOnEquity") is not None:
             return info.get("returnOnEquity")
     return None
 
 
-def compute_market_cap(tickers: List[str]) -> Optional[float]:
+def compute_market_cap(tickers: List[str], limiter: Optional[TokenBucket] = None) -> Optional[float]:
     for t in tickers:
-        info = get_info(t)
+        info = get_info(t, limiter)
         if info.get("marketCap") is not None:
             return info.get("marketCap")
-        price = get_price(t)
+        price = get_price(t, limiter)
         shares = info.get("sharesOutstanding")
         if price not in (None,) and shares not in (None,):
             try:
@@ -241,22 +310,25 @@ def compute_market_cap(tickers: List[str]) -> Optional[float]:
     return None
 
 
-def get_sp500_constituent_count() -> int:
+def get_sp500_constituent_count(limiter: Optional[TokenBucket] = None) -> int:
     global _constituent_cache
     if _constituent_cache is not None:
         return _constituent_cache
+    with _fetch_locks["constituents"]:
+        if _constituent_cache is None:
+            _constituent_cache = _fetch_sp500_constituent_count(limiter)
+    return _constituent_cache
 
+
+def _fetch_sp500_constituent_count(limiter: Optional[TokenBucket] = None) -> int:
     def try_holdings(etf: str) -> Optional[int]:
-        tkr = yf.Ticker(etf)
-        for attr in ("holdings", "fund_holdings", "get_holdings"):
-            try:
-                candidate = getattr(tkr, attr)
-                df = candidate() if callable(candidate) else candidate
-                if isinstance(df, pd.DataFrame) and not df.empty:
-                    return len(df)
-            except Exception:
-                continue
-        return None
+        _throttle(limiter)
+        try:
+            df = get_provider().etf_holdings(etf)
+        except Exception as e:
+            logger.warning(f"{etf} holdings fetch failed: {e}")
+            return None
+        return len(df) if df is not None else None
 
     count = None
     for etf in ETF_PROXIES:
@@ -271,68 +343,125 @@ def get_sp500_constituent_count() -> int:
         count = int(count)
     except Exception:
         pass
-    _constituent_cache = count
     return count
 
 
 # ---- orchestrator ----
-def build_benchmark_characteristics_table(benchmark_map: dict[str, str]) -> pd.DataFrame:
+def prefetch_benchmark_data(
+    tickers: List[str], max_workers: int = MAX_WORKERS, limiter: Optional[TokenBucket] = None
+) -> None:
+    """
+    Warm the info and history caches for every ticker concurrently; the token
+    bucket (`limiter`, else the shared one), not the worker count, bounds the
+    request rate.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(bind(get_info), t, limiter) for t in tickers]
+        futures += [pool.submit(bind(get_close_history), t, max(RETURN_WINDOWS), limiter) for t in tickers]
+        for f in futures:
+            f.result()
+
+
+def build_benchmark_rows(code: str, primary_ticker: str, limiter: Optional[TokenBucket] = None) -> list[dict]:
+    logger.info(f"Building characteristics for {code} ({primary_ticker})")
+    as_of = date.today()
+    tickers = [primary_ticker] + ETF_PROXIES  # primary then fallbacks
+
+    currency = get_info(primary_ticker, limiter).get("currency") or "USD"
+    currency_name = CURRENCY_NAME_MAP.get(currency, currency)
+
+    index_level = get_price(primary_ticker, limiter)
+
+    # bottom-up from constituents where the members can be listed ...
+    try:
+        values = build_constituent_characteristics(code, index_level=index_level) or {}
+    except Exception as e:
+        logger.warning(f"{code} constituent characteristics failed, using proxies: {e}")
+        values = {}
+
+    # ... proxy ETFs fill whatever the constituent engine could not
+    proxy_values = {
+        "# of Securities": lambda: get_sp500_constituent_count(limiter) if code.lower().startswith(SP500_CODES) else None,
+        "Price/Earnings (TTM)": lambda: compute_pe_ttm(tickers, limiter),
+        "Price/Earnings (Forward)": lambda: compute_forward_pe(tickers, limiter),
+        "Price/Book Value": lambda: compute_price_to_book(tickers, limiter),
+        "Price/Sales (TTM)": lambda: compute_price_to_sales(tickers, limiter),
+        "Dividend Yield": lambda: compute_dividend_yield(tickers, limiter),
+        "Dividends Per Share": lambda: compute_dividends_per_share(tickers, limiter),
+        "EPS LTM": lambda: compute_eps_ltm(tickers, limiter),
+        "EPS Growth (YoY)": lambda: compute_eps_growth(tickers, limiter),
+        "Return On Equity": lambda: compute_roe(tickers, limiter),
+        "1-Year Return (%)": lambda: first_available_return(tickers, 1, limiter),
+        "5-Year Return (%)": lambda: first_available_return(tickers, 5, limiter),
+        "Market Cap": lambda: compute_market_cap(tickers, limiter),
+    }
+    for name, compute in proxy_values.items():
+        if values.get(name) is None:
+            values[name] = compute()
+
+    # keep point-in-time fundamentals so later backfills can re-price them
+    try:
+        record_characteristic_snapshot(code, as_of, values, index_level)
+    except Exception as e:
+        logger.warning(f"{code} snapshot write failed: {e}")
+
     rows = []
-    for code, primary_ticker in benchmark_map.items():
-        logger.info(f"Building characteristics for {code} ({primary_ticker})")
-        as_of = date.today()
-        tickers = [primary_ticker] + ETF_PROXIES  # primary then fallbacks
-
-        currency = get_info(primary_ticker).get("currency") or "USD"
-        currency_name = CURRENCY_NAME_MAP.get(currency, currency)
-
-        values = {
-            "# of Securities": get_sp500_constituent_count() if code.lower().startswith("sp500") else None,
-            "Price/Earnings (TTM)": compute_pe_ttm(tickers),
-            "Price/Earnings (Forward)": compute_forward_pe(tickers),
-            "Price/Book Value": compute_price_to_book(tickers),
-            "Price/Sales (TTM)": compute_price_to_sales(tickers),
-            "Dividend Yield": compute_dividend_yield(tickers),
-            "Dividends Per Share": compute_dividends_per_share(tickers),
-            "EPS LTM": compute_eps_ltm(tickers),
-            "EPS Growth (YoY)": compute_eps_growth(tickers),
-            "Return On Equity": compute_roe(tickers),
-            "1-Year Return (%)": get_return(primary_ticker, 1) or next((get_return(etf, 1) for etf in ETF_PROXIES if get_return(etf, 1) is not None), None),
-            "5-Year Return (%)": get_return(primary_ticker, 5) or next((get_return(etf, 5) for etf in ETF_PROXIES if get_return(etf, 5) is not None), None),
-            "Market Cap": compute_market_cap(tickers),
-        }
-
-        for name in CHARACTERISTICS:
-            val = values.get(name)
-            if name == "# of Securities" and val is not None:
-                try:
-                    val = int(val)
-                except Exception:
-                    pass
-            rows.append({
-                "BENCHMARKCODE":             code,
-                "CURRENCYCODE":              currency,
-                "CURRENCY":                  currency_name,
-                "LANGUAGECODE":              "en-US",
-                "CATEGORY":                  "Total",
-                "CATEGORYNAME":              None,
-                "CHARACTERISTICNAME":        name,
-                "CHARACTERISTICDISPLAYNAME": name,
-                "STATISTICTYPE":             "NA",
-                "CHARACTERISTICVALUE":       val,
-                "ABBREVIATEDTEXT":           None,
-                "HISTORYDATE":               as_of
-            })
-
-        time.sleep(DELAY_BETWEEN_BMARKS)
+    for name in CHARACTERISTICS:
+        val = values.get(name)
+        if name == "# of Securities" and val is not None:
+            try:
+                val = int(val)
+            except Exception:
+                pass
+        rows.append({
+            "BENCHMARKCODE":             code,
+            "CURRENCYCODE":              currency,
+            "CURRENCY":                  currency_name,
+            "LANGUAGECODE":              "en-US",
+            "CATEGORY":                  "Total",
+            "CATEGORYNAME":              None,
+            "CHARACTERISTICNAME":        name,
+            "CHARACTERISTICDISPLAYNAME": name,
+            "STATISTICTYPE":             "NA",
+            "CHARACTERISTICVALUE":       val,
+            "ABBREVIATEDTEXT":           None,
+            "HISTORYDATE":               as_of
+        })
+    return rows
+
+
+def build_benchmark_characteristics_table(
+    benchmark_map: dict[str, str],
+    max_workers: int = MAX_WORKERS,
+    requests_per_second: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Build characteristics for every benchmark concurrently.
+
+    All primary and fallback tickers are prefetched in parallel, then each
+    benchmark is assembled on the pool from the warm caches. Pass
+    `requests_per_second` to run this build on its own token bucket; the
+    shared one, and every other caller waiting on it, is left untouched.
+    """
+    limiter = TokenBucket(requests_per_second, REQUEST_BURST) if requests_per_second is not None else None
+    prefetch_benchmark_data(list(benchmark_map.values()) + ETF_PROXIES, max_workers, limiter)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(bind(build_benchmark_rows), code, ticker, limiter) for code, ticker in benchmark_map.items()
+        ]
+        rows = [row for f in futures for row in f.result()]
+
     df = pd.DataFrame(rows)
     df = df.dropna(subset=["CHARACTERISTICVALUE"])
-    return df
+    return apply_schema(df, "BENCHMARKCHARACTERISTICS")
 
 
 # ---- execution ----
 if __name__ == "__main__":
-    benchmark_map = {"sp500": "^GSPC"}
+    from IPython.display import display
+
+    benchmark_map = {"GSPC": "^GSPC"}
     df_char = build_benchmark_characteristics_table(benchmark_map)
     display(df_char)
 
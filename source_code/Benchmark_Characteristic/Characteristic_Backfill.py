@@ -0,0 +1,175 @@
+import argparse
+import logging
+import math
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from source_code.Benchmark_Characteristic.BenchmarkCharacteristic_table import (
+    CHARACTERISTICS,
+    CURRENCY_NAME_MAP,
+    get_close_history,
+    get_info,
+)
+from source_code.Benchmark_Characteristic.Characteristic_Snapshots import load_characteristic_snapshots
+from source_code.utils.schema import apply_schema
+
+logger = logging.getLogger("benchmark_backfill")
+
+DEFAULT_INCEPTION = "2004-01-01"
+
+
+def month_end_dates(inception: str, end: Optional[str] = None) -> pd.DatetimeIndex:
+    end_ts = pd.Timestamp(end) if end else pd.Timestamp("today").normalize()
+    return pd.date_range(pd.Timestamp(inception), end_ts, freq="ME")
+
+
+def _trailing_returns(
+    index: pd.DatetimeIndex, close: np.ndarray, as_of_pos: np.ndarray, as_of: pd.DatetimeIndex, years: int
+) -> np.ndarray:
+    """
+    Annualized trailing return (%) ending at each as-of position, NaN where the
+    history does not reach back `years`.
+    """
+    starts = as_of - pd.DateOffset(years=years)
+    start_pos = index.searchsorted(starts, side="left")
+    covered = (starts >= index[0] - pd.Timedelta(days=7)) & (start_pos < as_of_pos) & (as_of_pos >= 0)
+    start_px = close[np.clip(start_pos, 0, len(close) - 1)]
+    end_px = close[np.clip(as_of_pos, 0, len(close) - 1)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = end_px / start_px
+        ann = total - 1 if years <= 1 else total ** (1 / years) - 1
+    return np.where(covered & (start_px > 0), ann * 100, np.nan)
+
+
+def compute_characteristic_history(
+    close: pd.Series,
+    snapshots: pd.DataFrame,
+    as_of: pd.DatetimeIndex,
+) -> pd.DataFrame:
+    """
+    Characteristics as of every date in `as_of`, evaluated as one batch.
+
+    Prices come from the last close on or before each date; fundamentals from
+    the latest snapshot known on that date (no look-ahead), re-priced with
+    that close. Before the first snapshot there is nothing to re-price, so
+    every fundamental is NaN there and only the trailing returns are set.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed by `as_of`, one column per name in CHARACTERISTICS.
+    """
+    index = close.index.tz_localize(None) if close.index.tz is not None else close.index
+    px = close.to_numpy(dtype=float)
+    pos = index.searchsorted(as_of, side="right") - 1
+    price = np.where(pos >= 0, px[np.clip(pos, 0, len(px) - 1)], np.nan)
+
+    grid = pd.DataFrame({"HISTORYDATE": as_of})
+    if len(snapshots):
+        pit = pd.merge_asof(grid, snapshots.sort_values("HISTORYDATE"), on="HISTORYDATE", direction="backward")
+    else:
+        pit = grid.reindex(columns=["HISTORYDATE"] + list(snapshots.columns.drop("HISTORYDATE", errors="ignore")))
+    col = lambda name: pd.to_numeric(pit.get(name), errors="coerce").to_numpy(dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = {
+            "# of Securities":          col("SECURITIES"),
+            "Price/Earnings (TTM)":     price / col("EARNINGS_TTM"),
+            "Price/Earnings (Forward)": price / col("EARNINGS_FWD"),
+            "Price/Book Value":         price / col("BOOK"),
+            "Price/Sales (TTM)":        price / col("SALES"),
+            "Dividend Yield":           col("DIVIDENDS") / price * 100,
+            "Dividends Per Share":      col("DIVIDENDS"),
+            "EPS LTM":                  col("EARNINGS_TTM"),
+            "EPS Growth (YoY)":         col("EPS_GROWTH"),
+            "Return On Equity":         col("ROE"),
+            "1-Year Return (%)":        _trailing_returns(index, px, pos, as_of, 1),
+            "5-Year Return (%)":        _trailing_returns(index, px, pos, as_of, 5),
+            "Market Cap":               col("MARKETCAP") * price / col("INDEXLEVEL"),
+        }
+    return pd.DataFrame(out, index=as_of)[CHARACTERISTICS]
+
+
+def build_benchmark_characteristics_history(
+    benchmark_map: dict[str, str],
+    inception: str = DEFAULT_INCEPTION,
+    end: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Backfill BENCHMARKCHARACTERISTIC rows for every month-end since `inception`.
+    Output columns match build_benchmark_characteristics_table.
+
+    Limitation: fundamentals (P/E, P/B, P/S, yields, EPS, ROE, member count,
+    market cap) come only from the snapshots the daily build has recorded, so
+    they start at the first recorded snapshot; there is no historical source
+    for earlier point-in-time fundamentals. Month-ends before it get only the
+    1-Year and 5-Year returns, and characteristics that cannot be computed
+    are left out rather than emitted as NaN.
+    """
+    as_of = month_end_dates(inception, end)
+    years = max(1, math.ceil((pd.Timestamp("today") - pd.Timestamp(inception)).days / 365.25))
+    frames = []
+    for code, ticker in benchmark_map.items():
+        close = get_close_history(ticker, years)
+        if close is None or close.empty:
+            logger.warning(f"{code}: no price history for {ticker}, skipping backfill")
+            continue
+        snapshots = load_characteristic_snapshots(code)
+        logger.info(f"{code}: backfilling {len(as_of)} month-ends from {len(snapshots)} snapshots")
+
+        wide = compute_characteristic_history(close, snapshots, as_of)
+        if len(snapshots):
+            first = snapshots["HISTORYDATE"].min()
+            logger.info(f"{code}: fundamentals from {first:%Y-%m-%d}; "
+                        f"{int((as_of < first).sum())} earlier month-ends carry trailing returns only")
+        else:
+            logger.warning(f"{code}: no snapshots recorded yet; backfilling trailing returns only")
+        long = wide.rename_axis("HISTORYDATE").reset_index().melt(
+            id_vars="HISTORYDATE", var_name="CHARACTERISTICNAME", value_name="CHARACTERISTICVALUE"
+        )
+        currency = get_info(ticker).get("currency") or "USD"
+        long = long.assign(
+            BENCHMARKCODE=code,
+            CURRENCYCODE=currency,
+            CURRENCY=CURRENCY_NAME_MAP.get(currency, currency),
+            LANGUAGECODE="en-US",
+            CATEGORY="Total",
+            CATEGORYNAME=None,
+            CHARACTERISTICDISPLAYNAME=long["CHARACTERISTICNAME"],
+            STATISTICTYPE="NA",
+            ABBREVIATEDTEXT=None,
+            HISTORYDATE=long["HISTORYDATE"].dt.date,
+        )
+        frames.append(long)
+
+    cols = [
+        "BENCHMARKCODE", "CURRENCYCODE", "CURRENCY", "LANGUAGECODE", "CATEGORY",
+        "CATEGORYNAME", "CHARACTERISTICNAME", "CHARACTERISTICDISPLAYNAME",
+        "STATISTICTYPE", "CHARACTERISTICVALUE", "ABBREVIATEDTEXT", "HISTORYDATE",
+    ]
+    if not frames:
+        return pd.DataFrame(columns=cols)
+    df = pd.concat(frames, ignore_index=True)[cols]
+    df = df.dropna(subset=["CHARACTERISTICVALUE"])  # fundamentals before the first snapshot, short histories
+    df = df.sort_values(["BENCHMARKCODE", "HISTORYDATE"], kind="stable").reset_index(drop=True)
+    return apply_schema(df, "BENCHMARKCHARACTERISTICS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill month-end benchmark characteristics.")
+    parser.add_argument("--benchmark", nargs="+", default=["GSPC=^GSPC"], help="CODE=TICKER pairs")
+    parser.add_argument("--inception", default=DEFAULT_INCEPTION, help="First month-end to compute (YYYY-MM-DD)")
+    parser.add_argument("--end", default=date.today().isoformat(), help="Last date YYYY-MM-DD")
+    args = parser.parse_args()
+
+    benchmark_map = dict(pair.split("=", 1) for pair in args.benchmark)
+    df_hist = build_benchmark_characteristics_history(benchmark_map, args.inception, args.end)
+    print(df_hist)
+    print(f"Rows: {len(df_hist)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import logging
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from source_code.utils.metadata_cache import default_cache_dir
+
+logger = logging.getLogger("benchmark_snapshots")
+
+# Index-level fundamentals, in index points, derived from each run's ratios so that
+# any later price can be turned back into a ratio without look-ahead.
+SNAPSHOT_COLUMNS = [
+    "BENCHMARKCODE", "HISTORYDATE", "INDEXLEVEL",
+    "EARNINGS_TTM", "EARNINGS_FWD", "BOOK", "SALES", "DIVIDENDS",
+    "EPS_GROWTH", "ROE", "SECURITIES", "MARKETCAP",
+]
+
+SNAPSHOT_TABLE = "characteristic_snapshots"
+
+
+def snapshot_path() -> Path:
+    """
+    The metadata cache's SQLite file: it is already shared by every process,
+    and SQLite serialises their writes, which an appended CSV does not.
+    """
+    return default_cache_dir() / "metadata.sqlite"
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    columns = ", ".join(
+        f"{c} TEXT NOT NULL" if c in ("BENCHMARKCODE", "HISTORYDATE") else f"{c} REAL" for c in SNAPSHOT_COLUMNS
+    )
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} ({columns}, PRIMARY KEY (BENCHMARKCODE, HISTORYDATE))")
+    return conn
+
+
+def _write(conn: sqlite3.Connection, df: pd.DataFrame) -> None:
+    df = df.reindex(columns=SNAPSHOT_COLUMNS)
+    df["HISTORYDATE"] = pd.to_datetime(df["HISTORYDATE"]).dt.strftime("%Y-%m-%d")
+    rows = [
+        tuple(None if pd.isna(v) else v.item() if isinstance(v, np.generic) else v for v in row)
+        for row in df.itertuples(index=False, name=None)
+    ]
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {SNAPSHOT_TABLE} ({', '.join(SNAPSHOT_COLUMNS)}) VALUES ({', '.join('?' * len(SNAPSHOT_COLUMNS))})",
+        rows,
+    )
+
+
+def _per_point(level: Optional[float], ratio: Optional[float]) -> float:
+    if level in (None, 0) or ratio in (None, 0):
+        return np.nan
+    return level / ratio
+
+
+def record_characteristic_snapshot(
+    code: str,
+    as_of: date,
+    values: dict,
+    index_level: Optional[float],
+    path: Optional[Path] = None,
+) -> None:
+    """
+    Store today's point-in-time fundamentals for `code` (one row per day; a
+    later write on the same day replaces the earlier one).
+    """
+    dy = values.get("Dividend Yield")
+    row = {
+        "BENCHMARKCODE": code,
+        "HISTORYDATE":   pd.Timestamp(as_of),
+        "INDEXLEVEL":    index_level,
+        "EARNINGS_TTM":  _per_point(index_level, values.get("Price/Earnings (TTM)")),
+        "EARNINGS_FWD":  _per_point(index_level, values.get("Price/Earnings (Forward)")),
+        "BOOK":          _per_point(index_level, values.get("Price/Book Value")),
+        "SALES":         _per_point(index_level, values.get("Price/Sales (TTM)")),
+        "DIVIDENDS":     index_level * dy / 100 if index_level is not None and dy is not None else np.nan,
+        "EPS_GROWTH":    values.get("EPS Growth (YoY)"),
+        "ROE":           values.get("Return On Equity"),
+        "SECURITIES":    values.get("# of Securities"),
+        "MARKETCAP":     values.get("Market Cap"),
+    }
+    path = Path(path) if path is not None else snapshot_path()
+    conn = _connect(path)
+    try:
+        with conn:
+            _write(conn, pd.DataFrame([row], columns=SNAPSHOT_COLUMNS))
+    finally:
+        conn.close()
+
+
+def load_characteristic_snapshots(code: str, path: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Snapshots for `code` sorted by date, one row per day.
+    """
+    path = Path(path) if path is not None else snapshot_path()
+    conn = _connect(path)
+    try:
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM {SNAPSHOT_TABLE} WHERE BENCHMARKCODE = ? ORDER BY HISTORYDATE",
+            conn, params=(code,),
+        )
+    finally:
+        conn.close()
+    df["HISTORYDATE"] = pd.to_datetime(df["HISTORYDATE"])
+    return df
@@ -0,0 +1,179 @@
+import io
+import logging
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from source_code.utils.metadata_cache import get_cache, get_quote_modules
+from source_code.utils.providers import get_provider
+
+logger = logging.getLogger("benchmark_constituents")
+
+# ---- constituent sources ----
+SP500_CONSTITUENTS_URL = (
+    "https://raw.githubusercontent.com/datasets/s-and-p-500-companies/main/data/constituents.csv"
+)
+CONSTITUENTS_NAMESPACE = "constituents"
+
+# (yahooquery module, field) for every column of the fundamentals matrix
+FUNDAMENTAL_FIELDS = {
+    "marketCap":                    ("price", "marketCap"),
+    "regularMarketPrice":           ("price", "regularMarketPrice"),
+    "sharesOutstanding":            ("defaultKeyStatistics", "sharesOutstanding"),
+    "trailingPE":                   ("summaryDetail", "trailingPE"),
+    "forwardPE":                    ("summaryDetail", "forwardPE"),
+    "priceToBook":                  ("defaultKeyStatistics", "priceToBook"),
+    "priceToSalesTrailing12Months": ("summaryDetail", "priceToSalesTrailing12Months"),
+    "dividendYield":                ("summaryDetail", "dividendYield"),
+    "dividendRate":                 ("summaryDetail", "dividendRate"),
+    "trailingEps":                  ("defaultKeyStatistics", "trailingEps"),
+    "forwardEps":                   ("defaultKeyStatistics", "forwardEps"),
+    "earningsQuarterlyGrowth":      ("defaultKeyStatistics", "earningsQuarterlyGrowth"),
+    "returnOnEquity":               ("financialData", "returnOnEquity"),
+}
+FUNDAMENTAL_MODULES = sorted({module for module, _ in FUNDAMENTAL_FIELDS.values()})
+
+# characteristic -> ratio column aggregated as a cap-weighted harmonic mean
+HARMONIC_RATIOS = {
+    "Price/Earnings (TTM)":     "trailingPE",
+    "Price/Earnings (Forward)": "forwardPE",
+    "Price/Book Value":         "priceToBook",
+    "Price/Sales (TTM)":        "priceToSalesTrailing12Months",
+}
+
+
+def csv_constituent_source(path_or_url: str, symbol_column: str = "Symbol") -> Callable[[], List[str]]:
+    """
+    Constituent loader reading ticker symbols from a CSV file or URL.
+    """
+    def load() -> List[str]:
+        source = path_or_url
+        if str(path_or_url).startswith(("http://", "https://")):
+            resp = get_provider().http_get(path_or_url)
+            resp.raise_for_status()
+            source = io.BytesIO(resp.content)
+        symbols = pd.read_csv(source, usecols=[symbol_column])[symbol_column]
+        # Yahoo uses '-' for share classes (BRK.B -> BRK-B)
+        return symbols.dropna().astype(str).str.strip().str.replace(".", "-", regex=False).tolist()
+    return load
+
+
+CONSTITUENT_SOURCES: dict[str, Callable[[], List[str]]] = {
+    "gspc": csv_constituent_source(SP500_CONSTITUENTS_URL),
+}
+CONSTITUENT_SOURCES["sp500"] = CONSTITUENT_SOURCES["gspc"]  # the original script's code for the S&P 500
+
+
+def register_constituent_source(code: str, loader: Callable[[], List[str]]) -> None:
+    """
+    Enable bottom-up characteristics for `code`; `loader` returns its member tickers.
+    """
+    CONSTITUENT_SOURCES[code.lower()] = loader
+
+
+def has_constituent_source(code: str) -> bool:
+    return code.lower() in CONSTITUENT_SOURCES
+
+
+def load_constituents(code: str) -> List[str]:
+    """
+    Member tickers of benchmark `code`, cached for a day in the metadata cache.
+    """
+    key = code.lower()
+    loader = CONSTITUENT_SOURCES[key]
+
+    def fetch(_missing: List[str]) -> dict:
+        try:
+            return {key: {"members": loader()}}
+        except Exception as e:
+            logger.warning(f"{code} constituent list fetch failed: {e}")
+            return {}
+
+    entry = get_cache().get_or_fetch(CONSTITUENTS_NAMESPACE, [key], fetch)[key]
+    return list(entry.get("members", []))
+
+
+def load_constituent_fundamentals(members: List[str]) -> pd.DataFrame:
+    """
+    Members x FUNDAMENTAL_FIELDS float matrix from one batched (and cached) quote request.
+    """
+    data = get_quote_modules(members, FUNDAMENTAL_MODULES)
+    records = []
+    for sym in members:
+        modules = data.get(sym) or {}
+        row = {}
+        for col, (module, field) in FUNDAMENTAL_FIELDS.items():
+            value = (modules.get(module) or {}).get(field)
+            row[col] = value if isinstance(value, (int, float)) else np.nan
+        records.append(row)
+    return pd.DataFrame.from_records(records, index=pd.Index(members, name="TICKER"),
+                                     columns=list(FUNDAMENTAL_FIELDS)).astype(float)
+
+
+def compute_index_characteristics(
+    fundamentals: pd.DataFrame,
+    index_level: Optional[float] = None,
+) -> dict[str, Optional[float]]:
+    """
+    Aggregate constituent fundamentals into index-level characteristics.
+
+    Valuation ratios are cap-weighted harmonic means (sum of caps over sum of
+    cap / ratio, i.e. aggregate price over aggregate earnings, book or sales),
+    yields and growth are cap-weighted means, and ROE is aggregate earnings
+    over aggregate book. Per-share figures are expressed in index points and
+    need `index_level`.
+    """
+    m = fundamentals[list(FUNDAMENTAL_FIELDS)].to_numpy(dtype=float)
+    col = {name: i for i, name in enumerate(FUNDAMENTAL_FIELDS)}
+
+    cap = m[:, col["marketCap"]]
+    cap = np.where(np.isfinite(cap), cap, m[:, col["regularMarketPrice"]] * m[:, col["sharesOutstanding"]])
+    has_cap = np.isfinite(cap) & (cap > 0)
+    cap = np.where(has_cap, cap, 0.0)
+
+    def safe_div(num, den):
+        return num / den if den else np.nan
+
+    # all harmonic ratios in one pass over the ratio block
+    ratio_idx = [col[c] for c in HARMONIC_RATIOS.values()]
+    ratios = m[:, ratio_idx]
+    valid = np.isfinite(ratios) & (ratios != 0) & has_cap[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        implied = np.where(valid, cap[:, None] / ratios, 0.0)  # earnings, book, sales
+    harmonic = [safe_div(num, den) for num, den in zip((cap[:, None] * valid).sum(axis=0), implied.sum(axis=0))]
+    out = dict(zip(HARMONIC_RATIOS, harmonic))
+
+    # cap-weighted arithmetic means
+    mean_cols = m[:, [col["dividendYield"], col["earningsQuarterlyGrowth"]]]
+    mvalid = np.isfinite(mean_cols) & has_cap[:, None]
+    weights = cap[:, None] * mvalid
+    weighted = np.where(mvalid, mean_cols, 0.0) * weights
+    div_yield, eps_growth = (safe_div(n, d) for n, d in zip(weighted.sum(axis=0), weights.sum(axis=0)))
+
+    pe, pb = out["Price/Earnings (TTM)"], out["Price/Book Value"]
+    level = index_level if index_level not in (None, 0) else np.nan
+    out.update({
+        "# of Securities":     int(len(fundamentals)),
+        "Dividend Yield":      div_yield * 100,  # percent, as in the proxy-based table
+        "Dividends Per Share": level * div_yield,
+        "EPS LTM":             safe_div(level, pe),
+        "EPS Growth (YoY)":    eps_growth,
+        "Return On Equity":    safe_div(pb, pe),
+        "Market Cap":          float(cap.sum()) if has_cap.any() else np.nan,
+    })
+    return {k: (None if v is None or not np.isfinite(v) else v) for k, v in out.items()}
+
+
+def build_constituent_characteristics(code: str, index_level: Optional[float] = None) -> Optional[dict]:
+    """
+    Bottom-up characteristics for `code`, or None when its members cannot be listed.
+    """
+    if not has_constituent_source(code):
+        return None
+    members = load_constituents(code)
+    if not members:
+        return None
+    logger.info(f"{code}: aggregating fundamentals for {len(members)} constituents")
+    fundamentals = load_constituent_fundamentals(members)
+    return compute_index_characteristics(fundamentals, index_level)
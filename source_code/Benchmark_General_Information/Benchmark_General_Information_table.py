@@ -14,49 +14,61 @@ import pandas as pd
 import random
 import logging
 
+from source_code.utils.schema import apply_schema
+from source_code.utils.validation import NAME_PATTERNS, pattern_distribution
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Function to generate benchmark names
-def generate_name():
+def generate_name(rng=None):
     """
     Generate appropriate benchmark names for target date funds.
 
+    Args:
+        rng (random.Random): Random source; defaults to the module-level generator
+
     Returns:
         str: A realistic benchmark name relevant for target date funds
     """
+    rng = rng or random
+
     # Target date specific benchmark patterns
     name_types = [
         # Standard market benchmarks used for TDFs
-        lambda: f"{random.choice(['S&P Target Date', 'Morningstar Lifetime', 'Bloomberg US Agg', 'Russell Target Date', 'FTSE Target Date'])} {random.choice(['2025', '2030', '2035', '2040', '2045', '2050', '2055', '2060', '2065'])} Index",
+        lambda: f"{rng.choice(['S&P Target Date', 'Morningstar Lifetime', 'Bloomberg US Agg', 'Russell Target Date', 'FTSE Target Date'])} {rng.choice(['2025', '2030', '2035', '2040', '2045', '2050', '2055', '2060', '2065'])} Index",
 
         # Equity/Fixed Income blend benchmarks
-        lambda: f"{random.randint(30, 80)}% {random.choice(['MSCI ACWI', 'S&P 500', 'MSCI World', 'Russell 3000'])} / {random.randint(20, 70)}% {random.choice(['Bloomberg Agg', 'Bloomberg US Treasury', 'FTSE World Gov Bond', 'ICE BofA US Corp'])}",
+        lambda: f"{rng.randint(30, 80)}% {rng.choice(['MSCI ACWI', 'S&P 500', 'MSCI World', 'Russell 3000'])} / {rng.randint(20, 70)}% {rng.choice(['Bloomberg Agg', 'Bloomberg US Treasury', 'FTSE World Gov Bond', 'ICE BofA US Corp'])}",
 
         # Composite benchmarks
-        lambda: f"Composite {random.choice(['Target Retirement', 'Target Date', 'Lifecycle'])} {random.choice(['2025', '2030', '2035', '2040', '2045', '2050', '2055', '2060', '2065'])} Index",
+        lambda: f"Composite {rng.choice(['Target Retirement', 'Target Date', 'Lifecycle'])} {rng.choice(['2025', '2030', '2035', '2040', '2045', '2050', '2055', '2060', '2065'])} Index",
 
         # Common industry benchmark combinations
-        lambda: f"{random.choice(['MSCI ACWI IMI', 'Russell 3000', 'MSCI World', 'Bloomberg Global Agg'])} {random.choice(['Target Date', 'Retirement', 'Lifecycle'])} Benchmark",
+        lambda: f"{rng.choice(['MSCI ACWI IMI', 'Russell 3000', 'MSCI World', 'Bloomberg Global Agg'])} {rng.choice(['Target Date', 'Retirement', 'Lifecycle'])} Benchmark",
 
         # Risk-based benchmark allocations
-        lambda: f"{random.choice(['Conservative', 'Moderate', 'Balanced', 'Growth', 'Aggressive'])} {random.randint(20, 80)}% Equity Benchmark",
+        lambda: f"{rng.choice(['Conservative', 'Moderate', 'Balanced', 'Growth', 'Aggressive'])} {rng.randint(20, 80)}% Equity Benchmark",
 
         # Standard industry glide path benchmarks
-        lambda: f"{random.choice(['S&P', 'Morningstar', 'FTSE', 'Bloomberg'])} Target Date {random.choice(['2025', '2030', '2035', '2040', '2045', '2050', '2055', '2060', '2065'])} {random.choice(['Index', 'Benchmark', 'Composite'])}"
+        lambda: f"{rng.choice(['S&P', 'Morningstar', 'FTSE', 'Bloomberg'])} Target Date {rng.choice(['2025', '2030', '2035', '2040', '2045', '2050', '2055', '2060', '2065'])} {rng.choice(['Index', 'Benchmark', 'Composite'])}"
     ]
-    return random.choice(name_types)()
+    return rng.choice(name_types)()
 
-def generate_benchmark_general_information(num_records=20, benchmark_codes=None):
+def generate_benchmark_general_information(num_records=None, benchmark_codes=None, rng=None):
     """
     Generate a DataFrame with benchmark general information for target date funds.
 
-    Creates data for the AST_MULTIASSET_DB.DBO.BENCHMARKGENERALINFORMATION table.
+    Creates data for the AST_MULTIASSET_DB.DBO.BENCHMARKGENERALINFORMATION table,
+    which is keyed on BENCHMARKCODE: the default of one record per code is the
+    loadable shape, larger counts give several candidate names per code.
 
     Args:
-        num_records (int): Total number of benchmark records to generate
+        num_records (int): Total number of benchmark records to generate. Default is one per code
         benchmark_codes (list): List of benchmark codes to use. Default is ["GSPC"]
+        rng (random.Random): Random source for the names, e.g. random.Random(42) for
+            reproducible output; defaults to the module-level generator
 
     Returns:
         pandas.DataFrame: DataFrame with generated benchmark general information
@@ -64,6 +76,8 @@ def generate_benchmark_general_information(num_records=20, benchmark_codes=None)
     # Default to GSPC if no benchmark codes provided
     if benchmark_codes is None:
         benchmark_codes = ["GSPC"]
+    if num_records is None:
+        num_records = len(benchmark_codes)
 
     logger.info(f"Generating {num_records} benchmark general information records")
     data = []
@@ -103,11 +117,11 @@ def generate_benchmark_general_information(num_records=20, benchmark_codes=None)
             data.append({
                 "BENCHMARKCODE": code,
                 "SYMBOL": "BLANK",  # All symbols set to "BLANK" as requested
-                "NAME": generate_name(),
+                "NAME": generate_name(rng),
                 "ISBEGINOFDAYPERFORMANCE": False  # All were FALSE in sample data
             })
 
-    df = pd.DataFrame(data)
+    df = apply_schema(pd.DataFrame(data), "BENCHMARKGENERALINFORMATION")
     logger.info(f"Generated {len(df)} benchmark general information records")
     return df
 
@@ -121,36 +135,7 @@ def analyze_name_patterns(df):
     Returns:
         dict: Mapping of patterns to counts
     """
-    patterns = {
-        'Target Date': 0,
-        'S&P': 0,
-        'Morningstar': 0,
-        'Bloomberg': 0,
-        'Composite': 0,
-        'MSCI': 0,
-        'Russell': 0,
-        'Equity %': 0
-    }
-
-    for name in df['NAME']:
-        if 'Target Date' in name:
-            patterns['Target Date'] += 1
-        if 'S&P' in name:
-            patterns['S&P'] += 1
-        if 'Morningstar' in name:
-            patterns['Morningstar'] += 1
-        if 'Bloomberg' in name:
-            patterns['Bloomberg'] += 1
-        if 'Composite' in name:
-            patterns['Composite'] += 1
-        if 'MSCI' in name:
-            patterns['MSCI'] += 1
-        if 'Russell' in name:
-            patterns['Russell'] += 1
-        if '%' in name:
-            patterns['Equity %'] += 1
-
-    return patterns
+    return pattern_distribution(df['NAME'], NAME_PATTERNS)
 
 def main():
     """
@@ -159,15 +144,11 @@ def main():
     Returns:
         pandas.DataFrame: Generated benchmark information
     """
-    # Generate benchmark data for both GSPC and AGG
-    total_records = 20
+    # Generate benchmark data for both GSPC and AGG, one record per code
     benchmark_codes = ["GSPC", "AGG"]
 
     logger.info("Starting benchmark general information data generation")
-    df_benchmarks = generate_benchmark_general_information(
-        num_records=total_records,
-        benchmark_codes=benchmark_codes
-    )
+    df_benchmarks = generate_benchmark_general_information(benchmark_codes=benchmark_codes)
 
     # Verify that all symbols are set to "BLANK"
     symbol_check = df_benchmarks['SYMBOL'].unique().tolist()
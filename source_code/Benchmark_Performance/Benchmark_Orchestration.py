@@ -5,24 +5,11 @@
 
 import datetime as dt
 import pandas as pd
-import yfinance as yf
-import snowflake.connector
-from dotenv import load_dotenv
-import os
-# laod .env setup 
-load_dotenv("Rick_config.env")
-
-def get_snowflake_connection():
-     return snowflake.connector.connect(
-         user=os.getenv("SNOWFLAKE_USER"),
-         password=os.getenv("SNOWFLAKE_PASSWORD"),
-         account=os.getenv("SNOWFLAKE_ACCOUNT"),
-         warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-         database=os.getenv("SNOWFLAKE_DATABASE"),
-         schema=os.getenv("SNOWFLAKE_SCHEMA"),
-         role=os.getenv("SNOWFLAKE_ROLE")
-     )
 
+from source_code.Benchmark_Performance.Benchmark_Performance_to_Snowflake import load_benchmark_frame
+from source_code.utils.instrumentation import provider_call
+from source_code.utils.providers import get_provider
+from source_code.utils.warehouse import get_warehouse
 
 def get_benchmark_performance(
     benchmark_ticker: str,
@@ -30,7 +17,7 @@ def get_benchmark_performance(
     end_date: str,
     frequency: str = "D"
 ) -> pd.DataFrame:
-    raw = yf.download(
+    raw = get_provider().download(
         benchmark_ticker,
         start=start_date,
         end=end_date,
@@ -75,23 +62,26 @@ def orchestrate_benchmark_load(
     end_date: str,
     frequency: str = "D"
 ):
-    ctx = get_snowflake_connection()
-    cs = ctx.cursor()
-    try:
+    # borrowed from the shared warehouse pool; the session is reused by later loads
+    pool = get_warehouse()
+    with pool.cursor() as cs:
         all_dfs = []
         today = dt.datetime.strptime(end_date, "%Y-%m-%d").date()
 
         for ticker in tickers:
             code = ticker.lstrip("^")
             # Check Whether specific data of the ticker exists or not
-            cs.execute(
-                "SELECT MAX(HISTORYDATE1) FROM AST_MULTIASSET_DB.DBO.BENCHMARKPERFORMANCE "
-                "WHERE BENCHMARKCODE = %s",
-                (code,)
-            )
-            last = cs.fetchone()[0]
+            with provider_call(f"{pool.dialect}.query"):
+                cs.execute(
+                    f"SELECT MAX(HISTORYDATE1) FROM {pool.table('BENCHMARKPERFORMANCE')} "
+                    "WHERE BENCHMARKCODE = %s",
+                    (code,)
+                )
+                last = cs.fetchone()[0]
             if last:
-            # If its is datetime.datetime, then get .date()
+            # If its is datetime.datetime, then get .date(); the SQLite stand-in returns text
+                if isinstance(last, str):
+                    last = dt.date.fromisoformat(last[:10])
                 last_date = last.date() if isinstance(last, dt.datetime) else last
                 start = last_date + dt.timedelta(days=1)
             else:
@@ -114,44 +104,10 @@ def orchestrate_benchmark_load(
         # concat it
         df_all = pd.concat(all_dfs, ignore_index=True)
 
-    
-
-        # create tmp in snowflake
-        print("► Creating temp table tmp_benchmarkperformance")
-        cs.execute("""
-            CREATE OR REPLACE TEMPORARY TABLE tmp_benchmarkperformance
-            LIKE AST_MULTIASSET_DB.DBO.BENCHMARKPERFORMANCE
-        """)
-
-        # Batch Insert
-        cols = df_all.columns.tolist()
-        placeholder = ", ".join(["%s"] * len(cols))
-        insert_sql = f"""
-            INSERT INTO tmp_benchmarkperformance ({', '.join(cols)})
-            VALUES ({placeholder})
-        """
-        data = [tuple(row) for row in df_all.itertuples(index=False, name=None)]
-        print(f"► Inserting {len(data)} rows into tmp_benchmarkperformance")
-        cs.executemany(insert_sql, data)
-        ctx.commit()
-
-        # MERGE to skip the duplicate data
-        print("► Merging into AST_MULTIASSET_DB.DBO.BENCHMARKPERFORMANCE")
-        merge_sql = f"""
-        MERGE INTO AST_MULTIASSET_DB.DBO.BENCHMARKPERFORMANCE AS tgt
-        USING tmp_benchmarkperformance AS src
-          ON tgt.BENCHMARKCODE = src.BENCHMARKCODE
-         AND tgt.HISTORYDATE1  = src.HISTORYDATE1
-        WHEN NOT MATCHED THEN
-          INSERT ({', '.join(cols)})
-          VALUES ({', '.join('src.' + c for c in cols)})
-        """
-        cs.execute(merge_sql)
-        print(f"► Merge inserted {cs.rowcount} new rows")
+        # validate, then temp table + batch insert + MERGE to skip the duplicate data
+        merged = load_benchmark_frame(cs, df_all, pool)
+        print(f"► Merge inserted {merged} new rows")
 
-    finally:
-        cs.close()
-        ctx.close()
 if __name__ == "__main__":
     TICKERS = ["^GSPC", "AGG"]
     FULL_START_DATE = "2004-01-01"
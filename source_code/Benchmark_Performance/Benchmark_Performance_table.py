@@ -1,6 +1,8 @@
 # benchmark_fetcher.py
 import pandas as pd
-import yfinance as yf
+
+from source_code.utils.providers import get_provider
+from source_code.utils.schema import apply_schema
 
 def get_benchmark_performance(
     benchmark_ticker: str,
@@ -14,7 +16,7 @@ def get_benchmark_performance(
       ["BENCHMARKCODE","PERFORMANCEDATATYPE","CURRENCYCODE","CURRENCY",
        "PERFORMANCEFREQUENCY","VALUE","HISTORYDATE1","HISTORYDATE"]
     """
-    raw = yf.download(
+    raw = get_provider().download(
         benchmark_ticker,
         start=start_date,
         end=end_date,
@@ -22,6 +24,14 @@ def get_benchmark_performance(
         progress=False,
         auto_adjust=True
     )
+    return shape_benchmark_performance(raw, benchmark_ticker, frequency)
+
+
+def shape_benchmark_performance(raw: pd.DataFrame, benchmark_ticker: str, frequency: str = "D") -> pd.DataFrame:
+    """
+    Shape a single-ticker yfinance download (DatetimeIndex, "Close" column) into
+    the BENCHMARKPERFORMANCE schema.
+    """
     if raw.empty:
         return pd.DataFrame(columns=[
             "BENCHMARKCODE","PERFORMANCEDATATYPE","CURRENCYCODE","CURRENCY",
@@ -118,7 +128,8 @@ def build_benchmark_performance(
     if save_csv_path:
         out.to_csv(save_csv_path, index=False)
 
-    return out
+    # the CSV keeps the warehouse's date / timestamp strings; the frame gets compact dtypes
+    return apply_schema(out, "BENCHMARKPERFORMANCE")
 
 
 if __name__ == "__main__":
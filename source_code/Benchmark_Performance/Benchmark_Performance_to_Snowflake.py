@@ -5,61 +5,73 @@
 
 import argparse
 import datetime as dt
-import os
-import pandas as pd
-import snowflake.connector
-from dotenv import load_dotenv
-from pathlib import Path
-from dotenv import load_dotenv
-import os
+from typing import Optional
 
-## pls define ur config env path in here, and put the snowflake login info inside
-ENV_PATH = Path(r"C:\Boston University_資料夾\BA888_Capstone\Target_Date_Fund\source_code\Benchmark_Performance\Rick_config.env") # change to ur path
-assert ENV_PATH.exists(), f".env not exist：{ENV_PATH}"
-load_dotenv(ENV_PATH)
+import pandas as pd
 
 
 # Import the fetcher (no files written)
 from .Benchmark_Performance_table import get_benchmark_performance
+from source_code.utils.instrumentation import provider_call
+from source_code.utils.validation import validate_tables
+from source_code.utils.warehouse import WarehousePool, get_warehouse
 
+TABLE = "BENCHMARKPERFORMANCE"
+TEMP_TABLE = "tmp_benchmarkperformance"
+KEY_COLUMNS = ["BENCHMARKCODE", "HISTORYDATE1"]
 
-# Load Snowflake credentials
-# load_dotenv("Rick_config.env")
-
-def get_snowflake_connection():
-    """
-    Create a Snowflake connection using environment variables.
-    """
-    return snowflake.connector.connect(
-        user=os.getenv("SNOWFLAKE_USER"),
-        password=os.getenv("SNOWFLAKE_PASSWORD"),
-        account=os.getenv("SNOWFLAKE_ACCOUNT"),
-        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-        database=os.getenv("SNOWFLAKE_DATABASE"),
-        schema=os.getenv("SNOWFLAKE_SCHEMA"),
-        role=os.getenv("SNOWFLAKE_ROLE")
-    )
 
-def get_last_date_for_code(cs, code: str):
+def get_last_date_for_code(cs, code: str, pool: Optional[WarehousePool] = None):
     """
-    Query Snowflake for the last (max) HISTORYDATE1 for a given BENCHMARKCODE.
+    Query the warehouse for the last (max) HISTORYDATE1 for a given BENCHMARKCODE.
     Returns a date object or None.
     """
-    cs.execute(
-        """
-        SELECT MAX(HISTORYDATE1)
-        FROM AST_MULTIASSET_DB.DBO.BENCHMARKPERFORMANCE
-        WHERE BENCHMARKCODE = %s
-        """,
-        (code,)
-    )
-    last = cs.fetchone()[0]
+    pool = pool or get_warehouse()
+    with provider_call(f"{pool.dialect}.query"):
+        cs.execute(
+            f"""
+            SELECT MAX(HISTORYDATE1)
+            FROM {pool.table(TABLE)}
+            WHERE BENCHMARKCODE = %s
+            """,
+            (code,)
+        )
+        last = cs.fetchone()[0]
     if last is None:
         return None
     if isinstance(last, dt.datetime):
         return last.date()
+    if isinstance(last, str):  # the SQLite stand-in stores dates as text
+        return dt.date.fromisoformat(last[:10])
     return last  # already a date
 
+def load_benchmark_frame(cs, df_all: pd.DataFrame, pool: Optional[WarehousePool] = None) -> int:
+    """
+    Validate a batch, bulk insert it into a temp table and MERGE the rows the
+    target lacks. Returns the number of rows merged.
+    """
+    pool = pool or get_warehouse()
+
+    # Refuse to load a batch with duplicate keys, nulls or out-of-range values
+    validate_tables({TABLE: df_all}, raise_on_error=True)
+
+    # Create temporary table that mirrors target schema
+    print(f"► Creating temporary table {TEMP_TABLE}")
+    pool.create_temp_like(cs, TEMP_TABLE, TABLE)
+
+    # Bulk insert into temp table
+    print(f"► Inserting {len(df_all)} rows into {TEMP_TABLE}")
+    with provider_call(f"{pool.dialect}.insert") as call:
+        call.rows = pool.insert_frame(cs, TEMP_TABLE, df_all)
+        cs.connection.commit()
+
+    # MERGE into target to avoid duplicates defensively
+    print(f"► Merging into {pool.table(TABLE)}")
+    with provider_call(f"{pool.dialect}.merge") as call:
+        cs.execute(pool.merge_sql(TABLE, TEMP_TABLE, KEY_COLUMNS, df_all.columns.tolist()))
+        call.rows = cs.rowcount
+    return cs.rowcount
+
 def orchestrate_benchmark_load(
     tickers: list[str],
     full_start_date: str,
@@ -68,22 +80,23 @@ def orchestrate_benchmark_load(
 ):
     """
     For each ticker:
-      - Determine the start date as (last_date_in_snowflake + 1) or full_start_date if no data.
+      - Determine the start date as (last_date_in_warehouse + 1) or full_start_date if no data.
       - Fetch data in-memory via get_benchmark_performance() without writing to disk.
-      - Concatenate all new rows and load them into Snowflake using a temp table + MERGE.
+      - Concatenate all new rows and load them using a temp table + MERGE.
+    The connection is borrowed from the shared warehouse pool and returned to
+    it afterwards, so later loads in the same run reuse the session.
     """
-    ctx = get_snowflake_connection()
-    cs = ctx.cursor()
-    try:
+    pool = get_warehouse()
+    with pool.cursor() as cs:
         all_dfs = []
         today = dt.datetime.strptime(end_date, "%Y-%m-%d").date()
 
         for ticker in tickers:
             code = ticker.lstrip("^")
-            last = get_last_date_for_code(cs, code)
+            last = get_last_date_for_code(cs, code, pool)
             if last:
                 start = last + dt.timedelta(days=1)
-                print(f"► {code}: last date in Snowflake = {last}, fetch start = {start}")
+                print(f"► {code}: last date in warehouse = {last}, fetch start = {start}")
             else:
                 start = dt.datetime.strptime(full_start_date, "%Y-%m-%d").date()
                 print(f"► {code}: no existing data, fetch start = {start}")
@@ -106,43 +119,8 @@ def orchestrate_benchmark_load(
             return
 
         df_all = pd.concat(all_dfs, ignore_index=True)
-
-        # Create temporary table that mirrors target schema
-        print("► Creating temporary table tmp_benchmarkperformance")
-        cs.execute("""
-            CREATE OR REPLACE TEMPORARY TABLE tmp_benchmarkperformance
-            LIKE AST_MULTIASSET_DB.DBO.BENCHMARKPERFORMANCE
-        """)
-
-        # Bulk insert into temp table
-        cols = df_all.columns.tolist()
-        placeholder = ", ".join(["%s"] * len(cols))
-        insert_sql = f"""
-            INSERT INTO tmp_benchmarkperformance ({', '.join(cols)})
-            VALUES ({placeholder})
-        """
-        data = [tuple(row) for row in df_all.itertuples(index=False, name=None)]
-        print(f"► Inserting {len(data)} rows into tmp_benchmarkperformance")
-        cs.executemany(insert_sql, data)
-        ctx.commit()
-
-        # MERGE into target to avoid duplicates defensively
-        print("► Merging into AST_MULTIASSET_DB.DBO.BENCHMARKPERFORMANCE")
-        merge_sql = f"""
-        MERGE INTO AST_MULTIASSET_DB.DBO.BENCHMARKPERFORMANCE AS tgt
-        USING tmp_benchmarkperformance AS src
-          ON tgt.BENCHMARKCODE = src.BENCHMARKCODE
-         AND tgt.HISTORYDATE1  = src.HISTORYDATE1
-        WHEN NOT MATCHED THEN
-          INSERT ({', '.join(cols)})
-          VALUES ({', '.join('src.' + c for c in cols)})
-        """
-        cs.execute(merge_sql)
-        print(f"✔ Merge inserted {cs.rowcount} new rows")
-
-    finally:
-        cs.close()
-        ctx.close()
+        merged = load_benchmark_frame(cs, df_all, pool)
+        print(f"✔ Merge inserted {merged} new rows")
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch benchmarks in-memory and load into Snowflake.")
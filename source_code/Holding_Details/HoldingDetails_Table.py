@@ -1,14 +1,11 @@
-import pandas as pd
-from io import StringIO
-import numpy as np
-from yahooquery import Ticker
-import requests
-import pandas as pd
-from tenacity import retry, stop_after_attempt, wait_exponential
 import numpy as np
 import pandas as pd
 from datetime import date
-from yahooquery import Ticker
+
+from source_code.utils.fx_rates import restate_holdings_to_base
+from source_code.utils.metadata_cache import get_quote_modules
+from source_code.utils.providers import get_provider
+from source_code.utils.schema import apply_schema
 
 # Define Fund ticker list first
 tickers_list = ['VSVNX','VLXVX','VTTSX','VFFVX','VFIFX','VTIVX','VFORX','VTTHX','VTHRX','VTTVX','VTWNX','VTINX']
@@ -16,14 +13,12 @@ tickers_list = ['VSVNX','VLXVX','VTTSX','VFFVX','VFIFX','VTIVX','VFORX','VTTHX',
 ## Using this function, we can retrieve the holdings under each fund ticker.(For example, we can see the underlying holdings within the Vanguard 2050 Retirement Fund.)
 # In this function output, fund represents Target Date Fund itself, sybol represents holdingdetails for each fund
 def fetch_holdings_ticker(tickers: list[str]) -> pd.DataFrame:
-
-    # ）Create Ticker query
-    funds = Ticker(tickers)
+    holding_info = get_provider().fund_holding_info(tickers)
     records = []
 
     for tk in tickers:
 
-        info = funds.fund_holding_info.get(tk, {})
+        info = holding_info.get(tk, {})
         holdings = info.get('holdings', [])
         for h in holdings:
             # add a column called symbol to note the source
@@ -43,7 +38,21 @@ if __name__ == "__main__":
 
 ## Import Portfolio General Information table
 from source_code.Portfolio_General_Information.PortfolioGeneralInformation_table import generate_portfolio_general
-df_general = generate_portfolio_general(10)
+
+_df_general = None
+
+def get_df_general() -> pd.DataFrame:
+    """The 10 generated portfolios the standalone scripts share, built on first use."""
+    global _df_general
+    if _df_general is None:
+        _df_general = generate_portfolio_general(10)
+    return _df_general
+
+def __getattr__(name):
+    # `from ...HoldingDetails_Table import df_general` still works, without generating at import time
+    if name == "df_general":
+        return get_df_general()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
@@ -67,10 +76,10 @@ ticker_to_product = {
 def create_holdings_dictionary(holdings_df: pd.DataFrame) -> pd.DataFrame:
     """
     Fetch data from YahooQuery and build a holdings dictionary DataFrame.
+    Module data comes from the shared metadata cache; only uncached symbols are requested.
     """
     tickers = holdings_df['symbol'].unique().tolist()
-    tk = Ticker(tickers, asynchronous=True)
-    data = tk.get_modules(['defaultKeyStatistics', 'price', 'fundProfile'])
+    data = get_quote_modules(tickers, ['defaultKeyStatistics', 'price', 'fundProfile'])
 
     records = []
     for _, row in holdings_df.iterrows():
@@ -115,38 +124,53 @@ def create_holdings_dictionary(holdings_df: pd.DataFrame) -> pd.DataFrame:
 
 
 
-def generate_holdings_details(holdings_df: pd.DataFrame, num_portfolios: int = 10, seed: int = 42) -> pd.DataFrame:
+HOLDINGDETAILS_COLUMNS = [
+    'PORTFOLIOCODE', 'TICKER', 'ISSUEDISPLAYNAME',
+    'CURRENCYCODE', 'ISSUETYPE', 'PRICE', 'ASSETCLASSNAME', 'QUANTITY',
+    'COSTBASIS', 'MARKETVALUE', 'HISTORYDATE'
+]
+
+def generate_holdings_details(
+    holdings_df: pd.DataFrame, num_portfolios: int = 10, seed: int = 42, restate_to_base: bool = False,
+    df_portfolios: pd.DataFrame = None, rng: np.random.Generator = None
+) -> pd.DataFrame:
     """
     Generate a merged holdings DataFrame with synthetic quantity, cost basis, and market value:
     1. Build holdings dictionary.
     2. Generate portfolio general info.
     3. Merge and calculate QUANTITY, COSTBASIS, MARKETVALUE.
+    4. Optionally restate PRICE, COSTBASIS, MARKETVALUE into each portfolio's BASECURRENCYCODE.
+    `df_portfolios` replaces the module's generated PORTFOLIOGENERALINFORMATION when given.
+    Draws come from `rng`, or a generator seeded with `seed`; numpy's global state is untouched.
     """
     # 1. Holdings dictionary
     holding_dict = create_holdings_dictionary(holdings_df)
 
     # 2. Generate portfolios
-    df_left = df_general[['PORTFOLIOCODE', 'PRODUCTCODE']]
+    df_portfolios = get_df_general() if df_portfolios is None else df_portfolios
+    df_left = df_portfolios[['PORTFOLIOCODE', 'PRODUCTCODE']]
     df_merged = pd.merge(df_left, holding_dict, how='left', on='PRODUCTCODE')
 
     # 3. Synthetic data generation
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed) if rng is None else rng
     unique_codes = df_merged['PORTFOLIOCODE'].unique()
-    quantity_map = {code: np.random.randint(500, 5001) for code in unique_codes}
+    quantity_map = {code: rng.integers(500, 5001) for code in unique_codes}
     df_merged['QUANTITY_PRODUCT'] = df_merged['PORTFOLIOCODE'].map(quantity_map)
     df_merged['QUANTITY'] = df_merged['QUANTITY_PRODUCT'] * df_merged['holdingPercent']
 
-    discount_rates = np.random.uniform(-0.1, 0.15, size=len(df_merged))
+    discount_rates = rng.uniform(-0.1, 0.15, size=len(df_merged))
     df_merged['COSTBASIS'] = (df_merged['QUANTITY'] * df_merged['PRICE'] * (1 - discount_rates)).round(2)
     df_merged['MARKETVALUE'] = (df_merged['QUANTITY'] * df_merged['PRICE']).round(2)
 
 
 
-    df_holdingdetails = df_merged[['PORTFOLIOCODE', 'TICKER', 'ISSUEDISPLAYNAME',
-       'CURRENCYCODE', 'ISSUETYPE', 'PRICE', 'ASSETCLASSNAME', 'QUANTITY',
-       'COSTBASIS', 'MARKETVALUE', 'HISTORYDATE']]
+    df_holdingdetails = df_merged[HOLDINGDETAILS_COLUMNS]
 
-    return pd.DataFrame(df_holdingdetails)
+    # 4. Base-currency restatement
+    if restate_to_base:
+        df_holdingdetails = restate_holdings_to_base(df_holdingdetails, df_portfolios).drop(columns='FXRATE')
+
+    return apply_schema(pd.DataFrame(df_holdingdetails), 'HOLDINGDETAILS')
 
 
 ## Package the above function into a module.
@@ -173,36 +197,41 @@ called HoldingDetails.csv, which can also found in the same folder.
 # df_holdingdetails.to_csv()
 ##########################################################
 
-def generate_merged_holdings(holdings_df: pd.DataFrame, num_portfolios: int = 10, seed: int = 42) -> pd.DataFrame:
+def generate_merged_holdings(
+    holdings_df: pd.DataFrame, num_portfolios: int = 10, seed: int = 42, df_portfolios: pd.DataFrame = None,
+    rng: np.random.Generator = None
+) -> pd.DataFrame:
     """
     Generate a merged holdings DataFrame with synthetic quantity, cost basis, and market value:
     1. Build holdings dictionary.
-    2. Generate portfolio general info.
+    2. Generate portfolio general info (or use `df_portfolios`).
     3. Merge and calculate QUANTITY, COSTBASIS, MARKETVALUE.
+    Draws come from `rng`, or a generator seeded with `seed`; numpy's global state is untouched.
     """
     # 1. Holdings dictionary
     holding_dict = create_holdings_dictionary(holdings_df)
 
     # 2. Generate portfolios
-    df_left = df_general[['PORTFOLIOCODE', 'PRODUCTCODE']]
+    df_portfolios = get_df_general() if df_portfolios is None else df_portfolios
+    df_left = df_portfolios[['PORTFOLIOCODE', 'PRODUCTCODE']]
     df_merged = pd.merge(df_left, holding_dict, how='left', on='PRODUCTCODE')
 
     # 3. Synthetic data generation
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed) if rng is None else rng
     unique_codes = df_merged['PORTFOLIOCODE'].unique()
-    quantity_map = {code: np.random.randint(500, 5001) for code in unique_codes}
+    quantity_map = {code: rng.integers(500, 5001) for code in unique_codes}
     df_merged['QUANTITY_PRODUCT'] = df_merged['PORTFOLIOCODE'].map(quantity_map)
     df_merged['QUANTITY'] = df_merged['QUANTITY_PRODUCT'] * df_merged['holdingPercent']
 
-    discount_rates = np.random.uniform(-0.1, 0.15, size=len(df_merged))
+    discount_rates = rng.uniform(-0.1, 0.15, size=len(df_merged))
     df_merged['COSTBASIS'] = (df_merged['QUANTITY'] * df_merged['PRICE'] * (1 - discount_rates)).round(2)
     df_merged['MARKETVALUE'] = (df_merged['QUANTITY'] * df_merged['PRICE']).round(2)
 
     return pd.DataFrame(df_merged)
 
 
-def get_df_merged(num_portfolios: int = 10, seed: int = 42) -> pd.DataFrame:
+def get_df_merged(num_portfolios: int = 10, seed: int = 42, df_portfolios: pd.DataFrame = None) -> pd.DataFrame:
     holdings_df = fetch_holdings_ticker(tickers_list)
     
-    return generate_merged_holdings(holdings_df, num_portfolios, seed)
+    return generate_merged_holdings(holdings_df, num_portfolios, seed, df_portfolios)
 
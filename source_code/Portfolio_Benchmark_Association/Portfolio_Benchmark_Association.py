@@ -7,82 +7,132 @@ Original file is located at
     https://colab.research.google.com/drive/1LUWAO0dJ_kf-LzB8DLZvG9fN7xN6AVEA
 """
 
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
 import pandas as pd
 import logging
 
+from source_code.utils.schema import apply_schema
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def generate_portfolio_benchmark_association():
+# Benchmark that represents each holdings asset class
+ASSET_CLASS_BENCHMARKS = {
+    'Equity':       'GSPC',
+    'Fixed Income': 'AGG',
+}
+# All TDFs hold stocks and bonds regardless of position on the glide path, so a
+# portfolio without usable holdings data still gets both, equity first
+DEFAULT_BENCHMARKS = ['GSPC', 'AGG']
+
+def generate_portfolio_benchmark_association(
+    df_general: Optional[pd.DataFrame] = None,
+    df_holdings: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
     """
-    Generate a DataFrame with portfolio-benchmark associations using the provided
-    mapping and portfolio data
+    Generate a DataFrame with portfolio-benchmark associations derived from the
+    generated portfolios and their holdings asset mix
+
+    Every asset class a portfolio holds maps to its benchmark (ASSET_CLASS_BENCHMARKS);
+    benchmarks are ranked by the portfolio's market value in that class, so a
+    bond-heavy income fund gets AGG as its primary benchmark.
+
+    Args:
+        df_general: PORTFOLIOGENERALINFORMATION rows (PORTFOLIOCODE, PRODUCTCODE);
+                    defaults to the portfolios generated for the holdings table
+        df_holdings: Holdings with PORTFOLIOCODE, ASSETCLASSNAME and MARKETVALUE;
+                     defaults to the generated holding details
 
     Returns:
         DataFrame with generated association data
     """
     logger.info("Generating portfolio-benchmark associations")
 
-    # Product code mapping
-    product_mapping = {
-        'VTHRX': 'PRD001',
-        'VTTSX': 'PRD002',
-        'VTWNX': 'PRD003',
-        'VTIVX': 'PRD004',
-        'VTTHX': 'PRD005',
-        'VLXVX': 'PRD006',
-        'VFIFX': 'PRD007',
-        'VFFVX': 'PRD008',
-        'VTINX': 'PRD009',
-        'VFORX': 'PRD010',
-        'VTTVX': 'PRD011',
-        'VSVNX': 'PRD012'
-    }
-
-    # Portfolio data from the image
-    portfolio_data = [
-        {'PORTFOLIOCODE': 'PORT001', 'PRODUCTCODE': 'PRD008'},
-        {'PORTFOLIOCODE': 'PORT002', 'PRODUCTCODE': 'PRD012'},
-        {'PORTFOLIOCODE': 'PORT003', 'PRODUCTCODE': 'PRD010'},
-        {'PORTFOLIOCODE': 'PORT004', 'PRODUCTCODE': 'PRD009'},
-        {'PORTFOLIOCODE': 'PORT005', 'PRODUCTCODE': 'PRD003'},
-        {'PORTFOLIOCODE': 'PORT006', 'PRODUCTCODE': 'PRD007'},
-        {'PORTFOLIOCODE': 'PORT007', 'PRODUCTCODE': 'PRD005'},
-        {'PORTFOLIOCODE': 'PORT008', 'PRODUCTCODE': 'PRD005'},
-        {'PORTFOLIOCODE': 'PORT009', 'PRODUCTCODE': 'PRD007'},
-        {'PORTFOLIOCODE': 'PORT010', 'PRODUCTCODE': 'PRD009'}
-    ]
-
-    # Create the portfolio benchmark associations
-    data = []
-
-    # For each portfolio, assign both primary and secondary benchmarks
-    # All TDFs (the product itself) have stocks and bonds regardless of position on glide path so should have 2 benchmarks for each
-
-    # If thought process incorrect, can just remove the secondary benchmark appended to the data below
-    for portfolio in portfolio_data:
-        # Add primary benchmark (equity - GSPC)
-        data.append({
-            "PORTFOLIOCODE": portfolio['PORTFOLIOCODE'],
-            "BENCHMARKCODE": "GSPC",
-            "RECIPIENTCODE": "NULL",
-            "RANK": 1  # Primary benchmark
-        })
-
-        # Add secondary benchmark (fixed income - AGG)
-        data.append({
-            "PORTFOLIOCODE": portfolio['PORTFOLIOCODE'],
-            "BENCHMARKCODE": "AGG",
-            "RECIPIENTCODE": "NULL",
-            "RANK": 2  # Secondary benchmark
-        })
-
-    df = pd.DataFrame(data)
-    logger.info(f"Generated {len(df)} portfolio-benchmark associations")
+    if df_general is None or df_holdings is None:
+        from source_code.Holding_Details.HoldingDetails_Table import get_df_general, get_df_merged
+        df_general = get_df_general() if df_general is None else df_general
+        df_holdings = get_df_merged() if df_holdings is None else df_holdings
+
+    portfolios = df_general['PORTFOLIOCODE'].drop_duplicates()
+
+    # Asset mix: market value per (portfolio, benchmarked asset class)
+    holdings = df_holdings[df_holdings['PORTFOLIOCODE'].isin(portfolios)]
+    mix = (
+        holdings.assign(BENCHMARKCODE=holdings['ASSETCLASSNAME'].map(ASSET_CLASS_BENCHMARKS))
+        .dropna(subset=['BENCHMARKCODE'])
+        .groupby(['PORTFOLIOCODE', 'BENCHMARKCODE'], as_index=False)['MARKETVALUE'].sum()
+    )
+    mix = mix[mix['MARKETVALUE'] > 0]
+
+    # Portfolios without classified holdings fall back to the default pair
+    missing = portfolios[~portfolios.isin(mix['PORTFOLIOCODE'])]
+    fallback = pd.DataFrame({
+        'PORTFOLIOCODE': missing.repeat(len(DEFAULT_BENCHMARKS)).to_numpy(),
+        'BENCHMARKCODE': DEFAULT_BENCHMARKS * len(missing),
+        'MARKETVALUE':   [float(len(DEFAULT_BENCHMARKS) - i) for i in range(len(DEFAULT_BENCHMARKS))] * len(missing),
+    })
+
+    df = pd.concat([mix, fallback], ignore_index=True).sort_values(
+        ['PORTFOLIOCODE', 'MARKETVALUE', 'BENCHMARKCODE'], ascending=[True, False, True], kind='stable'
+    )
+    df['RANK'] = df.groupby('PORTFOLIOCODE').cumcount() + 1
+    df['RECIPIENTCODE'] = 'NULL'
+    df = apply_schema(
+        df[['PORTFOLIOCODE', 'BENCHMARKCODE', 'RECIPIENTCODE', 'RANK']].reset_index(drop=True),
+        'PORTFOLIOBENCHMARKASSOCIATION',
+    )
+
+    logger.info(f"Generated {len(df)} portfolio-benchmark associations "
+                f"({len(missing)} portfolios on default benchmarks)")
 
     return df
 
+class RelationshipIndex:
+    """
+    In-memory index over portfolio / product / benchmark relationships.
+
+    Built once from the association table (and optionally the portfolio general
+    information for products); every lookup afterwards is a dict access.
+    """
+
+    def __init__(self, df_association: pd.DataFrame, df_general: Optional[pd.DataFrame] = None):
+        ranked = df_association.sort_values(['PORTFOLIOCODE', 'RANK'], kind='stable')
+        by_portfolio: Dict[str, List[str]] = defaultdict(list)
+        by_benchmark: Dict[str, List[str]] = defaultdict(list)
+        for portfolio, benchmark in zip(ranked['PORTFOLIOCODE'], ranked['BENCHMARKCODE']):
+            by_portfolio[portfolio].append(benchmark)
+            by_benchmark[benchmark].append(portfolio)
+
+        by_product: Dict[str, List[str]] = defaultdict(list)
+        if df_general is not None:
+            for portfolio, product in zip(df_general['PORTFOLIOCODE'], df_general['PRODUCTCODE']):
+                by_product[product].append(portfolio)
+
+        self.benchmarks_by_portfolio: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in by_portfolio.items()}
+        self.portfolios_by_benchmark: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in by_benchmark.items()}
+        self.portfolios_by_product: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in by_product.items()}
+
+    def benchmarks_for(self, portfolio_code: str) -> Tuple[str, ...]:
+        """Benchmarks of a portfolio in rank order (primary first)."""
+        return self.benchmarks_by_portfolio.get(portfolio_code, ())
+
+    def primary_benchmark(self, portfolio_code: str) -> Optional[str]:
+        ranked = self.benchmarks_by_portfolio.get(portfolio_code)
+        return ranked[0] if ranked else None
+
+    def portfolios_for_benchmark(self, benchmark_code: str) -> Tuple[str, ...]:
+        return self.portfolios_by_benchmark.get(benchmark_code, ())
+
+    def portfolios_for_product(self, product_code: str) -> Tuple[str, ...]:
+        return self.portfolios_by_product.get(product_code, ())
+
+    def primary_benchmarks(self, portfolio_codes: Iterable[str]) -> List[Optional[str]]:
+        """Primary benchmark for each portfolio in `portfolio_codes`, in order."""
+        return [self.primary_benchmark(code) for code in portfolio_codes]
+
 # Main function for executing
 def main():
     # Generate portfolio-benchmark association data
@@ -4,13 +4,7 @@
 import pandas as pd
 import random
 random.seed(42) 
-import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
-from io import StringIO
 from datetime import date
-from IPython.display import display, Markdown
-import yfinance as yf
-from babel.numbers import get_currency_name
 
 
 target_date_funds = ['VSVNX','VLXVX','VTTSX','VFFVX','VFIFX', 'VTIVX','VFORX','VTTHX','VTHRX','VTTVX','VTWNX','VTINX']
@@ -23,39 +17,43 @@ product_codes = [f"PRD{i:03d}" for i in range(1, 13)]  # 1 to 12
 import random
 import pandas as pd
 from datetime import date
-import yfinance as yf
-from babel.numbers import get_currency_name
+
+from source_code.utils.Currency_table import get_currency_reference
+from source_code.utils.metadata_cache import get_ticker_info, get_ticker_infos
+from source_code.utils.schema import apply_schema
 
 # Make sure these two are defined somewhere in your module or passed in:
 # product_codes = [...]
 # target_date_funds = [{"TICKER": "VBTIX"}, {"TICKER": "VTINX"}, …]
 
-def generate_portfolio_general(num_portfolios: int) -> pd.DataFrame:
+def generate_portfolio_general(num_portfolios: int, rng: random.Random = None) -> pd.DataFrame:
+    # rng: own generator for reproducible draws (e.g. random.Random(42)); defaults to the module-seeded one
+    rng = rng or random
     df_general_all = []
+    currencies = get_currency_reference()
+    # warm the cache for every fund in one concurrent fetch instead of one call per draw
+    get_ticker_infos(target_date_funds, fields=["currency", "fundInceptionDate"])
 
     for idx in range(num_portfolios):
         portfolio_code = f"PORT{idx+1:03d}"
-        product_code   = random.choice(product_codes)
+        product_code   = rng.choice(product_codes)
 
         name     = f"Retirement Portfolio {idx+1}"
         style    = "Growth"
         category = "Individual Account"
 
         # pick 4 random funds
-        selected = random.sample(target_date_funds, k=4)
+        selected = rng.sample(target_date_funds, k=4)
 
         # derive currency code from first fund
-        info = yf.Ticker(selected[0]).info
+        info = get_ticker_info(selected[0], fields=["currency"])
         currency_code = info.get("currency", "USD")
-        try:
-            currency_name = get_currency_name(currency_code, locale="en")
-        except:
-            currency_name = currency_code
+        currency_name = currencies.currency_name(currency_code)
 
         # fetch each fund's inception date and pick the earliest
         inception_dates = []
         for fund in selected:
-            raw = yf.Ticker(fund).info.get("fundInceptionDate")
+            raw = get_ticker_info(fund, fields=["fundInceptionDate"]).get("fundInceptionDate")
             if isinstance(raw, (int, float)):
                 inception_dates.append(pd.to_datetime(raw, unit="s").date())
         open_date = min(inception_dates) if inception_dates else date.today()
@@ -74,7 +72,7 @@ def generate_portfolio_general(num_portfolios: int) -> pd.DataFrame:
             "TERMINATIONDATE":          None
         })
 
-    return pd.DataFrame(df_general_all)
+    return apply_schema(pd.DataFrame(df_general_all), "PORTFOLIOGENERALINFORMATION")
 
 
 if __name__ == "__main__":
@@ -1,19 +1,14 @@
-from datetime import date
 import numpy as np
 import pandas as pd
-import yfinance as yf
-from yahooquery import Ticker
 import random
 from datetime import date, datetime, timedelta
 
+from source_code.utils.providers import get_provider
+from source_code.utils.schema import apply_schema, concat_tables
 
 
 ########################################################
 ########################################################
-import pandas as pd
-from datetime import date, datetime, timedelta
-from yahooquery import Ticker
-import yfinance as yf
 
 # 常setup the variables first
 _TICKERS = [
@@ -30,10 +25,10 @@ def generate_performance_factors() -> pd.DataFrame:
     """
     # Fetch the data to today
     today = date.today()
+    provider = get_provider()
 
     # Get expenseRatio to calculate Net Return later
-    tk = Ticker(_TICKERS)
-    profiles = tk.get_modules('fundProfile')
+    profiles = provider.quote_modules(_TICKERS, 'fundProfile')
     expense_ratio = {
         t: profiles.get(t, {}) \
                     .get('fundProfile', {}) \
@@ -42,7 +37,7 @@ def generate_performance_factors() -> pd.DataFrame:
     }
 
     # Download history Price based on the duration we set above
-    raw = yf.download(
+    raw = provider.download(
         _TICKERS,
         start=_PERF_INCEP,
         end=today + timedelta(days=1),
@@ -52,10 +47,17 @@ def generate_performance_factors() -> pd.DataFrame:
         actions=True,
         progress=False
     )
+    return compute_performance_factors(raw, expense_ratio)
+
 
+def compute_performance_factors(raw: pd.DataFrame, expense_ratio: dict, tickers: list = _TICKERS) -> pd.DataFrame:
+    """
+    Daily gross / net return rows from a ticker-grouped yfinance download
+    (columns `(ticker, field)`); net deducts each fund's expense ratio pro rata.
+    """
     # calculate sliding window price
     records = []
-    for t in _TICKERS:
+    for t in tickers:
         if t not in raw.columns.get_level_values(0):
             continue
         df_t = raw[t].copy().sort_index()
@@ -88,7 +90,7 @@ def generate_performance_factors() -> pd.DataFrame:
             })
 
     df_performance_dict = pd.DataFrame.from_records(records)
-    return df_performance_dict
+    return apply_schema(df_performance_dict, 'performance_factors')
 
 
 
@@ -100,79 +102,212 @@ def generate_performance_factors() -> pd.DataFrame:
 import pandas as pd
 import random
 from datetime import date, timedelta
-from yahooquery import Ticker
+from typing import Iterator, Optional
 
-from source_code.Holding_Details.HoldingDetails_Table import get_df_merged
+from source_code.Holding_Details.HoldingDetails_Table import get_df_general, get_df_merged
+from source_code.utils.Currency_table import get_currency_reference
+from source_code.utils.fx_rates import FxRateStore, load_fx_store, restate_performance_to_base
+from source_code.utils.shared_frame import attach_frame, share_frame
 
 ## This function is to generate a random inception date for each account
-def random_date(start: date, end: date) -> date:
+def random_date(start: date, end: date, rng: random.Random = None) -> date:
     """Choose a random day from start to end date"""
     delta = end - start
-    return start + timedelta(days=random.randint(0, delta.days))
+    return start + timedelta(days=(rng or random).randint(0, delta.days))
+
+PORTFOLIOPERFORMANCE_COLUMNS = [
+    'PORTFOLIOCODE','HISTORYDATE','CURRENCYCODE','CURRENCY',
+    'PERFORMANCECATEGORY','PERFORMANCECATEGORYNAME','PERFORMANCETYPE',
+    'PERFORMANCEINCEPTIONDATE','PORTFOLIOINCEPTIONDATE',
+    'PERFORMANCEFREQUENCY','PERFORMANCEFACTOR'
+]
+PORTFOLIOS_PER_CHUNK = 500  # per streamed block: about 500 * 4 funds * 2 types rows per history day
+SHARDS_PER_WORKER = 4  # process mode: a few shards each, so one slow shard doesn't leave workers idle
+# spawn, not fork: the pipeline calls this from a thread pool, and forking a threaded process can deadlock
+PROCESS_START_METHOD = 'spawn'
 
 def generate_portfolio_performance(
     start_date: date = date(2024, 12, 1),
     end_date:   date = date(2025, 1, 31),
-    seed:       int  = 42
+    seed:       int  = 42,
+    restate_to_base: bool = False,
+    df_merged:  pd.DataFrame = None,
+    df_performance_dict: pd.DataFrame = None,
+    df_portfolios: pd.DataFrame = None,
+    workers:    int  = 1
 ) -> pd.DataFrame:
     """
     This function ain to merging portfolio and product performance.
     I randomly generate inceptiondate for each account and filter 
     the record that performance inception date prior to portfolio inception
     and return final df_portfolio_performance
+
+    Upstream frames (merged holdings, performance factors, portfolio general
+    information) are built here unless passed in, e.g. by the pipeline.
+    With `workers` > 1 the PORTFOLIOCODEs are sharded across that many
+    processes (see iter_portfolio_performance); the result is the same.
     """
-    # set a fixed random seed
-    random.seed(seed)
+    if df_merged is None:
+        df_merged = get_df_merged()
+    per_shard = None
+    if workers > 1:
+        portfolios = df_merged['PORTFOLIOCODE'].nunique()
+        per_shard = max(1, -(-portfolios // (workers * SHARDS_PER_WORKER)))
+    chunks = list(iter_portfolio_performance(
+        start_date, end_date, seed, restate_to_base, df_merged, df_performance_dict, df_portfolios,
+        portfolios_per_chunk=per_shard, workers=workers
+    ))
+    if not chunks:
+        return apply_schema(pd.DataFrame(columns=PORTFOLIOPERFORMANCE_COLUMNS), 'PORTFOLIOPERFORMANCE')
+    return chunks[0] if len(chunks) == 1 else concat_tables(chunks)
+
+
+def iter_portfolio_performance(
+    start_date: date = date(2024, 12, 1),
+    end_date:   date = date(2025, 1, 31),
+    seed:       int  = 42,
+    restate_to_base: bool = False,
+    df_merged:  pd.DataFrame = None,
+    df_performance_dict: pd.DataFrame = None,
+    df_portfolios: pd.DataFrame = None,
+    portfolios_per_chunk: Optional[int] = PORTFOLIOS_PER_CHUNK,
+    workers:    int  = 1
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield PORTFOLIOPERFORMANCE in blocks of `portfolios_per_chunk` portfolios
+    (one block if None), in PORTFOLIOCODE order. Only the current block is
+    joined against the factors, so a writer or loader consuming the blocks
+    holds one block at a time however many portfolios there are. The blocks
+    concatenate to generate_portfolio_performance() for the same arguments.
+
+    With `workers` > 1 blocks are joined on a process pool: the factor frame
+    is placed in shared memory once and every worker maps it, so tasks only
+    carry their block's (portfolio, fund) rows. Blocks are still yielded in
+    order, with at most two per worker in flight.
+    """
+    # set a fixed random seed (own generator, so concurrent work can't shift the draws)
+    rng = random.Random(seed)
 
     # Load holding data 
-    df_merged = get_df_merged()
-    df_hold = df_merged[[
-        'PORTFOLIOCODE', 'TICKER', 'ISSUEDISPLAYNAME',
-        'CURRENCYCODE', 'ISSUETYPE', 'PRICE', 'ASSETCLASSNAME',
-        'QUANTITY_PRODUCT', 'HISTORYDATE', 'FUND TICKER', 'PRODUCTCODE'
-    ]].copy()
+    if df_merged is None:
+        df_merged = get_df_merged()
+    df_hold = df_merged[['PORTFOLIOCODE', 'FUND TICKER', 'CURRENCYCODE']]
 
     # Get performance factors
-    df_performance_dict = generate_performance_factors()
-
-    # create left table to merge later
-    records = []
-    for (pf, ft), g in df_hold.groupby(['PORTFOLIOCODE','FUND TICKER']):
-        records.append({
-            'PORTFOLIOCODE':           pf,
-            'FUND TICKER':             ft,
-            'CURRENCYCODE':            g['CURRENCYCODE'].iloc[0],
-            'CURRENCY':                'US Dollar',
-            'PERFORMANCECATEGORY':     'Asset Class',
-            'PERFORMANCECATEGORYNAME': 'Total Portfolio',
-            'PORTFOLIOINCEPTIONDATE':  random_date(start_date, end_date),
-            'PERFORMANCEFREQUENCY':    'D',
-        })
-    df_left = pd.DataFrame(records)
-
-    # Merge performance factors
+    if df_performance_dict is None:
+        df_performance_dict = generate_performance_factors()
+    df_factors = apply_schema(df_performance_dict, 'performance_factors')
+
+    # FX rates for every block are loaded once, up front
+    store = None
+    if restate_to_base:
+        df_portfolios = get_df_general() if df_portfolios is None else df_portfolios
+        store = load_fx_store(
+            pd.concat([df_hold['CURRENCYCODE'], df_portfolios['BASECURRENCYCODE']]).dropna().astype(str).unique(),
+            df_factors['PERFORMANCEINCEPTIONDATE'].min(), df_factors['HISTORYDATE'].max()
+        )
+
+    blocks = _left_blocks(df_hold, start_date, end_date, rng, portfolios_per_chunk)
+    if workers <= 1:
+        for df_left in blocks:
+            yield _join_performance(df_left, df_factors, store, df_portfolios)
+    else:
+        yield from _join_in_processes(blocks, df_factors, store, df_portfolios if store else None, workers)
+
+
+def _left_blocks(
+    df_hold: pd.DataFrame, start_date: date, end_date: date, rng: random.Random, portfolios_per_chunk: Optional[int]
+) -> Iterator[pd.DataFrame]:
+    """
+    One row per (portfolio, fund) with its random inception date, in key
+    order, split into blocks of `portfolios_per_chunk` portfolios.
+    """
+    # first holding of each (portfolio, fund) in key order, as groupby would visit them
+    df_left = (
+        df_hold.dropna(subset=['PORTFOLIOCODE', 'FUND TICKER'])
+        .drop_duplicates(['PORTFOLIOCODE', 'FUND TICKER'])
+        .sort_values(['PORTFOLIOCODE', 'FUND TICKER'], kind='stable')
+        .reset_index(drop=True)
+    )
+    currencies = get_currency_reference()
+    df_left = df_left.assign(
+        CURRENCY=[currencies.currency_name(c) for c in df_left['CURRENCYCODE']],
+        PERFORMANCECATEGORY='Asset Class',
+        PERFORMANCECATEGORYNAME='Total Portfolio',
+        # datetime64 like the factors' dates, so the inception filter compares vectorised
+        PORTFOLIOINCEPTIONDATE=pd.to_datetime([random_date(start_date, end_date, rng) for _ in range(len(df_left))]),
+        PERFORMANCEFREQUENCY='D',
+    )
+    if not len(df_left):
+        return
+    if not portfolios_per_chunk:
+        yield df_left
+        return
+    block_ids = pd.factorize(df_left['PORTFOLIOCODE'])[0] // portfolios_per_chunk
+    for _, df_block in df_left.groupby(block_ids, sort=True):
+        yield df_block.reset_index(drop=True)
+
+
+def _join_performance(
+    df_left: pd.DataFrame, df_factors: pd.DataFrame, store: Optional[FxRateStore], df_portfolios: pd.DataFrame
+) -> pd.DataFrame:
+    """One block of PORTFOLIOPERFORMANCE from its (portfolio, fund) rows."""
+    # Merge performance factors, in the table's column sequence
     df_join = df_left.merge(
-        df_performance_dict,
+        df_factors,
         on='FUND TICKER',
         how='left'
-    )
+    )[PORTFOLIOPERFORMANCE_COLUMNS]
 
-    # set the column sequence
-    cols = [
-        'PORTFOLIOCODE','HISTORYDATE','CURRENCYCODE','CURRENCY',
-        'PERFORMANCECATEGORY','PERFORMANCECATEGORYNAME','PERFORMANCETYPE',
-        'PERFORMANCEINCEPTIONDATE','PORTFOLIOINCEPTIONDATE',
-        'PERFORMANCEFREQUENCY','PERFORMANCEFACTOR'
-    ]
-    df_join = df_join[cols]
-
-    # 6. only keep the column that performance inception >= portfolio inception 
+    # only keep the column that performance inception >= portfolio inception 
     df_portfolio_performance = (
         df_join[df_join['PERFORMANCEINCEPTIONDATE'] >= df_join['PORTFOLIOINCEPTIONDATE']]
         .reset_index(drop=True)
     )
 
-    return df_portfolio_performance
+    # optionally restate factors into each portfolio's base currency
+    if store is not None:
+        df_portfolio_performance = restate_performance_to_base(df_portfolio_performance, df_portfolios, store=store)
+
+    return apply_schema(df_portfolio_performance, 'PORTFOLIOPERFORMANCE')
+
+
+# ---- process mode: worker state is set once per process by _init_worker ----
+
+_worker_state: dict = {}
+
+
+def _init_worker(spec, store: Optional[FxRateStore], df_portfolios: Optional[pd.DataFrame]) -> None:
+    df_factors, handles = attach_frame(spec)
+    _worker_state.update(factors=df_factors, handles=handles, store=store, portfolios=df_portfolios)
+
+
+def _join_shard(df_left: pd.DataFrame) -> pd.DataFrame:
+    state = _worker_state
+    return _join_performance(df_left, state['factors'], state['store'], state['portfolios'])
+
+
+def _join_in_processes(
+    blocks: Iterator[pd.DataFrame], df_factors: pd.DataFrame, store: Optional[FxRateStore],
+    df_portfolios: Optional[pd.DataFrame], workers: int
+) -> Iterator[pd.DataFrame]:
+    import multiprocessing
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with share_frame(df_factors) as spec, ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+        initializer=_init_worker,
+        initargs=(spec, store, df_portfolios),
+    ) as pool:
+        pending = deque()
+        for df_left in blocks:
+            pending.append(pool.submit(_join_shard, df_left))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 # Running this script directly will print out df_portfolio_performance
 if __name__ == '__main__':
@@ -0,0 +1,145 @@
+# Change-data-capture load for the PRODUCTMASTER dimension
+# Instead of rewriting the whole table every run, each product's business columns are
+# hashed and compared with the stored current version; only new and changed products
+# are emitted, as slowly-changing-dimension type-2 (SCD2) records.
+
+import argparse
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from source_code.Product_Master import Product_Master_table
+from source_code.utils.row_hash import ROW_HASH_COLUMN, compute_row_hash
+
+logger = logging.getLogger('tdf_generator')
+
+KEY_COLUMNS = ["PRODUCTCODE"]
+BUSINESS_COLUMNS = [
+    "PRODUCTNAME", "STRATEGY", "VEHICLECATEGORY", "VEHICLETYPE", "ASSETCLASS",
+    "SHARECLASS", "PERFORMANCEACCOUNT", "REPRESENTATIVEACCOUNT", "ISMARKETED",
+    "PARENTPRODUCTCODE",
+]
+SCD2_COLUMNS = [ROW_HASH_COLUMN, "EFFECTIVEFROM", "EFFECTIVETO", "ISCURRENT", "CHANGETYPE"]
+
+# Local stand-in for the stored dimension, next to the table's CSV output
+SCD2_STORE = Path(__file__).with_name("Product_Master_SCD2.csv")
+
+
+def load_product_master_history(path: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Load the stored SCD2 dimension (all versions); empty if nothing was loaded yet.
+    """
+    path = Path(path) if path is not None else SCD2_STORE
+    if not path.exists():
+        return pd.DataFrame(columns=KEY_COLUMNS + BUSINESS_COLUMNS + SCD2_COLUMNS)
+    df = pd.read_csv(path, dtype={c: "string" for c in KEY_COLUMNS})
+    df["EFFECTIVEFROM"] = pd.to_datetime(df["EFFECTIVEFROM"])
+    df["EFFECTIVETO"] = pd.to_datetime(df["EFFECTIVETO"])
+    df["ISCURRENT"] = df["ISCURRENT"].astype(bool)
+    return df
+
+
+def detect_product_changes(
+    df_products: pd.DataFrame,
+    df_history: pd.DataFrame,
+    as_of: Optional[date] = None,
+    close_missing: bool = False,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Diff a freshly generated product master against the stored current versions.
+
+    Returns
+    -------
+    (new_versions, expired)
+        new_versions: SCD2 rows to insert (CHANGETYPE 'INSERT' or 'UPDATE'),
+                      open-ended from `as_of`.
+        expired:      keys of current versions to close with EFFECTIVETO = `as_of`
+                      (changed products, plus vanished ones when `close_missing`).
+    """
+    as_of = as_of or date.today()
+    incoming = df_products.assign(**{ROW_HASH_COLUMN: compute_row_hash(df_products, BUSINESS_COLUMNS)})
+
+    current = df_history.loc[df_history["ISCURRENT"].astype(bool), KEY_COLUMNS + [ROW_HASH_COLUMN]]
+    diff = incoming.merge(
+        current.rename(columns={ROW_HASH_COLUMN: "STORED_HASH"}),
+        on=KEY_COLUMNS, how="left", indicator=True,
+    )
+    is_insert = (diff["_merge"] == "left_only").to_numpy()
+    is_update = (~is_insert) & (diff[ROW_HASH_COLUMN] != diff["STORED_HASH"]).to_numpy()
+
+    new_versions = diff.loc[is_insert | is_update, KEY_COLUMNS + BUSINESS_COLUMNS + [ROW_HASH_COLUMN]].copy()
+    new_versions["EFFECTIVEFROM"] = pd.Timestamp(as_of)
+    new_versions["EFFECTIVETO"] = pd.NaT
+    new_versions["ISCURRENT"] = True
+    new_versions["CHANGETYPE"] = pd.Series(is_insert, index=diff.index)[is_insert | is_update].map(
+        {True: "INSERT", False: "UPDATE"}
+    )
+
+    expired = diff.loc[is_update, KEY_COLUMNS]
+    if close_missing:
+        vanished = current.loc[~current["PRODUCTCODE"].isin(incoming["PRODUCTCODE"]), KEY_COLUMNS]
+        expired = pd.concat([expired, vanished], ignore_index=True)
+
+    logger.info(
+        f"Product master CDC: {int(is_insert.sum())} inserts, {int(is_update.sum())} updates, "
+        f"{int(len(diff) - is_insert.sum() - is_update.sum())} unchanged, {len(expired)} versions closed"
+    )
+    return new_versions.reset_index(drop=True), expired.reset_index(drop=True)
+
+
+def apply_scd2(
+    df_history: pd.DataFrame,
+    new_versions: pd.DataFrame,
+    expired: pd.DataFrame,
+    as_of: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Close `expired` current versions and append `new_versions` to the dimension.
+    """
+    as_of = as_of or date.today()
+    history = df_history.copy()
+    closing = history["ISCURRENT"].astype(bool) & history["PRODUCTCODE"].isin(expired["PRODUCTCODE"])
+    history.loc[closing, "EFFECTIVETO"] = pd.Timestamp(as_of)
+    history.loc[closing, "ISCURRENT"] = False
+    if history.empty:
+        return new_versions.copy()
+    return pd.concat([history, new_versions], ignore_index=True)
+
+
+def run_product_master_cdc(
+    df_products: pd.DataFrame,
+    path: Optional[Path] = None,
+    as_of: Optional[date] = None,
+    close_missing: bool = False,
+) -> pd.DataFrame:
+    """
+    Detect changes against the stored dimension, persist the new SCD2 state and
+    return only the rows a downstream load has to touch.
+    """
+    as_of = as_of or date.today()
+    history = load_product_master_history(path)
+    new_versions, expired = detect_product_changes(df_products, history, as_of, close_missing)
+    if new_versions.empty and expired.empty:
+        return new_versions
+    updated = apply_scd2(history, new_versions, expired, as_of)
+    updated.to_csv(Path(path) if path is not None else SCD2_STORE, index=False)
+    return new_versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental (SCD2) product master load.")
+    parser.add_argument("--store", default=str(SCD2_STORE), help="Stored SCD2 dimension CSV")
+    parser.add_argument("--close-missing", action="store_true", help="Expire products no longer generated")
+    args = parser.parse_args()
+
+    df_products = Product_Master_table.main()
+    df_changes = run_product_master_cdc(df_products, Path(args.store), close_missing=args.close_missing)
+    logger.info(f"Rows to load: {len(df_changes)}")
+    print(df_changes)
+
+
+if __name__ == "__main__":
+    main()
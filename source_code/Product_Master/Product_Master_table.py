@@ -14,11 +14,12 @@ import pandas as pd
 import numpy as np
 import re
 import logging
-import requests
-import yfinance as yf
 import random
 from typing import List, Dict, Any, Optional
 
+from source_code.utils.metadata_cache import get_quote_modules
+from source_code.utils.schema import apply_schema
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,6 +44,21 @@ def get_tdf_tickers() -> list[str]:
 
 # STEP 2: Plug Tickers into Yahoo Finance to Get Fund Information
 
+# quoteSummary modules that together carry the Ticker.info fields used below
+FUND_INFO_MODULES = ['price', 'quoteType', 'summaryProfile', 'fundProfile']
+
+def merge_quote_modules(modules: Dict[str, Dict]) -> Dict[str, Any]:
+    """
+    Flatten {module: fields} into one info-style dict; the first module
+    providing a non-empty value for a field wins.
+    """
+    info = {}
+    for module in FUND_INFO_MODULES:
+        for key, value in (modules.get(module) or {}).items():
+            if value not in (None, '') and key not in info:
+                info[key] = value
+    return info
+
 def get_fund_info_from_yahoo(tickers: List[str]) -> Dict[str, Dict]:
     """
     Get fund information from Yahoo Finance for the given tickers
@@ -56,24 +72,36 @@ def get_fund_info_from_yahoo(tickers: List[str]) -> Dict[str, Dict]:
     fund_info = {}
 
     logger.info(f"Fetching fund information from Yahoo Finance for {len(tickers)} tickers...")
+    # One batched multi-symbol request for every ticker not already in the
+    # shared metadata cache; symbols missing from the response are retried alone
+    all_modules = get_quote_modules(tickers, FUND_INFO_MODULES)
     for ticker in tickers:
-        try:
-            # Get fund information from yfinance
-            fund = yf.Ticker(ticker)
-            info = fund.info
-
-            if info and 'shortName' in info:
-                fund_info[ticker] = info
-                logger.info(f"Found info for {ticker}: {info['shortName']}")
-            else:
-                logger.info(f"No information found for {ticker}")
-
-        except Exception as e:
-            logger.error(f"Error getting info for {ticker} from Yahoo Finance: {e}")
+        info = merge_quote_modules(all_modules.get(ticker) or {})
+        if info and 'shortName' in info:
+            fund_info[ticker] = info
+            logger.info(f"Found info for {ticker}: {info['shortName']}")
+        else:
+            logger.info(f"No information found for {ticker}")
 
     logger.info(f"Successfully retrieved information for {len(fund_info)} tickers")
     return fund_info
 
+# Name-inference patterns, compiled once and shared by the per-ticker and batch paths
+DESCRIPTION_FIELDS = ['description', 'longBusinessSummary', 'summary']
+NAME_FIELDS = ['longName', 'shortName', 'name']
+PROVIDER_KEYWORDS = {
+    'vanguard': 'Vanguard',
+    'fidelity': 'Fidelity',
+    't. rowe price': 'T. Rowe Price',
+    't.rowe': 'T. Rowe Price',
+    'blackrock': 'BlackRock'
+}
+PROVIDER_TICKER_PREFIXES = {'VT': 'Vanguard', 'FF': 'Fidelity', 'FI': 'Fidelity', 'TR': 'T. Rowe Price'}
+INCOME_RE = re.compile(r'retirement income|income fund')
+TARGET_RE = re.compile(r'(?s)target date|target.*retirement|retirement.*target')  # inline flag: also used as a pyarrow pattern
+YEAR_RE = re.compile(r'20[2-7][05]')
+PREFIX_RE = re.compile('^(' + '|'.join(PROVIDER_TICKER_PREFIXES) + ')')
+
 def infer_fund_name_from_ticker(ticker: str, info: Dict) -> str:
     """
     Infer fund name from ticker and available information
@@ -86,45 +114,33 @@ def infer_fund_name_from_ticker(ticker: str, info: Dict) -> str:
     target_year = None
 
     # Look for keywords in any description fields
-    description_fields = ['description', 'longBusinessSummary', 'summary']
-    for field in description_fields:
+    for field in DESCRIPTION_FIELDS:
         if field in info and info[field]:
             description = info[field].lower()
 
             # Check for retirement income fund (no target year)
-            if 'retirement income' in description or 'income fund' in description:
+            if INCOME_RE.search(description):
                 is_income_fund = True
                 fund_type = "Target Retirement Income Fund"
             # Look for target retirement fund with year
             elif ('target' in description and 'retirement' in description) or 'target date' in description:
                 # Look for a year in the description (2020-2075)
-                year_match = re.search(r'20([2-7][05])', description)
+                year_match = YEAR_RE.search(description)
                 if year_match:
                     target_year = year_match.group(0)
                     fund_type = f"Target Retirement {target_year} Fund"
 
             # Check for provider names
-            providers = {
-                'vanguard': 'Vanguard',
-                'fidelity': 'Fidelity',
-                't. rowe price': 'T. Rowe Price',
-                't.rowe': 'T. Rowe Price',
-                'blackrock': 'BlackRock'
-            }
-
-            for keyword, name in providers.items():
-                if keyword in description.lower():
+            for keyword, name in PROVIDER_KEYWORDS.items():
+                if keyword in description:
                     provider = name
                     break
 
     # If no provider found, try to infer from ticker
     if not provider:
-        if ticker.startswith('VT'):
-            provider = 'Vanguard'
-        elif ticker.startswith('FF') or ticker.startswith('FI'):
-            provider = 'Fidelity'
-        elif ticker.startswith('TR'):
-            provider = 'T. Rowe Price'
+        prefix_match = PREFIX_RE.match(ticker)
+        if prefix_match:
+            provider = PROVIDER_TICKER_PREFIXES[prefix_match.group(1)]
 
     # Special case for income funds based on ticker, understand that we don't want to hard code but will do it for now (doesn't impact rest of code)
     if ticker == "VTINX":
@@ -156,7 +172,7 @@ def create_ticker_to_name_mapping(tickers: List[str], fund_info: Dict[str, Dict]
         # First try to get the name from Yahoo Finance
         if ticker in fund_info:
             # Try different name fields in order of preference
-            for name_field in ['longName', 'shortName', 'name']:
+            for name_field in NAME_FIELDS:
                 if name_field in fund_info[ticker] and fund_info[ticker][name_field]:
                     name = fund_info[ticker][name_field]
                     # Check if the name is reasonable (not too short)
@@ -172,6 +188,120 @@ def create_ticker_to_name_mapping(tickers: List[str], fund_info: Dict[str, Dict]
 
     return ticker_to_name
 
+def _fund_info_columns(tickers: List[str], fund_info) -> Dict[str, tuple]:
+    """
+    Name and description fields aligned to `tickers`, as (codes, distinct
+    values) per field: share classes of one fund repeat the same text, so the
+    string methods below run over each field's distinct values once.
+    """
+    fields = NAME_FIELDS + DESCRIPTION_FIELDS
+    if isinstance(fund_info, pd.DataFrame):
+        frame = fund_info.reindex(index=tickers, columns=fields)
+        values = {f: frame[f] for f in fields}
+    else:
+        infos = [fund_info.get(t) or {} for t in tickers]
+        values = {f: np.array([info.get(f) for info in infos], dtype=object) for f in fields}
+    columns = {}
+    for field in fields:
+        codes, uniques = pd.factorize(values[field])
+        # Arrow-backed strings run the str.* regex methods natively, not per value in Python
+        columns[field] = codes, pd.Series(uniques, dtype="string[pyarrow]")
+    return columns
+
+def _broadcast(values: pd.Series, codes: np.ndarray) -> np.ndarray:
+    """
+    Per-distinct-value strings back onto the tickers; code -1 (no value) gives None.
+    """
+    return np.append(values.to_numpy(dtype=object, na_value=None), None)[codes]
+
+def infer_fund_names_batch(tickers: List[str], fund_info) -> pd.DataFrame:
+    """
+    Batch version of create_ticker_to_name_mapping for a whole fund universe.
+
+    The same rules as infer_fund_name_from_ticker are applied column-wise:
+    the precompiled patterns run through Series.str.contains/extract over
+    each field's distinct values, the results are broadcast back by code and
+    names are composed by array concatenation; no pattern runs in a Python loop.
+
+    Args:
+        tickers: List of ticker symbols
+        fund_info: Dictionary mapping tickers to their fund information, or a
+                   DataFrame indexed by ticker with the same fields as columns
+
+    Returns:
+        DataFrame with TICKER, PRODUCTNAME, PROVIDER, TARGETYEAR, ISINCOMEFUND
+    """
+    n = len(tickers)
+    columns = _fund_info_columns(tickers, fund_info)
+
+    # Reported names: first field in order of preference that is longer than 5 chars
+    reported = np.full(n, None, dtype=object)
+    for field in reversed(NAME_FIELDS):
+        codes, names = columns[field]
+        usable = np.append((names.str.len() > 5).to_numpy(dtype=bool, na_value=False), False)[codes]
+        reported = np.where(usable, _broadcast(names, codes), reported)
+
+    # Description fields in order, later fields overriding earlier ones as in the per-ticker rules
+    is_income = np.zeros(n, dtype=bool)
+    target_year = np.full(n, None, dtype=object)
+    provider = np.full(n, None, dtype=object)
+    for field in DESCRIPTION_FIELDS:
+        codes, descriptions = columns[field]
+        descriptions = descriptions.str.lower()
+        income = descriptions.str.contains(INCOME_RE.pattern).to_numpy(dtype=bool, na_value=False)
+        target = ~income & descriptions.str.contains(TARGET_RE.pattern).to_numpy(dtype=bool, na_value=False)
+        year = descriptions.str.extract(f"({YEAR_RE.pattern})", expand=False).where(target)
+        # keywords are tried in PROVIDER_KEYWORDS order, so the first listed keyword wins
+        found = np.select(
+            [descriptions.str.contains(keyword, regex=False).to_numpy(dtype=bool, na_value=False)
+             for keyword in PROVIDER_KEYWORDS],
+            list(PROVIDER_KEYWORDS.values()), default=None,
+        ).astype(object)
+
+        is_income |= np.append(income, False)[codes]
+        year, found = _broadcast(year, codes), np.append(found, None)[codes]
+        target_year = np.where(year != None, year, target_year)  # noqa: E711
+        provider = np.where(found != None, found, provider)  # noqa: E711
+
+    # If no provider found, try to infer from ticker prefix
+    ticker = np.asarray(tickers, dtype=object)
+    prefixes = ticker.astype(str).astype("U2")
+    prefix_provider = np.select(
+        [prefixes == prefix for prefix in PROVIDER_TICKER_PREFIXES],
+        list(PROVIDER_TICKER_PREFIXES.values()), default=None,
+    ).astype(object)
+    provider = np.where(provider != None, provider, prefix_provider)  # noqa: E711
+
+    # Compose names only where Yahoo reported none
+    product_name = reported.copy()
+    todo = reported == None  # noqa: E711
+    prov, year, t = provider[todo], target_year[todo], ticker[todo]
+    has_provider, has_year = prov != None, year != None  # noqa: E711
+    lead = np.where(has_provider, prov, "").astype(object) + np.where(has_provider, " ", "").astype(object)
+    kind = np.where(t == "VTINX", "Income Fund", "Target Date Fund").astype(object)
+    product_name[todo] = np.select(
+        [is_income[todo], has_year, has_provider],
+        [lead + "Target Retirement Income Fund",
+         lead + "Target Retirement " + np.where(has_year, year, "").astype(object) + " Fund",
+         lead + kind],
+        default="Target Date Fund (" + t.astype(str).astype(object) + ")",
+    )
+
+    return pd.DataFrame({
+        "TICKER":       tickers,
+        "PRODUCTNAME":  product_name,
+        "PROVIDER":     provider,
+        "TARGETYEAR":   pd.array(target_year, dtype="Int64"),
+        "ISINCOMEFUND": is_income,
+    })
+
+def load_tdf_universe(path: str, column: str = "TICKER") -> list[str]:
+    """
+    Read a target-date fund universe (one share class per row) from a CSV file.
+    """
+    tickers = pd.read_csv(path, usecols=[column])[column].dropna().astype(str).str.strip()
+    return tickers.drop_duplicates().tolist()
+
 # STEP 3: Create Ticker to Product Code Mapping
 
 def generate_product_code(index: int) -> str:
@@ -207,31 +337,33 @@ def create_ticker_to_product_mapping(tickers: List[str]) -> Dict[str, str]:
 
 # STEP 4: Generate Product Master Data
 
-def generate_account_codes(account_type='COMP') -> str:
+def generate_account_codes(account_type='COMP', rng: Optional[random.Random] = None) -> str:
     """
     Generate realistic account codes based on type
 
     Args:
         account_type: 'COMP' for performance accounts, 'MODEL' for representative accounts
+        rng: Random source; defaults to the module-level generator
 
     Returns:
         Account code string
     """
+    rng = rng or random
     # List of possible account code patterns
     patterns = [
         # Strategy-based codes
         lambda: f"ASTTDFCOMP" if account_type == 'COMP' else f"ASTTDFMODEL",
         lambda: f"ASTTDFMF" if account_type == 'COMP' else f"ASTTDFMODEL",
         # Numeric codes
-        lambda: str(random.randint(1000, 3000)),
+        lambda: str(rng.randint(1000, 3000)),
         # Letter-number codes
-        lambda: f"LX{random.randint(100, 500)}",
-        lambda: f"OC{random.randint(1000, 2000)}",
+        lambda: f"LX{rng.randint(100, 500)}",
+        lambda: f"OC{rng.randint(1000, 2000)}",
     ]
 
     # Select a pattern with weights (strategy-based codes more common)
     weights = [0.4, 0.3, 0.1, 0.1, 0.1]  # 70% strategy-based, 30% other patterns
-    pattern = random.choices(patterns, weights=weights)[0]
+    pattern = rng.choices(patterns, weights=weights)[0]
 
     return pattern()
 
@@ -247,11 +379,14 @@ def create_product_record(product_code: str, fund_name: str, strategy: str) -> D
     Returns:
         Dictionary with product master data
     """
-    perf_account = generate_account_codes('COMP')
-    repr_account = generate_account_codes('MODEL')
-
-    if random.random() < 0.3:
-        shared_code = f"LX{random.randint(100, 500)}" if random.random() < 0.5 else f"OC{random.randint(1000, 2000)}"
+    # Seed from the product itself so account codes are stable across runs
+    # and the record only changes when its business attributes do
+    rng = random.Random(f"{product_code}:{strategy}")
+    perf_account = generate_account_codes('COMP', rng)
+    repr_account = generate_account_codes('MODEL', rng)
+
+    if rng.random() < 0.3:
+        shared_code = f"LX{rng.randint(100, 500)}" if rng.random() < 0.5 else f"OC{rng.randint(1000, 2000)}"
         perf_account = shared_code
         repr_account = shared_code
 
@@ -312,12 +447,28 @@ def generate_product_master_data(
         if col not in df_products.columns:
             df_products[col] = None
 
-    df_products = df_products[expected_columns]
+    df_products = apply_schema(df_products[expected_columns], "PRODUCTMASTER")
 
     logger.info(f"Generated product master data with {len(df_products)} records")
 
     return df_products
 
+def generate_product_master_batch(tickers: List[str], fund_info: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    Product master for a whole fund universe, with names inferred in batch
+
+    Args:
+        tickers: List of ticker symbols (thousands of share classes are fine)
+        fund_info: Dictionary mapping tickers to their fund information
+
+    Returns:
+        DataFrame containing product master data
+    """
+    names = infer_fund_names_batch(tickers, fund_info)
+    ticker_to_name = dict(zip(names["TICKER"], names["PRODUCTNAME"]))
+    ticker_to_product = create_ticker_to_product_mapping(tickers)
+    return generate_product_master_data(ticker_to_name, ticker_to_product)
+
 def main():
     """
     Main function to run the TDF product generator pipeline
@@ -0,0 +1,93 @@
+"""
+Command-line entry point.
+
+    python -m source_code tables
+    python -m source_code tickers
+    python -m source_code validate HoldingDetails.csv --table HOLDINGDETAILS
+    python -m source_code run --targets PORTFOLIOPERFORMANCE --output-dir out/
+    python -m source_code fx EUR GBP --start 2024-01-01
+
+Only the standard library is imported up front; each command imports what it
+needs when it runs, so `--help` and listings start in milliseconds.
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+
+def _tables(args) -> int:
+    from source_code.pipeline import TABLES
+    print("\n".join(TABLES))
+    return 0
+
+
+def _tickers(args) -> int:
+    from source_code.Product_Master.Product_Master_table import get_tdf_tickers
+    print("\n".join(get_tdf_tickers()))
+    return 0
+
+
+def _validate(args) -> int:
+    import pandas as pd
+
+    from source_code.utils.validation import validate_tables
+
+    tables = {args.table: pd.read_csv(args.csv)}
+    for spec in args.parent:
+        name, _, path = spec.partition("=")
+        tables[name] = pd.read_csv(path)
+    issues = validate_tables(tables)
+    if len(issues):
+        print(issues.to_string(index=False))
+        return 1
+    print(f"{args.csv}: {len(tables[args.table])} rows passed")
+    return 0
+
+
+def _run(args) -> int:
+    from source_code.pipeline import main
+    main(args.extra)
+    return 0
+
+
+def _fx(args) -> int:
+    from source_code.utils.fx_rates import main
+    main(args.extra)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m source_code", description="Target date fund data tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("tables", help="List the tables the pipeline builds").set_defaults(func=_tables)
+    commands.add_parser("tickers", help="List the target date fund tickers").set_defaults(func=_tickers)
+
+    validate = commands.add_parser("validate", help="Check a table CSV against its key/range rules")
+    validate.add_argument("csv")
+    validate.add_argument("--table", required=True, help="Table name, e.g. HOLDINGDETAILS")
+    validate.add_argument("--parent", action="append", default=[], metavar="TABLE=CSV",
+                          help="Parent table for foreign-key checks (repeatable)")
+    validate.set_defaults(func=_validate)
+
+    for name, func, help_text in [
+        ("run", _run, "Refresh tables through the pipeline (see `run -h`)"),
+        ("fx", _fx, "Download FX rates into the local FX rate file (see `fx -h`)"),
+    ]:
+        # options (including -h) are left for the command's own parser
+        commands.add_parser(name, help=help_text, add_help=False).set_defaults(func=func, forwards=True)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and not getattr(args, "forwards", False):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.extra = extra
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""
+End-to-end refresh of every table as one dependency graph.
+
+Each Stage declares the stages it reads from; the orchestrator runs every
+stage whose inputs are ready on a thread pool, so independent work (currency,
+product master, benchmarks, performance factors) overlaps and a refresh costs
+the critical path instead of the sum of all scripts. Upstream frames are built
+once and handed to dependents in memory.
+
+    python -m source_code.pipeline --targets PORTFOLIOPERFORMANCE --output-dir out/
+    python -m source_code.pipeline --provider record   # then --provider replay, offline
+    python -m source_code.pipeline --output-dir out/ --chunk-portfolios 1000   # stream PORTFOLIOPERFORMANCE
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from source_code.utils import instrumentation, providers
+
+if TYPE_CHECKING:  # pandas is only needed once a stage runs
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 6
+BENCHMARK_TICKERS = ("^GSPC", "AGG")
+BENCHMARK_CODES = tuple(t.lstrip("^") for t in BENCHMARK_TICKERS)  # BENCHMARKCODE in every benchmark table
+BENCHMARK_START = "2000-01-01"
+CHARACTERISTIC_BENCHMARKS = {"GSPC": "^GSPC"}
+NUM_PORTFOLIOS = 10
+SEED = 42
+PERFORMANCE_PROCESSES = 1  # >1 shards PORTFOLIOPERFORMANCE across worker processes (--processes)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One node of the pipeline: `func` is called with the results of `inputs`
+    (stage names) as positional arguments, in the order listed.
+    """
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+
+
+class PipelineError(RuntimeError):
+    def __init__(self, stage: str, cause: BaseException):
+        self.stage = stage
+        super().__init__(f"stage {stage} failed: {cause!r}")
+
+
+# ---- stage functions (imports are deferred so only the stages that run load their modules) ----
+
+def _currency() -> pd.DataFrame:
+    from source_code.utils.Currency_table import get_country_currency_df
+    return get_country_currency_df()
+
+
+def _product_master() -> pd.DataFrame:
+    from source_code.Product_Master.Product_Master_table import main
+    return main()
+
+
+def _benchmark_general() -> pd.DataFrame:
+    from source_code.Benchmark_General_Information.Benchmark_General_Information_table import (
+        generate_benchmark_general_information,
+    )
+    return generate_benchmark_general_information(benchmark_codes=list(BENCHMARK_CODES), rng=random.Random(SEED))
+
+
+def _benchmark_performance() -> pd.DataFrame:
+    from source_code.Benchmark_Performance.Benchmark_Performance_table import build_benchmark_performance
+    return build_benchmark_performance(tickers=BENCHMARK_TICKERS, start_date=BENCHMARK_START)
+
+
+def _benchmark_characteristics() -> pd.DataFrame:
+    from source_code.Benchmark_Characteristic.BenchmarkCharacteristic_table import (
+        build_benchmark_characteristics_table,
+    )
+    return build_benchmark_characteristics_table(CHARACTERISTIC_BENCHMARKS)
+
+
+def _portfolio_general() -> pd.DataFrame:
+    from source_code.Portfolio_General_Information.PortfolioGeneralInformation_table import (
+        generate_portfolio_general,
+    )
+    return generate_portfolio_general(NUM_PORTFOLIOS, rng=random.Random(SEED))
+
+
+def _fund_holdings() -> pd.DataFrame:
+    from source_code.Holding_Details.HoldingDetails_Table import fetch_holdings_ticker, tickers_list
+    return fetch_holdings_ticker(tickers_list)
+
+
+def _merged_holdings(fund_holdings: pd.DataFrame, df_general: pd.DataFrame) -> pd.DataFrame:
+    import numpy as np
+
+    from source_code.Holding_Details.HoldingDetails_Table import generate_merged_holdings
+    return generate_merged_holdings(
+        fund_holdings, NUM_PORTFOLIOS, df_portfolios=df_general, rng=np.random.default_rng(SEED)
+    )
+
+
+def _holding_details(df_merged: pd.DataFrame) -> pd.DataFrame:
+    from source_code.Holding_Details.HoldingDetails_Table import HOLDINGDETAILS_COLUMNS
+    from source_code.utils.schema import apply_schema
+    return apply_schema(df_merged[HOLDINGDETAILS_COLUMNS], "HOLDINGDETAILS")
+
+
+def _performance_factors() -> pd.DataFrame:
+    from source_code.Portfolio_Performance.PortfolioPerformance_Table import generate_performance_factors
+    return generate_performance_factors()
+
+
+def _portfolio_performance(
+    df_merged: pd.DataFrame, df_factors: pd.DataFrame, df_general: pd.DataFrame
+) -> pd.DataFrame:
+    from source_code.Portfolio_Performance.PortfolioPerformance_Table import generate_portfolio_performance
+    return generate_portfolio_performance(
+        seed=SEED, df_merged=df_merged, df_performance_dict=df_factors, df_portfolios=df_general,
+        workers=PERFORMANCE_PROCESSES,
+    )
+
+
+def _portfolio_benchmark_association(df_general: pd.DataFrame, df_merged: pd.DataFrame) -> pd.DataFrame:
+    from source_code.Portfolio_Benchmark_Association.Portfolio_Benchmark_Association import (
+        generate_portfolio_benchmark_association,
+    )
+    return generate_portfolio_benchmark_association(df_general, df_merged)
+
+
+# Intermediate stages are lower case; table stages are named after their warehouse table
+STAGES: Dict[str, Stage] = {s.name: s for s in [
+    Stage("CURRENCY", _currency),
+    Stage("PRODUCTMASTER", _product_master),
+    Stage("BENCHMARKGENERALINFORMATION", _benchmark_general),
+    Stage("BENCHMARKPERFORMANCE", _benchmark_performance),
+    Stage("BENCHMARKCHARACTERISTICS", _benchmark_characteristics),
+    Stage("PORTFOLIOGENERALINFORMATION", _portfolio_general),
+    Stage("fund_holdings", _fund_holdings),
+    Stage("merged_holdings", _merged_holdings, ("fund_holdings", "PORTFOLIOGENERALINFORMATION")),
+    Stage("HOLDINGDETAILS", _holding_details, ("merged_holdings",)),
+    Stage("performance_factors", _performance_factors),
+    Stage("PORTFOLIOPERFORMANCE", _portfolio_performance,
+          ("merged_holdings", "performance_factors", "PORTFOLIOGENERALINFORMATION")),
+    Stage("PORTFOLIOBENCHMARKASSOCIATION", _portfolio_benchmark_association,
+          ("PORTFOLIOGENERALINFORMATION", "merged_holdings")),
+]}
+
+TABLES = [name for name in STAGES if name.isupper()]
+
+
+def resolve_stages(stages: Dict[str, Stage], targets: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Stages needed for `targets` (all stages if None) in a valid execution order.
+    Raises ValueError on unknown stages or dependency cycles.
+    """
+    order: List[str] = []
+    state: Dict[str, str] = {}  # name -> "visiting" | "done"
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if name not in stages:
+            raise ValueError(f"unknown stage {name!r}" + (f" (input of {path[-1]})" if path else ""))
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"dependency cycle: {' -> '.join(path + (name,))}")
+        state[name] = "visiting"
+        for dep in stages[name].inputs:
+            visit(dep, path + (name,))
+        state[name] = "done"
+        order.append(name)
+
+    for name in (targets if targets is not None else stages):
+        visit(name, ())
+    return order
+
+
+def run_pipeline(
+    targets: Optional[Iterable[str]] = None,
+    stages: Optional[Dict[str, Stage]] = None,
+    max_workers: int = MAX_WORKERS,
+) -> Dict[str, Any]:
+    """
+    Run `targets` and everything they depend on, each stage exactly once, with
+    independent stages in parallel.
+
+    Returns
+    -------
+    dict
+        Stage name -> result for every stage that ran.
+    """
+    stages = stages if stages is not None else STAGES
+    order = resolve_stages(stages, targets)
+    pending = {name: set(stages[name].inputs) for name in order}
+    dependents: Dict[str, List[str]] = {name: [] for name in order}
+    for name in order:
+        for dep in stages[name].inputs:
+            dependents[dep].append(name)
+
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    def run(name: str) -> Any:
+        inputs = [results[dep] for dep in stages[name].inputs]
+        rows_in = sum(len(x) for x in inputs if hasattr(x, "__len__")) if inputs else None
+        t0 = time.perf_counter()
+        with instrumentation.stage(name, rows_in) as record:
+            out = record.output(stages[name].func(*inputs))
+        timings[name] = time.perf_counter() - t0
+        return out
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+        running: Dict[Future, str] = {}
+
+        def submit_ready() -> None:
+            for name in [n for n, deps in pending.items() if not deps]:
+                del pending[name]
+                logger.info(f"▶ {name}")
+                running[pool.submit(run, name)] = name
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    raise PipelineError(name, error) from error
+                results[name] = future.result()
+                rows = f", {len(results[name])} rows" if hasattr(results[name], "__len__") else ""
+                logger.info(f"✔ {name} ({timings[name]:.1f}s{rows})")
+                for child in dependents[name]:
+                    pending[child].discard(name)
+            submit_ready()
+
+    critical: Dict[str, float] = {}
+    for name in order:
+        critical[name] = timings[name] + max((critical[d] for d in stages[name].inputs), default=0.0)
+    logger.info(
+        f"Pipeline finished in {time.perf_counter() - started:.1f}s "
+        f"(critical path {max(critical.values(), default=0.0):.1f}s, sum of stages {sum(timings.values()):.1f}s)"
+    )
+    return results
+
+
+def stream_portfolio_performance(
+    results: Dict[str, Any], out: Path, fmt: str = "csv", chunk_portfolios: int = 1000, validate: bool = False,
+    load: bool = False,
+) -> int:
+    """
+    Write PORTFOLIOPERFORMANCE to `out` block by block from its upstream
+    `results`, so memory is bounded by `chunk_portfolios` rather than the
+    portfolio count. Blocks hold disjoint portfolios, so validating each one
+    checks the whole table. With `load`, each block is also validated and
+    hash-diff merged into the warehouse (utils/incremental_load.py). Returns
+    the number of rows written.
+    """
+    from source_code.Portfolio_Performance.PortfolioPerformance_Table import iter_portfolio_performance
+    from source_code.utils.validation import ValidationError, validate_table
+
+    name = "PORTFOLIOPERFORMANCE"
+    parents = {k: v for k, v in results.items() if k in TABLES}
+    rows = 0
+    if load:
+        from source_code.utils.incremental_load import MergeStats, merge_changed_rows
+        from source_code.utils.warehouse import get_warehouse
+        pool, loaded = get_warehouse(), MergeStats(name)
+
+    def blocks():
+        nonlocal rows
+        for df in iter_portfolio_performance(
+            seed=SEED,
+            df_merged=results["merged_holdings"],
+            df_performance_dict=results["performance_factors"],
+            df_portfolios=results["PORTFOLIOGENERALINFORMATION"],
+            portfolios_per_chunk=chunk_portfolios,
+            workers=PERFORMANCE_PROCESSES,
+        ):
+            if validate or load:
+                issues = validate_table(name, df, parents)
+                if len(issues):
+                    raise ValidationError(issues)
+            if load:
+                with pool.cursor() as cs:
+                    loaded.add(merge_changed_rows(cs, df, name, pool))
+            rows += len(df)
+            yield df
+
+    with instrumentation.stage(name) as record:
+        if fmt == "parquet":
+            from source_code.utils.columnar_store import write_table_chunks
+            write_table_chunks(blocks(), name, out)
+        else:
+            path = out / f"{name}.csv"
+            with open(path, "w", newline="") as f:
+                for i, df in enumerate(blocks()):
+                    df.to_csv(f, index=False, header=i == 0)
+            logger.info(f"wrote {path}")
+        record.rows_out = rows
+    logger.info(f"✔ {name} streamed ({rows} rows, {chunk_portfolios} portfolios per block)")
+    if load:
+        logger.info(f"{name} incremental load: {loaded.inserted} inserted, {loaded.updated} updated, "
+                    f"{loaded.unchanged} unchanged of {loaded.rows} rows")
+    return rows
+
+
+def main(argv: Optional[List[str]] = None):
+    global PERFORMANCE_PROCESSES
+    parser = argparse.ArgumentParser(description="Refresh all tables as one dependency graph.")
+    parser.add_argument("--targets", nargs="+", default=None, choices=TABLES,
+                        help="Tables to build (default: all); their inputs are built too")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--processes", type=int, default=PERFORMANCE_PROCESSES,
+                        help="Worker processes for PORTFOLIOPERFORMANCE; the factor matrix is shared, not copied")
+    parser.add_argument("--output-dir", default=None, help="Write each table to <dir>/<TABLE>.csv")
+    parser.add_argument("--format", default="csv", choices=("csv", "parquet"),
+                        help="Output format for --output-dir (parquet: partitioned tables, see utils/columnar_store.py)")
+    parser.add_argument("--chunk-portfolios", type=int, default=None, metavar="N",
+                        help="With --output-dir, stream PORTFOLIOPERFORMANCE to disk N portfolios at a time "
+                             "instead of building it whole")
+    parser.add_argument("--validate", action="store_true", help="Fail if the built tables break key/range rules")
+    parser.add_argument("--load", action="store_true",
+                        help="Merge HOLDINGDETAILS and PORTFOLIOPERFORMANCE into the warehouse ($TDF_WAREHOUSE), "
+                             "pushing only new and changed rows; implies --validate")
+    parser.add_argument("--report", default=None, type=Path,
+                        help="Write per-stage timings, rows, provider calls and memory to this JSON file")
+    parser.add_argument("--profile", nargs="*", default=None, metavar="STAGE",
+                        help="cProfile these stages (no names: keep only the slowest stage's dump)")
+    parser.add_argument("--provider", default=None, choices=providers.MODES,
+                        help="Market-data adapter (default: $TDF_PROVIDER or live)")
+    parser.add_argument("--recordings", default=None, type=Path,
+                        help="Directory the record/replay adapters use (default: $TDF_RECORDINGS or <cache>/recordings)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    PERFORMANCE_PROCESSES = args.processes
+    if args.provider or args.recordings:
+        providers.set_provider(providers.make_provider(args.provider, args.recordings))
+    profile = "hottest" if args.profile == [] else args.profile
+    targets = args.targets
+    stream = bool(args.chunk_portfolios and args.output_dir and "PORTFOLIOPERFORMANCE" in (targets or TABLES))
+    if stream:  # its inputs run in the graph; the table itself is streamed below
+        targets = [t for t in (targets or TABLES) if t != "PORTFOLIOPERFORMANCE"]
+        targets += STAGES["PORTFOLIOPERFORMANCE"].inputs
+    out = Path(args.output_dir) if args.output_dir else None
+    validate = args.validate or args.load  # nothing reaches the warehouse unvalidated
+    with instrumentation.run_report("pipeline", args.report, profile) as report:
+        results = run_pipeline(targets, max_workers=args.workers)
+        if validate:  # before any block is streamed or loaded
+            from source_code.utils.validation import validate_tables
+            validate_tables({name: df for name, df in results.items() if name in TABLES}, raise_on_error=True)
+        if stream:
+            out.mkdir(parents=True, exist_ok=True)
+            stream_portfolio_performance(results, out, args.format, args.chunk_portfolios, validate, args.load)
+    logger.info("Stage summary:\n" + report.summary())
+
+    if out:
+        import pandas as pd
+
+        out.mkdir(parents=True, exist_ok=True)
+        for name, df in results.items():
+            if name not in TABLES or not isinstance(df, pd.DataFrame):
+                continue
+            if args.format == "parquet":
+                from source_code.utils.columnar_store import write_table
+                write_table(df, name, out)
+            else:
+                df.to_csv(out / f"{name}.csv", index=False)
+                logger.info(f"wrote {out / name}.csv")
+
+    if args.load:
+        from source_code.utils.incremental_load import INCREMENTAL_TABLES, load_incremental
+
+        for name in INCREMENTAL_TABLES:
+            if name in results:  # streamed PORTFOLIOPERFORMANCE was loaded block by block
+                load_incremental(results[name], name)
+
+
+if __name__ == "__main__":
+    main()
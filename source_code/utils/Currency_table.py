@@ -1,6 +1,105 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
-import requests
+
+from source_code.utils.metadata_cache import default_cache_dir
+from source_code.utils.providers import ProviderError, get_provider
+from source_code.utils.schema import apply_schema
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT = (
+    "https://restcountries.com/v3.1/all"
+    "?fields=name,currencies,cca2,region,subregion"
+)
+REVALIDATE_AFTER = 24 * 60 * 60  # seconds between conditional GETs against the API
+SEED_CSV = Path(__file__).with_name("Currency.csv")  # last exported table, used when offline
+
+# Display names the published tables already use; they take precedence over the
+# REST Countries names ("United States dollar"), which fill in every other code.
+DISPLAY_NAMES = {
+    "USD": "US Dollar",
+    "EUR": "Euro",
+    "GBP": "British Pound",
+    "JPY": "Japanese Yen",
+}
+
+
+def _cache_paths() -> Tuple[Path, Path]:
+    root = default_cache_dir()
+    return root / "restcountries.json", root / "restcountries.meta.json"
+
+
+def _load_seed() -> list:
+    """
+    Rebuild a minimal API-shaped payload from the bundled Currency.csv.
+    """
+    if not SEED_CSV.exists():
+        return []
+    df = pd.read_csv(SEED_CSV, index_col=0, keep_default_na=False)
+    raw = {}
+    for row in df.itertuples(index=False):
+        country = raw.setdefault(row.country_code, {
+            "name":       {"common": row.country_name},
+            "cca2":       row.country_code,
+            "region":     row.region,
+            "subregion":  row.subregion,
+            "currencies": {},
+        })
+        country["currencies"][row.currency_code] = {"name": row.currency_name}
+    return list(raw.values())
+
+
+def fetch_countries(max_age: float = REVALIDATE_AFTER) -> list:
+    """
+    REST Countries payload, persisted in the cache dir.
+
+    The stored copy is served as-is for `max_age` seconds; after that it is
+    revalidated with ETag / If-Modified-Since, so an unchanged dataset costs a
+    304 and no download. If the API is unreachable the stored copy (or the
+    bundled Currency.csv) is used instead.
+    """
+    data_path, meta_path = _cache_paths()
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+    cached = json.loads(data_path.read_text()) if data_path.exists() else None
+
+    if cached is not None and time.time() - meta.get("checked_at", 0) < max_age:
+        return cached
+
+    headers = {}
+    if cached is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        resp = get_provider().http_get(ENDPOINT, headers=headers, timeout=10)
+        if resp.status_code == 304 and cached is not None:
+            logger.info("currency reference not modified since last download")
+            raw = cached
+        else:
+            resp.raise_for_status()
+            raw = resp.json()
+            data_path.write_text(json.dumps(raw))
+            meta["etag"] = resp.header("ETag")
+            meta["last_modified"] = resp.header("Last-Modified")
+    except (ProviderError, ValueError) as e:
+        if cached is not None:
+            logger.warning(f"currency reference revalidation failed, using stored copy: {e}")
+            return cached
+        logger.warning(f"currency reference download failed, using {SEED_CSV.name}: {e}")
+        return _load_seed()
+
+    meta["checked_at"] = time.time()
+    meta_path.write_text(json.dumps(meta))
+    return raw
+
 
 def get_country_currency_df(exclude_regions=None):
     """
@@ -18,17 +117,17 @@ def get_country_currency_df(exclude_regions=None):
         Columns: country_name, country_code, currency_name,
                  currency_code, region, subregion
     """
+    return parse_countries(fetch_countries(), exclude_regions)
+
+
+def parse_countries(raw: list, exclude_regions=None) -> pd.DataFrame:
+    """
+    One row per (country, currency) from a REST Countries payload; see
+    get_country_currency_df for the columns.
+    """
     if exclude_regions is None:
         exclude_regions = {"antarctic"}
 
-    endpoint = (
-        "https://restcountries.com/v3.1/all"
-        "?fields=name,currencies,cca2,region,subregion"
-    )
-    resp = requests.get(endpoint, timeout=10)
-    resp.raise_for_status()
-    raw = resp.json()
-
     records = []
     for country in raw:
         region_key = (country.get("region") or "").strip().lower()
@@ -49,7 +148,52 @@ def get_country_currency_df(exclude_regions=None):
                     "subregion":      country.get("subregion")
                 })
 
-    return pd.DataFrame.from_records(records)
+    return apply_schema(pd.DataFrame.from_records(records), "CURRENCY")
+
+
+class CurrencyReference:
+    """
+    Hash indexes over the currency table for constant-time lookups:
+    currency code -> name and country code -> currency codes.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.currency_names: Dict[str, str] = {
+            **(df.drop_duplicates("currency_code").set_index("currency_code")["currency_name"].to_dict()
+               if len(df) else {}),
+            **DISPLAY_NAMES,
+        }
+        self.country_currencies: Dict[str, Tuple[str, ...]] = (
+            df.groupby("country_code", sort=False)["currency_code"].agg(tuple).to_dict()
+            if len(df) else {}
+        )
+
+    def currency_name(self, code: Optional[str], default: Optional[str] = None) -> Optional[str]:
+        """
+        Display name for an ISO 4217 code (DISPLAY_NAMES first, then REST
+        Countries); `default` (else the code itself) if unknown.
+        """
+        return self.currency_names.get(code, default if default is not None else code)
+
+    def currencies_for(self, country_code: str) -> Tuple[str, ...]:
+        return self.country_currencies.get(country_code, ())
+
+
+_reference: Optional[CurrencyReference] = None
+_reference_lock = threading.Lock()
+
+
+def get_currency_reference(refresh: bool = False) -> CurrencyReference:
+    """
+    Process-wide CurrencyReference, built on first use (and on `refresh`).
+    """
+    global _reference
+    with _reference_lock:
+        if _reference is None or refresh:
+            _reference = CurrencyReference(get_country_currency_df())
+        return _reference
+
 
 if __name__ == "__main__":
     df_currency = get_country_currency_df()
@@ -0,0 +1,257 @@
+"""
+Columnar table store: each table is a directory of zstd-compressed Parquet
+files, hive-partitioned by its natural key (BENCHMARKCODE=GSPC/part-0.parquet).
+
+Rows are sorted by date inside every partition and written in bounded row
+groups, so the min/max statistics Parquet keeps per row group let date-range
+filters skip most of a file; repeated strings (currency names, performance
+types, frequencies) are dictionary-encoded. `read_table` pushes column and
+row predicates down to the files, reading only what the caller asks for.
+`write_table_chunks` writes a table block by block as a generator yields it.
+
+    python -m source_code.utils.columnar_store source_code/Benchmark_Performance/benchmark_performance.csv BENCHMARKPERFORMANCE
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from source_code.utils.metadata_cache import default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION = "zstd"
+COMPRESSION_LEVEL = 9
+ROW_GROUP_SIZE = 50_000  # rows; smaller groups prune date ranges more finely
+DICTIONARY_MAX_RATIO = 0.5  # dictionary-encode string columns with at most this share of distinct values
+MIN_PARTITION_ROWS = 5_000  # below this average per key, footers outweigh pruning: write one sorted file
+COLUMNS_METADATA_KEY = b"tdf.columns"  # original column order (partition columns move last on read)
+
+# Natural partition key of the large tables; small dimension tables are one file
+PARTITION_COLUMNS: Dict[str, List[str]] = {
+    "BENCHMARKPERFORMANCE":     ["BENCHMARKCODE"],
+    "BENCHMARKCHARACTERISTICS": ["BENCHMARKCODE"],
+    "PORTFOLIOPERFORMANCE":     ["PORTFOLIOCODE"],
+    "HOLDINGDETAILS":           ["PORTFOLIOCODE"],
+}
+
+# Sort order within a partition, so row-group statistics are tight on dates
+SORT_COLUMNS: Dict[str, List[str]] = {
+    "BENCHMARKPERFORMANCE":     ["HISTORYDATE1"],
+    "BENCHMARKCHARACTERISTICS": ["HISTORYDATE", "CHARACTERISTICNAME"],
+    "PORTFOLIOPERFORMANCE":     ["HISTORYDATE", "PERFORMANCETYPE"],
+    "HOLDINGDETAILS":           ["HISTORYDATE", "TICKER"],
+}
+
+Filter = Tuple[str, str, object]  # (column, op, value), op in = != < <= > >= in "not in"
+
+
+def store_dir() -> Path:
+    """
+    Root of the table store: $TDF_STORE_DIR or <cache dir>/tables.
+    """
+    return Path(os.getenv("TDF_STORE_DIR") or default_cache_dir() / "tables")
+
+
+def table_path(name: str, root: Optional[Path] = None) -> Path:
+    return Path(root or store_dir()) / name
+
+
+def dictionary_columns(df: pd.DataFrame, exclude: Sequence[str] = ()) -> List[str]:
+    """
+    String and categorical columns repetitive enough to dictionary-encode.
+    """
+    out = []
+    for col in df.columns:
+        if col in exclude:
+            continue
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            out.append(col)
+        elif (s.dtype == object or pd.api.types.is_string_dtype(s)) and len(s):
+            if s.nunique(dropna=True) <= DICTIONARY_MAX_RATIO * len(s):
+                out.append(col)
+    return out
+
+
+def _partition_columns(df: pd.DataFrame, name: str) -> List[str]:
+    natural_key = [c for c in PARTITION_COLUMNS.get(name, []) if c in df.columns]
+    keys = len(df[natural_key].drop_duplicates()) if natural_key else 0
+    # small tables stay one file, sorted by the key so row-group statistics still prune it
+    return natural_key if keys and len(df) >= MIN_PARTITION_ROWS * keys else []
+
+
+def _write_files(df: pd.DataFrame, name: str, directory: Path, partition_cols: List[str], basename: str) -> None:
+    """Sort, encode and write `df` as Parquet files under `directory`."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    natural_key = [c for c in PARTITION_COLUMNS.get(name, []) if c in df.columns]
+    sort_cols = [c for c in dict.fromkeys(partition_cols + natural_key + SORT_COLUMNS.get(name, [])) if c in df.columns]
+    if sort_cols:
+        df = df.sort_values(sort_cols, kind="stable")
+    df = df.loc[:, ~df.columns.astype(str).str.startswith("Unnamed:")]  # index columns of old CSV exports
+
+    candidates = dictionary_columns(df, exclude=partition_cols)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    encode, encodings = [], {}
+    for i, field in enumerate(table.schema):
+        if field.name in candidates and not pa.types.is_null(field.type):
+            encode.append(field.name)
+            column = table[field.name]
+            if not pa.types.is_dictionary(field.type):
+                # stored as an Arrow dictionary type too, so readers get categoricals back
+                column = pc.dictionary_encode(column)
+            # one index width for every file, whatever each chunk's number of categories
+            table = table.set_column(i, field.name, column.cast(pa.dictionary(pa.int32(), column.type.value_type)))
+        elif field.name in partition_cols:
+            continue
+        elif pa.types.is_temporal(field.type) or pa.types.is_integer(field.type):
+            encodings[field.name] = "DELTA_BINARY_PACKED"  # sorted dates shrink to a few bits each
+        elif pa.types.is_floating(field.type):
+            encodings[field.name] = "BYTE_STREAM_SPLIT"  # groups exponent bytes so zstd finds the repetition
+    # the pandas metadata block is repeated in every file's footer and Arrow's schema says enough
+    table = table.replace_schema_metadata({COLUMNS_METADATA_KEY: json.dumps(list(df.columns)).encode()})
+
+    file_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        table,
+        directory,
+        format=file_format,
+        partitioning=partition_cols or None,
+        partitioning_flavor="hive" if partition_cols else None,
+        file_options=file_format.make_write_options(
+            compression=COMPRESSION,
+            compression_level=COMPRESSION_LEVEL,
+            use_dictionary=encode or False,
+            column_encoding=encodings or None,
+        ),
+        basename_template=basename,
+        max_rows_per_group=ROW_GROUP_SIZE,
+        max_partitions=100_000,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def _staging(name: str, root: Optional[Path]) -> Tuple[Path, Path]:
+    dest = table_path(name, root)
+    staging = dest.with_name(f".{dest.name}.staging")
+    shutil.rmtree(staging, ignore_errors=True)
+    return dest, staging
+
+
+def _swap_in(staging: Path, dest: Path) -> None:
+    retired = dest.with_name(f".{dest.name}.retired")
+    shutil.rmtree(retired, ignore_errors=True)
+    if dest.exists():
+        os.replace(dest, retired)
+    os.replace(staging, dest)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def write_table(
+    df: pd.DataFrame,
+    name: str,
+    root: Optional[Path] = None,
+    partition_cols: Optional[List[str]] = None,
+) -> Path:
+    """
+    Replace table `name` in the store with `df`. The new files are written
+    next to the old ones and swapped in, so readers never see half a table.
+    """
+    if partition_cols is None:
+        partition_cols = _partition_columns(df, name)
+    dest, staging = _staging(name, root)
+    _write_files(df, name, staging, partition_cols, "part-{i}.parquet")
+    _swap_in(staging, dest)
+    logger.info(f"wrote {name}: {len(df)} rows, {disk_size(dest) / 2 ** 20:.2f} MB in {dest}")
+    return dest
+
+
+def write_table_chunks(
+    chunks: Iterable[pd.DataFrame],
+    name: str,
+    root: Optional[Path] = None,
+    partition_cols: Optional[List[str]] = None,
+) -> Path:
+    """
+    Replace table `name` with the concatenation of `chunks`, writing each
+    chunk as it arrives (its own files per partition) so only one chunk is in
+    memory. Chunks should not share partition keys, e.g. one block of
+    portfolios each. The partition layout is decided on the first chunk
+    unless `partition_cols` is given.
+    """
+    dest, staging = _staging(name, root)
+    staging.mkdir(parents=True)
+    rows = count = 0
+    for count, df in enumerate(chunks, 1):
+        if partition_cols is None:
+            partition_cols = _partition_columns(df, name)
+        _write_files(df, name, staging, partition_cols, f"part-{count}-{{i}}.parquet")
+        rows += len(df)
+    _swap_in(staging, dest)
+    logger.info(f"wrote {name}: {rows} rows in {count} chunks, {disk_size(dest) / 2 ** 20:.2f} MB in {dest}")
+    return dest
+
+
+def read_table(
+    name: str,
+    root: Optional[Path] = None,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[Filter]] = None,
+) -> pd.DataFrame:
+    """
+    Load table `name`, reading only `columns` and the partitions / row groups
+    that can satisfy `filters`, e.g.
+    `read_table("BENCHMARKPERFORMANCE", filters=[("BENCHMARKCODE", "=", "GSPC"), ("HISTORYDATE1", ">=", date(2020, 1, 1))])`.
+    Dictionary-encoded columns come back as categoricals.
+    """
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    path = table_path(name, root)
+    if not path.exists():
+        raise FileNotFoundError(f"table {name} not found in {path.parent}")
+    dataset = ds.dataset(path, format="parquet", partitioning=ds.HivePartitioning.discover(infer_dictionary=True))
+    expression = pq.filters_to_expression(filters) if filters else None
+    df = dataset.to_table(columns=columns, filter=expression).to_pandas(date_as_object=False)
+
+    if columns is None:
+        stored = (dataset.schema.metadata or {}).get(COLUMNS_METADATA_KEY)
+        if stored:
+            order = [c for c in json.loads(stored) if c in df.columns]
+            df = df[order + [c for c in df.columns if c not in order]]
+    return df
+
+
+def disk_size(path: Path) -> int:
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Convert a table CSV export to the Parquet store.")
+    parser.add_argument("csv", type=Path)
+    parser.add_argument("table", help="Table name, e.g. BENCHMARKPERFORMANCE")
+    parser.add_argument("--root", type=Path, default=None, help="Store directory (default: $TDF_STORE_DIR or <cache>/tables)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    header = pd.read_csv(args.csv, nrows=0).columns
+    df = pd.read_csv(args.csv, parse_dates=[c for c in header if c.endswith("DATE") or c.startswith("HISTORYDATE")])
+    dest = write_table(df, args.table, args.root)
+    before, after = disk_size(args.csv), disk_size(dest)
+    print(f"{args.table}: {before / 2 ** 10:.0f} KB CSV -> {after / 2 ** 10:.0f} KB Parquet ({before / max(after, 1):.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
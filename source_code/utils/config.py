@@ -0,0 +1,36 @@
+"""
+Local environment configuration (Snowflake credentials and the like).
+
+Credentials live in an env file read on first use rather than at import, so
+modules that only build frames never need python-dotenv or the file itself.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# $TDF_ENV_FILE, else local_config.env at the repository root
+ENV_FILE = Path(os.getenv("TDF_ENV_FILE") or Path(__file__).resolve().parents[2] / "local_config.env")
+
+_loaded = set()
+
+
+def load_local_env(path: Optional[Path] = None) -> bool:
+    """
+    Load `path` (default ENV_FILE) into os.environ once per process; variables
+    already set in the environment win. Returns False when the file is missing.
+    """
+    path = Path(path) if path is not None else ENV_FILE
+    if path in _loaded:
+        return True
+    if not path.exists():
+        logger.warning(f"env file {path} not found; using the process environment only")
+        return False
+    from dotenv import load_dotenv
+
+    load_dotenv(path)
+    _loaded.add(path)
+    return True
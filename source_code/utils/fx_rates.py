@@ -0,0 +1,233 @@
+"""
+Historical FX rates and base-currency restatement.
+
+Rates are held as one date x currency matrix of USD per unit of currency
+(USD is the pivot, so any cross rate is a ratio of two columns). Providers
+are pluggable: a local CSV file is the default stand-in, Yahoo Finance
+(`XXXUSD=X` closes) is the live source.
+"""
+
+import argparse
+import logging
+import os
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from source_code.utils.Currency_table import get_currency_reference
+from source_code.utils.metadata_cache import default_cache_dir
+from source_code.utils.providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+PIVOT_CURRENCY = "USD"
+FX_COLUMNS = ["HISTORYDATE", "CURRENCYCODE", "RATETOUSD"]  # RATETOUSD = USD per 1 unit of CURRENCYCODE
+DEFAULT_PROVIDER = os.getenv("TDF_FX_PROVIDER", "file")
+
+
+def fx_file_path() -> Path:
+    """
+    Local FX rate file: $TDF_FX_RATES or fx_rates.csv in the cache dir.
+    """
+    return Path(os.getenv("TDF_FX_RATES") or default_cache_dir() / "fx_rates.csv")
+
+
+# ---- providers: (currencies, start, end) -> long frame with FX_COLUMNS ----
+
+def file_fx_provider(currencies: Iterable[str], start: date, end: date) -> pd.DataFrame:
+    path = fx_file_path()
+    if not path.exists():
+        logger.warning(f"FX rate file {path} not found")
+        return pd.DataFrame(columns=FX_COLUMNS)
+    df = pd.read_csv(path, parse_dates=["HISTORYDATE"])
+    keep = df["CURRENCYCODE"].isin(list(currencies)) & df["HISTORYDATE"].between(
+        pd.Timestamp(start), pd.Timestamp(end)
+    )
+    return df.loc[keep, FX_COLUMNS]
+
+
+def yahoo_fx_provider(currencies: Iterable[str], start: date, end: date) -> pd.DataFrame:
+    symbols = {f"{c}{PIVOT_CURRENCY}=X": c for c in currencies}
+    if not symbols:
+        return pd.DataFrame(columns=FX_COLUMNS)
+    raw = get_provider().download(
+        list(symbols), start=start, end=pd.Timestamp(end) + pd.Timedelta(days=1),
+        interval="1d", auto_adjust=False, progress=False,
+    )
+    close = raw["Close"]
+    if isinstance(close, pd.Series):
+        close = close.to_frame(next(iter(symbols)))
+    close.index = pd.to_datetime(close.index).tz_localize(None)
+    long = close.rename(columns=symbols).rename_axis("HISTORYDATE").reset_index().melt(
+        id_vars="HISTORYDATE", var_name="CURRENCYCODE", value_name="RATETOUSD"
+    )
+    return long.dropna(subset=["RATETOUSD"])[FX_COLUMNS]
+
+
+FX_PROVIDERS: Dict[str, Callable[[Iterable[str], date, date], pd.DataFrame]] = {
+    "file":  file_fx_provider,
+    "yahoo": yahoo_fx_provider,
+}
+
+
+def register_fx_provider(name: str, provider: Callable[[Iterable[str], date, date], pd.DataFrame]) -> None:
+    FX_PROVIDERS[name] = provider
+
+
+class FxRateStore:
+    """
+    Date x currency matrix of USD per unit, forward-filled so every calendar
+    date resolves to the last published rate on or before it.
+    """
+
+    def __init__(self, rates: pd.DataFrame):
+        wide = (
+            rates.assign(HISTORYDATE=pd.to_datetime(rates["HISTORYDATE"]).dt.normalize())
+            .pivot_table(index="HISTORYDATE", columns="CURRENCYCODE", values="RATETOUSD", aggfunc="last")
+            .sort_index()
+        )
+        if len(wide):
+            wide = wide.reindex(pd.date_range(wide.index[0], wide.index[-1], freq="D")).ffill()
+        wide[PIVOT_CURRENCY] = 1.0
+        self.dates = wide.index
+        self.currencies = wide.columns
+        self.matrix = wide.to_numpy(dtype=float)
+
+    def rates(self, dates, from_codes, to_codes) -> np.ndarray:
+        """
+        Units of `to_codes` per unit of `from_codes` on each date (aligned arrays),
+        NaN where a currency or date is not covered.
+        """
+        dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+        pos = self.dates.searchsorted(dates, side="right") - 1
+        src = self.currencies.get_indexer(pd.Index(from_codes))
+        dst = self.currencies.get_indexer(pd.Index(to_codes))
+        valid = (pos >= 0) & (src >= 0) & (dst >= 0)
+        rows = np.clip(pos, 0, None)
+        with np.errstate(invalid="ignore"):
+            out = self.matrix[rows, np.clip(src, 0, None)] / self.matrix[rows, np.clip(dst, 0, None)]
+        return np.where(valid, out, np.nan)
+
+
+def load_fx_store(
+    currencies: Iterable[str], start: date, end: date, provider: Optional[str] = None
+) -> FxRateStore:
+    currencies = sorted(set(currencies) - {PIVOT_CURRENCY})
+    name = provider or DEFAULT_PROVIDER
+    # one week of look-back so a start date on a holiday still resolves
+    rates = FX_PROVIDERS[name](currencies, pd.Timestamp(start) - pd.Timedelta(days=7), end) if currencies \
+        else pd.DataFrame(columns=FX_COLUMNS)
+    missing = set(currencies) - set(rates["CURRENCYCODE"])
+    if missing:
+        logger.warning(f"{name} FX provider has no rates for {sorted(missing)}")
+    return FxRateStore(rates)
+
+
+def save_fx_rates(rates: pd.DataFrame, path: Optional[Path] = None) -> Path:
+    """
+    Merge `rates` into the local FX file (later values win), for offline runs.
+    """
+    path = Path(path) if path is not None else fx_file_path()
+    if path.exists():
+        rates = pd.concat([pd.read_csv(path, parse_dates=["HISTORYDATE"]), rates], ignore_index=True)
+    rates = rates.drop_duplicates(["HISTORYDATE", "CURRENCYCODE"], keep="last").sort_values(FX_COLUMNS[:2])
+    rates[FX_COLUMNS].to_csv(path, index=False, date_format="%Y-%m-%d")
+    return path
+
+
+# ---- conversion engine ----
+
+def _conversion_rates(
+    dates: pd.Series, local: pd.Series, base: pd.Series, store: Optional[FxRateStore], provider: Optional[str]
+) -> tuple:
+    """
+    Rates for every row in one aligned array operation; rows already in their
+    base currency are 1.0 without consulting a provider.
+    """
+    # codes may arrive as categoricals (utils/schema.py), which only compare with identical categories
+    local, base = local.astype(object), base.astype(object)
+    same = ((local == base) | local.isna() | base.isna()).to_numpy()
+    rates = np.ones(len(local))
+    if same.all():
+        return rates, store
+    if store is None:
+        need = ~same
+        when = pd.to_datetime(dates[need])
+        store = load_fx_store(pd.concat([local[need], base[need]]).dropna().unique(),
+                              when.min(), when.max(), provider)
+    rates[~same] = store.rates(dates[~same], local[~same], base[~same])
+    if np.isnan(rates).any():
+        logger.warning(f"{int(np.isnan(rates).sum())} rows have no FX rate and restate to NaN")
+    return rates, store
+
+
+def _portfolio_base(df: pd.DataFrame, df_general: pd.DataFrame) -> pd.Series:
+    base_map = df_general.set_index("PORTFOLIOCODE")["BASECURRENCYCODE"].astype(object)
+    return df["PORTFOLIOCODE"].astype(object).map(base_map).fillna(df["CURRENCYCODE"].astype(object))
+
+
+def restate_holdings_to_base(
+    df_holdings: pd.DataFrame,
+    df_general: pd.DataFrame,
+    store: Optional[FxRateStore] = None,
+    value_columns: Iterable[str] = ("PRICE", "COSTBASIS", "MARKETVALUE"),
+    provider: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    HOLDINGDETAILS with price, cost basis and market value restated from each
+    holding's CURRENCYCODE into its portfolio's BASECURRENCYCODE as of HISTORYDATE.
+    CURRENCYCODE becomes the base currency; FXRATE records the rate applied.
+    """
+    base = _portfolio_base(df_holdings, df_general)
+    rates, _ = _conversion_rates(df_holdings["HISTORYDATE"], df_holdings["CURRENCYCODE"], base, store, provider)
+    out = df_holdings.copy()
+    for col in value_columns:
+        if col in out:
+            values = out[col].to_numpy(dtype=float) * rates
+            out[col] = values if col == "PRICE" else values.round(2)
+    out["CURRENCYCODE"] = base.where(out["CURRENCYCODE"].notna()).to_numpy()
+    out["FXRATE"] = rates
+    return out
+
+
+def restate_performance_to_base(
+    df_performance: pd.DataFrame,
+    df_general: pd.DataFrame,
+    store: Optional[FxRateStore] = None,
+    provider: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    PORTFOLIOPERFORMANCE factors restated into each portfolio's base currency:
+    (1 + r_local) * fx(HISTORYDATE) / fx(PERFORMANCEINCEPTIONDATE) - 1,
+    with fx quoted as base units per local unit.
+    """
+    df = df_performance
+    base = _portfolio_base(df, df_general)
+    end_fx, store = _conversion_rates(df["HISTORYDATE"], df["CURRENCYCODE"], base, store, provider)
+    start_fx, _ = _conversion_rates(df["PERFORMANCEINCEPTIONDATE"], df["CURRENCYCODE"], base, store, provider)
+    out = df.copy()
+    out["PERFORMANCEFACTOR"] = (1 + df["PERFORMANCEFACTOR"].to_numpy(dtype=float)) * end_fx / start_fx - 1
+    out["CURRENCYCODE"] = base.where(out["CURRENCYCODE"].notna()).to_numpy()
+    if "CURRENCY" in out:
+        names = get_currency_reference().currency_names
+        out["CURRENCY"] = out["CURRENCYCODE"].map(names).fillna(out["CURRENCYCODE"])
+    return out
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Download FX rates into the local FX rate file.")
+    parser.add_argument("currencies", nargs="+", help="ISO codes, e.g. EUR GBP JPY")
+    parser.add_argument("--start", default="2004-12-01")
+    parser.add_argument("--end", default=date.today().isoformat())
+    parser.add_argument("--provider", default="yahoo", choices=sorted(FX_PROVIDERS))
+    args = parser.parse_args(argv)
+
+    rates = FX_PROVIDERS[args.provider](args.currencies, pd.Timestamp(args.start), pd.Timestamp(args.end))
+    print(f"{len(rates)} rates written to {save_fx_rates(rates)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Run instrumentation: per-stage timings, rows, memory and outbound provider calls.
+
+Stages are wrapped with `stage(name)` and every call to a data provider or the
+warehouse with `provider_call(provider)`. While a `run_report()` is active the
+measurements are collected into one RunReport and written as JSON at the end
+of the run; otherwise both wrappers cost a clock read and nothing is kept.
+
+Calls are attributed to the stage active in the calling context. Worker
+threads do not inherit that context, so code that fans out onto its own pool
+submits `bind(fn)` instead of `fn`.
+"""
+
+import contextvars
+import cProfile
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+NO_STAGE = "(no stage)"
+
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("tdf_stage", default=None)
+_active: Optional["RunReport"] = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Process high-water resident set size in MB (None where it cannot be read).
+    """
+    try:
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes on macOS, KB elsewhere
+    except ImportError:
+        pass
+    try:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2 ** 20
+    except ImportError:
+        return None
+
+
+def payload_size(payload: Any) -> int:
+    """
+    Approximate bytes received for a client response: raw length for bytes/str,
+    in-memory size for frames, JSON length for dicts and lists.
+    """
+    if payload is None:
+        return 0
+    if isinstance(payload, (bytes, bytearray, str)):
+        return len(payload)
+    if isinstance(getattr(payload, "content", None), bytes):  # HTTP responses
+        return len(payload.content)
+    if hasattr(payload, "memory_usage"):
+        usage = payload.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    try:
+        return len(json.dumps(payload, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def row_count(payload: Any) -> Optional[int]:
+    try:
+        return len(payload)
+    except TypeError:
+        return None
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+    rows: int = 0
+
+    def add(self, other: "CallStats") -> None:
+        self.calls += other.calls
+        self.errors += other.errors
+        self.seconds += other.seconds
+        self.bytes += other.bytes
+        self.rows += other.rows
+
+
+@dataclass
+class StageStats:
+    name: str
+    seconds: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    peak_rss_mb: Optional[float] = None
+    error: Optional[str] = None
+    calls: Dict[str, CallStats] = field(default_factory=dict)
+
+
+class ProviderCall:
+    """Handle yielded by provider_call; report what came back with `received`."""
+
+    def __init__(self):
+        self.payload = None
+        self.rows: Optional[int] = None
+
+    def received(self, payload: Any, rows: Optional[int] = None) -> Any:
+        self.payload = payload
+        self.rows = rows
+        return payload
+
+
+class StageRecord:
+    """Handle yielded by stage; set the stage output with `output`."""
+
+    def __init__(self):
+        self.rows_out: Optional[int] = None
+
+    def output(self, result: Any) -> Any:
+        self.rows_out = row_count(result)
+        return result
+
+
+class RunReport:
+    """
+    Thread-safe collector for one run; `to_dict` is the JSON report layout.
+    """
+
+    def __init__(self, name: str, profile: Union[None, str, Iterable[str]] = None):
+        self.name = name
+        self.started = datetime.now(timezone.utc)
+        self.finished: Optional[datetime] = None
+        self.stages: Dict[str, StageStats] = {}
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.profile_paths: Dict[str, str] = {}
+        # "hottest" profiles every stage and keeps the slowest one's dump
+        self.profile = profile if profile in (None, "hottest") else set(profile)
+        self._lock = threading.Lock()
+
+    def _stage(self, name: Optional[str]) -> StageStats:
+        name = name or NO_STAGE
+        if name not in self.stages:
+            self.stages[name] = StageStats(name)
+        return self.stages[name]
+
+    def should_profile(self, name: str) -> bool:
+        return self.profile == "hottest" or (isinstance(self.profile, set) and name in self.profile)
+
+    def record_call(self, stage_name: Optional[str], provider: str, stats: CallStats) -> None:
+        with self._lock:
+            calls = self._stage(stage_name).calls
+            calls.setdefault(provider, CallStats()).add(stats)
+
+    def record_stage(self, name: str, seconds: float, rows_in, rows_out, error: Optional[str]) -> None:
+        with self._lock:
+            s = self._stage(name)
+            s.seconds += seconds
+            s.rows_in, s.rows_out, s.error = rows_in, rows_out, error
+            s.peak_rss_mb = peak_rss_mb()
+
+    def hottest_stage(self) -> Optional[str]:
+        timed = [s for s in self.stages.values() if s.name != NO_STAGE]
+        return max(timed, key=lambda s: s.seconds).name if timed else None
+
+    def provider_totals(self) -> Dict[str, CallStats]:
+        totals: Dict[str, CallStats] = {}
+        for s in self.stages.values():
+            for provider, stats in s.calls.items():
+                totals.setdefault(provider, CallStats()).add(stats)
+        return totals
+
+    def dump_profiles(self, directory: Path) -> None:
+        keep = self.profiles
+        if self.profile == "hottest":
+            hottest = max(keep, key=lambda n: self.stages[n].seconds, default=None)
+            keep = {hottest: keep[hottest]} if hottest else {}
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, profiler in keep.items():
+            path = directory / f"{self.name}.{name}.prof"
+            profiler.dump_stats(path)
+            self.profile_paths[name] = str(path)
+            logger.info(f"cProfile for {name} written to {path} (inspect with `python -m pstats {path}`)")
+
+    def to_dict(self) -> dict:
+        finished = self.finished or datetime.now(timezone.utc)
+        return {
+            "run":           self.name,
+            "started":       self.started.isoformat(timespec="seconds"),
+            "seconds":       round((finished - self.started).total_seconds(), 3),
+            "peak_rss_mb":   peak_rss_mb(),
+            "hottest_stage": self.hottest_stage(),
+            "stages": [
+                {**{k: v for k, v in asdict(s).items() if k != "calls"},
+                 "seconds": round(s.seconds, 3),
+                 "calls": {p: asdict(c) for p, c in sorted(s.calls.items())}}
+                for s in self.stages.values()
+            ],
+            "providers": {p: asdict(c) for p, c in sorted(self.provider_totals().items())},
+            "profiles": self.profile_paths,
+        }
+
+    def write(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, default=str))
+        return path
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<32}{'seconds':>9}{'rows out':>10}{'calls':>7}{'MB recv':>9}"]
+        for s in sorted(self.stages.values(), key=lambda s: -s.seconds):
+            calls = sum(c.calls for c in s.calls.values())
+            received = sum(c.bytes for c in s.calls.values()) / 2 ** 20
+            rows = "" if s.rows_out is None else s.rows_out
+            lines.append(f"{s.name:<32}{s.seconds:>9.2f}{rows:>10}{calls:>7}{received:>9.1f}")
+        return "\n".join(lines)
+
+
+def active_report() -> Optional[RunReport]:
+    return _active
+
+
+@contextmanager
+def run_report(
+    name: str = "pipeline",
+    output: Optional[Path] = None,
+    profile: Union[None, str, Iterable[str]] = None,
+    profile_dir: Optional[Path] = None,
+) -> Iterator[RunReport]:
+    """
+    Collect stage and provider measurements for the duration of the block and,
+    if `output` is given, write them there as JSON. `profile` is a set of stage
+    names to run under cProfile, or "hottest" to keep only the slowest stage's dump.
+    """
+    global _active
+    previous, _active = _active, RunReport(name, profile)
+    report = _active
+    try:
+        yield report
+    finally:
+        _active = previous
+        report.finished = datetime.now(timezone.utc)
+        if report.profiles:
+            report.dump_profiles(Path(profile_dir or (Path(output).parent if output else Path.cwd())))
+        if output is not None:
+            logger.info(f"run report written to {report.write(output)}")
+
+
+@contextmanager
+def stage(name: str, rows_in: Optional[int] = None) -> Iterator[StageRecord]:
+    """
+    Time a pipeline stage and attribute provider calls made inside it.
+    """
+    report = _active
+    record = StageRecord()
+    token = _current_stage.set(name)
+    profiler = None
+    if report is not None and report.should_profile(name):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:  # Python 3.12+ allows one active profiler per process
+            logger.warning(f"not profiling {name}: {e}")
+            profiler = None
+    error = None
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            report.profiles[name] = profiler
+        _current_stage.reset(token)
+        if report is not None:
+            report.record_stage(name, elapsed, rows_in, record.rows_out, error)
+
+
+@contextmanager
+def provider_call(provider: str) -> Iterator[ProviderCall]:
+    """
+    Wrap one outbound call, e.g. `with provider_call("yfinance.download") as call:
+    raw = call.received(yf.download(...))`. Time, errors, payload bytes and rows
+    are recorded against the current stage.
+    """
+    report = _active
+    call = ProviderCall()
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield call
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        if report is not None:
+            rows = call.rows if call.rows is not None else row_count(call.payload) if call.payload is not None else 0
+            report.record_call(_current_stage.get(), provider, CallStats(
+                calls=1, errors=int(failed), seconds=time.perf_counter() - start,
+                bytes=payload_size(call.payload), rows=rows or 0,
+            ))
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    `fn` bound to a copy of the caller's context, so calls it makes from a pool
+    worker are attributed to the caller's stage.
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
@@ -0,0 +1,19 @@
+"""
+Shared, persistent cache for Yahoo Finance metadata.
+
+Every module that needs `Ticker.info` or yahooquery modules goes through
+`get_ticker_info(s)` / `get_quote_modules`, so one pipeline run (or several
+runs on the same day, in any process) fetches each symbol at most once.
+"""
+
+from .store import MetadataCache, default_cache_dir, get_cache
+from .yahoo import get_quote_modules, get_ticker_info, get_ticker_infos
+
+__all__ = [
+    "MetadataCache",
+    "default_cache_dir",
+    "get_cache",
+    "get_quote_modules",
+    "get_ticker_info",
+    "get_ticker_infos",
+]
@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ---- defaults ----
+DAY = 24 * 60 * 60
+DEFAULT_TTL = DAY  # anything not listed below is refetched at most once a day
+NEGATIVE_TTL = 60 * 60  # empty/failed responses are retried after an hour
+MAX_ENTRIES = 50_000
+MAX_BYTES = 256 * 1024 * 1024
+
+# Descriptive fields change rarely; quote fields fall back to DEFAULT_TTL.
+FIELD_TTLS = {
+    "longName": 30 * DAY,
+    "shortName": 30 * DAY,
+    "name": 30 * DAY,
+    "currency": 30 * DAY,
+    "quoteType": 30 * DAY,
+    "fundFamily": 30 * DAY,
+    "category": 30 * DAY,
+    "categoryName": 30 * DAY,
+    "description": 30 * DAY,
+    "longBusinessSummary": 30 * DAY,
+    "fundInceptionDate": 90 * DAY,
+    "fundProfile": 7 * DAY,
+}
+
+
+def default_cache_dir() -> Path:
+    """
+    Directory for all local pipeline caches: $TDF_CACHE_DIR or ~/.cache/assette_tdf.
+    """
+    root = os.getenv("TDF_CACHE_DIR") or Path.home() / ".cache" / "assette_tdf"
+    path = Path(root)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class MetadataCache:
+    """
+    On-disk key/value cache for provider metadata, shared across modules and processes.
+
+    Entries are JSON dicts stored in SQLite under a (namespace, key) pair. A read
+    is a hit only while every requested field is younger than its TTL, and once
+    the store exceeds `max_entries` or `max_bytes` the least recently read
+    entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        default_ttl: float = DEFAULT_TTL,
+        field_ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+    ):
+        self.path = Path(path) if path is not None else default_cache_dir() / "metadata.sqlite"
+        self.default_ttl = default_ttl
+        self.field_ttls = dict(FIELD_TTLS if field_ttls is None else field_ttls)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace   TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                payload     TEXT NOT NULL,
+                fetched_at  REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size        INTEGER NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_lru ON entries (last_access)")
+        self._conn.commit()
+
+    # ---- freshness ----
+    def ttl_for(self, field: Optional[str]) -> float:
+        if field is None:
+            return self.default_ttl
+        return self.field_ttls.get(field, self.default_ttl)
+
+    def _fresh_view(self, payload: dict, age: float, fields: Optional[List[str]]) -> Optional[dict]:
+        if not payload:
+            return {} if age <= NEGATIVE_TTL else None
+        check = fields if fields is not None else list(payload)
+        if any(age > self.ttl_for(f) for f in check):
+            return None
+        return {k: v for k, v in payload.items() if age <= self.ttl_for(k)}
+
+    # ---- reads ----
+    def get_many(
+        self, namespace: str, keys: Iterable[str], fields: Optional[List[str]] = None
+    ) -> Dict[str, dict]:
+        """
+        Return the fresh cached entries among `keys`; missing or stale keys are omitted.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, dict] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, payload, fetched_at FROM entries "
+                    f"WHERE namespace = ? AND key IN ({', '.join('?' * len(chunk))})",
+                    [namespace, *chunk],
+                ).fetchall()
+                for key, payload, fetched_at in rows:
+                    view = self._fresh_view(json.loads(payload), now - fetched_at, fields)
+                    if view is not None:
+                        found[key] = view
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                    [(now, namespace, k) for k in found],
+                )
+                self._conn.commit()
+        return found
+
+    def get(self, namespace: str, key: str, fields: Optional[List[str]] = None) -> Optional[dict]:
+        return self.get_many(namespace, [key], fields).get(key)
+
+    # ---- writes ----
+    def put_many(self, namespace: str, items: Dict[str, dict]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            payload = json.dumps(value or {}, default=str)
+            rows.append((namespace, key, payload, now, now, len(payload)))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries "
+                "(namespace, key, payload, fetched_at, last_access, size) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def put(self, namespace: str, key: str, value: dict) -> None:
+        self.put_many(namespace, {key: value})
+
+    def get_or_fetch(
+        self,
+        namespace: str,
+        keys: Iterable[str],
+        loader: Callable[[List[str]], Dict[str, dict]],
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, dict]:
+        """
+        Serve `keys` from the cache and call `loader` once with only the misses.
+
+        Keys the loader does not return are stored as empty entries so that a
+        failing symbol is not retried until NEGATIVE_TTL has passed.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = self.get_many(namespace, keys, fields)
+        missing = [k for k in keys if k not in found]
+        if missing:
+            logger.info(f"metadata cache [{namespace}]: {len(found)} hits, fetching {len(missing)}")
+            loaded = loader(missing) or {}
+            fetched = {k: loaded.get(k) or {} for k in missing}
+            self.put_many(namespace, fetched)
+            found.update(fetched)
+        return {k: found[k] for k in keys}
+
+    # ---- maintenance ----
+    def _evict_locked(self) -> None:
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        excess_rows = max(0, count - self.max_entries)
+        excess_bytes = max(0, total - self.max_bytes)
+        victims, freed = [], 0
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM entries ORDER BY last_access ASC"):
+            if len(victims) >= excess_rows and freed >= excess_bytes:
+                break
+            victims.append((rowid,))
+            freed += size
+        self._conn.executemany("DELETE FROM entries WHERE rowid = ?", victims)
+        logger.info(f"metadata cache: evicted {len(victims)} least recently used entries")
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM entries")
+            else:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+
+
+_default_cache: Optional[MetadataCache] = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> MetadataCache:
+    """
+    Process-wide MetadataCache backed by the default on-disk store.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = MetadataCache()
+    return _default_cache
@@ -0,0 +1,94 @@
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+from source_code.utils.providers import get_provider
+from source_code.utils.resilience import CircuitOpenError, backoff_delay
+from source_code.utils.transport import fetch_all
+
+from .store import get_cache
+
+logger = logging.getLogger(__name__)
+
+INFO_NAMESPACE = "yfinance.info"
+MODULES_NAMESPACE = "yahooquery.modules"
+BATCH_RETRIES = 2  # extra batched rounds for symbols missing from a response
+RETRY_BACKOFF = 1.0  # seconds, jittered and doubled each round
+
+
+def get_ticker_infos(
+    tickers: List[str],
+    fields: Optional[List[str]] = None,
+    throttle: Optional[Callable[[], object]] = None,
+) -> Dict[str, dict]:
+    """
+    yfinance `Ticker.info` for each ticker, fetched only when the cached copy
+    of `fields` (or the whole dict) has expired.
+
+    `throttle` is called before every network request, e.g. a rate limiter's acquire.
+    Missing tickers are fetched concurrently over the pooled transport.
+    """
+    def load(missing: List[str]) -> Dict[str, dict]:
+        provider = get_provider()
+
+        def fetch(t: str) -> dict:
+            if throttle is not None and provider.remote:
+                throttle()
+            return provider.ticker_info(t)
+
+        out = {}
+        for t, info in zip(missing, fetch_all(fetch, missing)):
+            if isinstance(info, Exception):
+                logger.warning(f"{t} info fetch failed: {info}")
+            else:
+                out[t] = info
+        return out
+
+    return get_cache().get_or_fetch(INFO_NAMESPACE, tickers, load, fields)
+
+
+def get_ticker_info(
+    ticker: str,
+    fields: Optional[List[str]] = None,
+    throttle: Optional[Callable[[], object]] = None,
+) -> dict:
+    return get_ticker_infos([ticker], fields, throttle)[ticker]
+
+
+def get_quote_modules(
+    symbols: List[str], modules: List[str], retries: int = BATCH_RETRIES
+) -> Dict[str, dict]:
+    """
+    yahooquery `get_modules(modules)` per symbol, with one batched request for
+    all symbols that are not already cached. Symbols missing from a response
+    are retried together, up to `retries` more rounds.
+
+    Returns a mapping of symbol -> {module: data}; symbols Yahoo could not
+    resolve map to an empty dict.
+    """
+    namespace = f"{MODULES_NAMESPACE}:{'+'.join(sorted(modules))}"
+
+    def load(missing: List[str]) -> Dict[str, dict]:
+        provider = get_provider()
+        found: Dict[str, dict] = {}
+        pending = list(missing)
+        for attempt in range(retries + 1):
+            try:
+                data = provider.quote_modules(pending, modules, asynchronous=True)
+            except CircuitOpenError as e:
+                logger.warning(f"batched quote request for {len(pending)} symbols skipped: {e}")
+                break
+            except Exception as e:
+                logger.warning(f"batched quote request for {len(pending)} symbols failed: {e}")
+                data = {}
+            if isinstance(data, dict):
+                # yahooquery returns an error string instead of a dict for unknown symbols
+                found.update({sym: val for sym, val in data.items() if isinstance(val, dict) and val})
+            pending = [sym for sym in pending if sym not in found]
+            if not pending or attempt == retries or not provider.remote:
+                break
+            logger.info(f"retrying {len(pending)} symbols missing from batched response")
+            time.sleep(backoff_delay(attempt, RETRY_BACKOFF))
+        return found
+
+    return get_cache().get_or_fetch(namespace, symbols, load, fields=modules)
@@ -0,0 +1,359 @@
+"""
+Market-data provider layer.
+
+Every outbound data call (Yahoo prices, quote metadata and fund holdings, plus
+plain HTTP GETs such as REST Countries) goes through the process-wide
+provider from `get_provider()`. Three adapters implement it:
+
+- LiveProvider calls yfinance / yahooquery / requests over the pooled
+  sessions in `transport`, each call guarded by `resilience` (backoff,
+  per-host circuit breaker, adaptive concurrency).
+- RecordingProvider calls another provider and stores every response as a
+  gzip-compressed pickle under the recordings directory.
+- ReplayProvider serves those recordings back without touching the network.
+
+The adapter is chosen with $TDF_PROVIDER (live | record | replay, default
+live); recordings live in $TDF_RECORDINGS or <cache dir>/recordings.
+Recordings are pickles: only replay files you recorded yourself.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from source_code.utils import transport
+from source_code.utils.instrumentation import provider_call
+from source_code.utils.resilience import CircuitOpenError, ProviderError, guarded
+
+logger = logging.getLogger(__name__)
+
+MODES = ("live", "record", "replay")
+HTTP_TIMEOUT = 10  # seconds
+YAHOO_HOST = "finance.yahoo.com"  # yfinance and yahooquery share Yahoo's limits
+# Methods taking a symbol list and returning symbol -> data; recorded per symbol
+# so a replay can serve any subset (the cache decides which symbols are asked for)
+BATCHED = ("quote_modules", "fund_holding_info")
+UNKEYED = ("timeout",)  # keyword arguments that shape the transport, not the response; not part of recording keys
+
+
+class ReplayMissError(ProviderError, LookupError):
+    """No recording matches the requested call."""
+
+
+@dataclass
+class HttpResponse:
+    """The parts of an HTTP response callers use; picklable for recordings."""
+    url: str
+    status_code: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def header(self, name: str) -> Optional[str]:
+        """Case-insensitive header lookup."""
+        return next((v for k, v in self.headers.items() if k.lower() == name.lower()), None)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise ProviderError(f"HTTP {self.status_code} for {self.url}", status_code=self.status_code)
+
+
+class MarketDataProvider:
+    """
+    Interface of every provider. Adapters either override the methods with
+    real calls (LiveProvider) or handle them all generically in `_invoke`.
+    """
+
+    name = "base"
+    remote = False  # True when calls cost network round-trips (callers throttle/back off only then)
+
+    def download(self, tickers, **kwargs):
+        """yf.download(tickers, **kwargs) -> DataFrame."""
+        return self._invoke("download", (tickers,), kwargs)
+
+    def ticker_info(self, symbol: str) -> dict:
+        """yf.Ticker(symbol).info."""
+        return self._invoke("ticker_info", (symbol,), {})
+
+    def history(self, symbol: str, **kwargs):
+        """yf.Ticker(symbol).history(**kwargs) -> DataFrame."""
+        return self._invoke("history", (symbol,), kwargs)
+
+    def etf_holdings(self, symbol: str):
+        """Holdings table of an ETF from yfinance, or None if Yahoo exposes none."""
+        return self._invoke("etf_holdings", (symbol,), {})
+
+    def quote_modules(self, symbols: List[str], modules, asynchronous: bool = False) -> dict:
+        """yahooquery Ticker(symbols).get_modules(modules): symbol -> {module: data} (or an error string)."""
+        return self._invoke("quote_modules", (list(symbols), modules), {"asynchronous": asynchronous})
+
+    def fund_holding_info(self, symbols: List[str]) -> dict:
+        """yahooquery Ticker(symbols).fund_holding_info: symbol -> {"holdings": [...], ...}."""
+        return self._invoke("fund_holding_info", (list(symbols),), {})
+
+    def http_get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = HTTP_TIMEOUT) -> HttpResponse:
+        return self._invoke("http_get", (url,), {"headers": dict(headers or {}), "timeout": timeout})
+
+    def _invoke(self, method: str, args: tuple, kwargs: dict) -> Any:
+        raise NotImplementedError(f"{type(self).__name__} does not implement {method}")
+
+
+class LiveProvider(MarketDataProvider):
+    """Calls the real data sources; client libraries are imported on first use."""
+
+    name = "live"
+    remote = True
+
+    @staticmethod
+    def _call(name: str, host: str, fn: Callable[[], Any], rows: Optional[int] = None) -> Any:
+        # every attempt is instrumented, so retries show up as errored calls in the run report
+        def attempt():
+            with provider_call(name) as call:
+                return call.received(fn(), rows=rows)
+        return guarded(host, attempt)
+
+    @staticmethod
+    def _mapping(name: str, payload: Any) -> dict:
+        # yahooquery reports a failed batch as a message string instead of raising;
+        # only throttling is worth a retry ("Quote not found" will not change)
+        if not isinstance(payload, dict):
+            throttled = "too many requests" in str(payload).lower()
+            raise ProviderError(f"{name}: {payload}", status_code=429 if throttled else None)
+        return payload
+
+    @staticmethod
+    def _yahoo_session(asynchronous: bool):
+        # yahooquery only runs asynchronously on a FuturesSession; a plain Session breaks that mode
+        return transport.get_futures_session("yahoo") if asynchronous else transport.get_session("yahoo")
+
+    def download(self, tickers, **kwargs):
+        import yfinance as yf
+
+        return self._call("yfinance.download", YAHOO_HOST, lambda: yf.download(tickers, **kwargs))
+
+    def ticker_info(self, symbol: str) -> dict:
+        import yfinance as yf
+
+        return self._call("yfinance.info", YAHOO_HOST, lambda: yf.Ticker(symbol).info or {}, rows=1)
+
+    def history(self, symbol: str, **kwargs):
+        import yfinance as yf
+
+        return self._call("yfinance.history", YAHOO_HOST, lambda: yf.Ticker(symbol).history(**kwargs))
+
+    def etf_holdings(self, symbol: str):
+        import pandas as pd
+        import yfinance as yf
+
+        tkr = yf.Ticker(symbol)
+        # the holdings accessor has moved between yfinance versions
+        for attr in ("holdings", "fund_holdings", "get_holdings"):
+            if not hasattr(tkr, attr):
+                continue
+
+            def read(attr=attr):
+                candidate = getattr(tkr, attr)
+                return candidate() if callable(candidate) else candidate
+
+            try:
+                df = self._call("yfinance.holdings", YAHOO_HOST, read)
+            except CircuitOpenError:
+                raise
+            except Exception as e:  # an accessor this yfinance version cannot serve
+                logger.debug(f"{symbol} {attr} unavailable: {e}")
+                continue
+            if isinstance(df, pd.DataFrame) and not df.empty:
+                return df
+        return None
+
+    def quote_modules(self, symbols: List[str], modules, asynchronous: bool = False) -> dict:
+        from yahooquery import Ticker
+
+        def fetch():
+            tk = Ticker(list(symbols), asynchronous=asynchronous, session=self._yahoo_session(asynchronous))
+            return self._mapping("get_modules", tk.get_modules(modules))
+        return self._call("yahooquery.get_modules", YAHOO_HOST, fetch)
+
+    def fund_holding_info(self, symbols: List[str]) -> dict:
+        from yahooquery import Ticker
+
+        symbols = list(symbols)
+
+        def fetch():
+            asynchronous = len(symbols) > 1
+            tk = Ticker(symbols, asynchronous=asynchronous, session=self._yahoo_session(asynchronous))
+            # the property issues a request on every access, so read it once
+            return self._mapping("fund_holding_info", tk.fund_holding_info)
+        return self._call("yahooquery.fund_holding_info", YAHOO_HOST, fetch)
+
+    def http_get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = HTTP_TIMEOUT) -> HttpResponse:
+        import requests
+
+        host = url.split("/")[2] if "//" in url else url
+
+        def fetch() -> HttpResponse:
+            try:
+                resp = transport.get_session().get(url, headers=headers or {}, timeout=timeout)
+            except requests.RequestException as e:
+                # network failures and timeouts are worth a retry; a malformed URL is not
+                transient = isinstance(e, (requests.ConnectionError, requests.Timeout))
+                raise ProviderError(f"GET {url} failed: {e}", transient=transient) from e
+            if resp.status_code == 429 or resp.status_code >= 500:
+                retry_after = resp.headers.get("Retry-After", "")
+                raise ProviderError(f"HTTP {resp.status_code} for {url}", status_code=resp.status_code,
+                                    retry_after=float(retry_after) if retry_after.isdigit() else None)
+            return HttpResponse(url, resp.status_code, dict(resp.headers), resp.content)
+        return self._call(f"http:{host}", host, fetch, rows=0)
+
+
+class RecordingStore:
+    """
+    Gzip-pickled responses keyed by call. Files are named
+    <method>/<subject hash>-<call hash>.pkl.gz, where the subject is the
+    positional arguments (symbols, modules or URL), so a call whose keyword
+    arguments changed (dates, headers) can still fall back to the latest
+    recording for the same subject. Timeouts are left out of the call hash.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        text = json.dumps(value, sort_keys=True, default=str)
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+    def path(self, method: str, args: tuple, kwargs: dict) -> Path:
+        subject = self._digest(args)
+        call = self._digest([args, {k: v for k, v in kwargs.items() if k not in UNKEYED}])
+        return self.directory / method / f"{subject}-{call}.pkl.gz"
+
+    def save(self, method: str, args: tuple, kwargs: dict, result: Any) -> Path:
+        path = self.path(method, args, kwargs)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return path
+
+    def load(self, method: str, args: tuple, kwargs: dict, exact: bool = False) -> Tuple[Any, Path]:
+        path = self.path(method, args, kwargs)
+        if not path.exists() and not exact:
+            subject = path.name.split("-")[0]
+            candidates = sorted(path.parent.glob(f"{subject}-*.pkl.gz"), key=lambda p: p.stat().st_mtime)
+            if candidates:
+                logger.debug(f"no exact recording for {method}{args[:1]}, replaying {candidates[-1].name}")
+                path = candidates[-1]
+        if not path.exists():
+            raise ReplayMissError(f"no recording for {method}{args[:1]} under {self.directory}")
+        with gzip.open(path, "rb") as f:
+            return pickle.load(f), path
+
+
+class RecordingProvider(MarketDataProvider):
+    """Delegates to `inner` (live by default) and records every successful response."""
+
+    name = "record"
+    remote = True
+
+    def __init__(self, directory: Path, inner: Optional[MarketDataProvider] = None):
+        self.store = RecordingStore(directory)
+        self.inner = inner or LiveProvider()
+
+    def _invoke(self, method: str, args: tuple, kwargs: dict) -> Any:
+        result = getattr(self.inner, method)(*args, **kwargs)
+        if method in BATCHED and isinstance(result, dict):
+            for symbol in args[0]:
+                self.store.save(method, ([symbol],) + args[1:], kwargs, result.get(symbol))
+        else:
+            self.store.save(method, args, kwargs, result)
+        return result
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves recorded responses. With `exact=False` (default) a call whose
+    arguments changed (e.g. a date range ending today) replays the latest
+    recording for the same symbols or URL.
+    """
+
+    name = "replay"
+    remote = False
+
+    def __init__(self, directory: Path, exact: bool = False):
+        self.store = RecordingStore(directory)
+        self.exact = exact
+
+    def _invoke(self, method: str, args: tuple, kwargs: dict) -> Any:
+        with provider_call(f"replay.{method}") as call:
+            if method in BATCHED:
+                return call.received(self._load_batched(method, args, kwargs))
+            result, _ = self.store.load(method, args, kwargs, self.exact)
+            return call.received(result)
+
+    def _load_batched(self, method: str, args: tuple, kwargs: dict) -> dict:
+        # Like Yahoo, leave out symbols that have no data; fail only when none were recorded
+        out, missing = {}, 0
+        for symbol in args[0]:
+            try:
+                value, _ = self.store.load(method, ([symbol],) + args[1:], kwargs, self.exact)
+            except ReplayMissError:
+                missing += 1
+                continue
+            if value is not None:
+                out[symbol] = value
+        if args[0] and missing == len(args[0]):
+            raise ReplayMissError(f"no recording for {method} of {len(args[0])} symbols under {self.store.directory}")
+        if missing:
+            logger.warning(f"replay {method}: {missing} of {len(args[0])} symbols not recorded")
+        return out
+
+
+def recordings_dir() -> Path:
+    from source_code.utils.metadata_cache import default_cache_dir  # the cache package imports this module
+
+    return Path(os.getenv("TDF_RECORDINGS") or default_cache_dir() / "recordings")
+
+
+def make_provider(mode: Optional[str] = None, directory: Optional[Path] = None) -> MarketDataProvider:
+    mode = (mode or os.getenv("TDF_PROVIDER") or "live").lower()
+    if mode not in MODES:
+        raise ValueError(f"unknown provider mode {mode!r}; expected one of {MODES}")
+    if mode == "live":
+        return LiveProvider()
+    directory = Path(directory) if directory is not None else recordings_dir()
+    logger.info(f"{mode} provider using {directory}")
+    return RecordingProvider(directory) if mode == "record" else ReplayProvider(directory)
+
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> MarketDataProvider:
+    """
+    Process-wide provider, created from $TDF_PROVIDER on first use.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = make_provider()
+        return _provider
+
+
+def set_provider(provider: MarketDataProvider) -> MarketDataProvider:
+    """Install `provider` for the rest of the process (returns the previous one)."""
+    global _provider
+    with _provider_lock:
+        previous, _provider = _provider, provider
+    return previous
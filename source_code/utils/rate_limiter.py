@@ -0,0 +1,72 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; every
+    outbound request takes one token and blocks until one is available, so
+    sustained throughput tracks `rate` while short bursts up to `capacity`
+    go out immediately.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.configure(rate, capacity)
+
+    def configure(self, rate: float, capacity: Optional[float] = None) -> None:
+        """
+        Change the refill rate (tokens/second) and burst capacity in place.
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        capacity = float(capacity if capacity is not None else max(1.0, rate))
+        with self._lock:
+            self.rate = float(rate)
+            self.capacity = capacity
+            self._tokens = capacity
+            self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take `tokens` if they are available right now; never blocks.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until `tokens` are available and take them. Raises ValueError
+        if `tokens` exceeds the capacity, which the bucket can never hold.
+
+        Returns
+        -------
+        float
+            Seconds spent waiting.
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"cannot acquire {tokens} tokens from a bucket of capacity {self.capacity}")
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
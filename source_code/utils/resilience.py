@@ -0,0 +1,244 @@
+"""
+Resilience for outbound provider calls.
+
+`guarded(host, fn)` runs one call with three protections, tracked per host:
+
+- retries with jittered exponential backoff ("full jitter") for transient
+  failures: network errors, timeouts, HTTP 429 and 5xx;
+- a circuit breaker that fails calls fast for a cooldown once a host keeps
+  failing, then lets a single probe through to test recovery;
+- AIMD concurrency: the number of calls in flight to the host grows by one
+  per window of healthy responses and halves on a 429 or a response slower
+  than the latency target, so bulk runs settle at the highest rate the host
+  accepts without hand-tuned sleeps.
+
+Permanent failures (4xx other than 429, parsing errors, error payloads such
+as "Quote not found") are raised at once and do not count against the breaker.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRY_ATTEMPTS = int(os.getenv("TDF_RETRY_ATTEMPTS", "4"))  # total tries per call
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 30.0  # seconds
+BREAKER_THRESHOLD = 5  # consecutive transient failures that open a host's breaker
+BREAKER_COOLDOWN = 60.0  # seconds a breaker stays open before a probe
+CONCURRENCY_START = 4
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = int(os.getenv("TDF_MAX_HOST_CONCURRENCY", "16"))
+LATENCY_TARGET = 10.0  # seconds; slower responses count as congestion
+
+_TRANSIENT_NAMES = ("Timeout", "ConnectionError", "RateLimit")
+_jitter = random.Random()  # own stream: retries neither consume nor depend on seeded data generators
+
+
+class ProviderError(RuntimeError):
+    """
+    An outbound call failed (network error, HTTP error status, error payload
+    or replay miss). `transient` marks network errors and timeouts that carry
+    no status code but are worth retrying.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        transient: bool = False,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.transient = transient
+
+
+class CircuitOpenError(ProviderError):
+    """The host's circuit breaker is open; the call was not attempted."""
+
+
+def is_throttled(exc: BaseException) -> bool:
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    # yfinance raises YFRateLimitError; other clients only say it in the message
+    return "RateLimit" in type(exc).__name__ or "too many requests" in str(exc).lower()
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Worth retrying: throttling, 5xx, timeouts and connection failures."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if is_throttled(exc):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status >= 500
+    if isinstance(exc, ProviderError):
+        return exc.transient
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    # client libraries define their own exception trees (requests, curl_cffi)
+    return any(
+        name in cls.__name__ for cls in type(exc).__mro__ for name in _TRANSIENT_NAMES
+    )
+
+
+def backoff_delay(
+    attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP, rng: Optional[random.Random] = None
+) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return (rng or _jitter).uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `threshold` consecutive failures; open -> half-open
+    after `cooldown` seconds, when one probe call is let through; the probe's
+    outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, host: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half-open"
+                logger.info(f"{self.host}: circuit half-open, probing")
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"{self.host}: circuit closed")
+            self.state, self.failures = "closed", 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or (self.state == "closed" and self.failures >= self.threshold):
+                self.state, self.opened_at = "open", time.monotonic()
+                logger.warning(f"{self.host}: circuit open for {self.cooldown:.0f}s after {self.failures} failures")
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on calls in flight: +1 per `limit` healthy responses (about one
+    per round trip of the whole window), halved on congestion at most once
+    per window so one burst of 429s does not collapse it to the minimum.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        start: int = CONCURRENCY_START,
+        minimum: int = CONCURRENCY_MIN,
+        maximum: int = CONCURRENCY_MAX,
+        latency_target: float = LATENCY_TARGET,
+    ):
+        self.host = host
+        self.minimum, self.maximum = minimum, maximum
+        self.limit = float(max(minimum, min(start, maximum)))
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, congested: bool) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested or latency > self.latency_target:
+                if now - self._last_decrease >= self.latency_target:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    logger.info(f"{self.host}: congestion, concurrency -> {int(self.limit)}")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class HostGuard:
+    def __init__(self, host: str):
+        self.host = host
+        self.breaker = CircuitBreaker(host)
+        self.concurrency = AdaptiveConcurrency(host)
+
+
+_guards: Dict[str, HostGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def guard_for(host: str) -> HostGuard:
+    with _guards_lock:
+        if host not in _guards:
+            _guards[host] = HostGuard(host)
+        return _guards[host]
+
+
+def reset_guards() -> None:
+    with _guards_lock:
+        _guards.clear()
+
+
+def guarded(host: str, fn: Callable[[], T], attempts: int = RETRY_ATTEMPTS) -> T:
+    """
+    Call `fn()` against `host` with backoff, circuit breaking and adaptive
+    concurrency. Raises CircuitOpenError when the host's breaker is open, or
+    the last error once retries are exhausted.
+    """
+    guard = guard_for(host)
+    attempts = max(1, attempts)
+    for attempt in range(attempts):
+        if not guard.breaker.allow():
+            raise CircuitOpenError(
+                f"{host}: circuit open after repeated failures, retry in {guard.breaker.retry_in():.0f}s"
+            )
+        guard.concurrency.acquire()
+        start = time.monotonic()
+        throttled = False
+        try:
+            result = fn()
+        except Exception as e:
+            throttled = is_throttled(e)
+            if not is_transient(e):
+                guard.breaker.record_success()  # the host answered; the request itself was bad
+                raise
+            guard.breaker.record_failure()
+            if attempt == attempts - 1:
+                logger.warning(f"{host}: giving up after {attempts} attempts: {e}")
+                raise
+            delay = max(getattr(e, "retry_after", None) or 0.0, backoff_delay(attempt + throttled))
+            logger.info(f"{host}: {type(e).__name__}: {e}; retry {attempt + 1}/{attempts - 1} in {delay:.1f}s")
+        else:
+            guard.breaker.record_success()
+            return result
+        finally:
+            guard.concurrency.release(time.monotonic() - start, throttled)
+        time.sleep(delay)
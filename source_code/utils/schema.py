@@ -0,0 +1,194 @@
+"""
+Column dtype policy shared by every table builder.
+
+Builders finish with `apply_schema(df, "TABLE")`, so a table has the same
+compact dtypes however it was produced:
+
+- codes and labels repeated across rows (portfolio / benchmark codes,
+  currencies, performance types, frequencies) are categoricals: one small
+  integer per row instead of a Python string object;
+- dates are datetime64 (8 bytes, vectorised comparisons) rather than
+  `datetime.date` objects;
+- flags and ranks are pandas' nullable boolean / integer types, so a missing
+  value does not turn the column into objects or floats;
+- numeric measures stay float64. Every table is written back (CSV, Parquet,
+  warehouse), and float32 keeps only ~7 significant digits: a quantity of
+  1234567.891 would load as 1234567.875, MARKETVALUE would no longer equal
+  QUANTITY x PRICE, and compounded daily factors would drift by basis points.
+
+Columns a table's policy does not name are left as they are.
+
+    python -m source_code.utils.schema source_code/Portfolio_Performance/portfolio_performance.csv PORTFOLIOPERFORMANCE
+"""
+
+import argparse
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+CATEGORY = "category"
+DATE = "datetime64"  # unit left to pandas: dates parse to second resolution
+FLOAT64 = "float64"
+INT = "Int32"
+BOOL = "boolean"
+
+TABLE_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "CURRENCY": {
+        "currency_code": CATEGORY, "currency_name": CATEGORY, "region": CATEGORY, "subregion": CATEGORY,
+    },
+    "PRODUCTMASTER": {
+        "STRATEGY": CATEGORY, "VEHICLECATEGORY": CATEGORY, "VEHICLETYPE": CATEGORY, "ASSETCLASS": CATEGORY,
+        "ISMARKETED": BOOL,
+    },
+    "BENCHMARKGENERALINFORMATION": {
+        "ISBEGINOFDAYPERFORMANCE": BOOL,
+    },
+    "BENCHMARKPERFORMANCE": {
+        "BENCHMARKCODE": CATEGORY, "PERFORMANCEDATATYPE": CATEGORY, "CURRENCYCODE": CATEGORY,
+        "CURRENCY": CATEGORY, "PERFORMANCEFREQUENCY": CATEGORY, "VALUE": FLOAT64,
+        "HISTORYDATE1": DATE, "HISTORYDATE": DATE,
+    },
+    "BENCHMARKCHARACTERISTICS": {
+        "BENCHMARKCODE": CATEGORY, "CURRENCYCODE": CATEGORY, "CURRENCY": CATEGORY, "LANGUAGECODE": CATEGORY,
+        "CATEGORY": CATEGORY, "CATEGORYNAME": CATEGORY, "CHARACTERISTICNAME": CATEGORY,
+        "CHARACTERISTICDISPLAYNAME": CATEGORY, "STATISTICTYPE": CATEGORY, "CHARACTERISTICVALUE": FLOAT64,
+        "HISTORYDATE": DATE,
+    },
+    "PORTFOLIOGENERALINFORMATION": {
+        "BASECURRENCYCODE": CATEGORY, "BASECURRENCYNAME": CATEGORY, "INVESTMENTSTYLE": CATEGORY,
+        "ISBEGINOFDAYPERFORMANCE": BOOL, "OPENDATE": DATE, "PERFORMANCEINCEPTIONDATE": DATE,
+        "PORTFOLIOCATEGORY": CATEGORY, "PRODUCTCODE": CATEGORY, "TERMINATIONDATE": DATE,
+    },
+    "HOLDINGDETAILS": {
+        "PORTFOLIOCODE": CATEGORY, "TICKER": CATEGORY, "ISSUEDISPLAYNAME": CATEGORY, "CURRENCYCODE": CATEGORY,
+        "ISSUETYPE": CATEGORY, "PRICE": FLOAT64, "ASSETCLASSNAME": CATEGORY, "QUANTITY": FLOAT64,
+        "COSTBASIS": FLOAT64, "MARKETVALUE": FLOAT64, "HISTORYDATE": DATE,
+    },
+    "performance_factors": {
+        "FUND TICKER": CATEGORY, "PERFORMANCEINCEPTIONDATE": DATE, "HISTORYDATE": DATE,
+        "PERFORMANCETYPE": CATEGORY, "PERFORMANCEFACTOR": FLOAT64,
+    },
+    "PORTFOLIOPERFORMANCE": {
+        "PORTFOLIOCODE": CATEGORY, "HISTORYDATE": DATE, "CURRENCYCODE": CATEGORY, "CURRENCY": CATEGORY,
+        "PERFORMANCECATEGORY": CATEGORY, "PERFORMANCECATEGORYNAME": CATEGORY, "PERFORMANCETYPE": CATEGORY,
+        "PERFORMANCEINCEPTIONDATE": DATE, "PORTFOLIOINCEPTIONDATE": DATE, "PERFORMANCEFREQUENCY": CATEGORY,
+        "PERFORMANCEFACTOR": FLOAT64,
+    },
+    "PORTFOLIOBENCHMARKASSOCIATION": {
+        "PORTFOLIOCODE": CATEGORY, "BENCHMARKCODE": CATEGORY, "RANK": INT,
+    },
+}
+
+_TRUE = {"true", "t", "yes", "y", "1"}
+_FALSE = {"false", "f", "no", "n", "0"}
+
+
+def _to_bool(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(s) or pd.api.types.is_numeric_dtype(s):
+        return s.astype(BOOL)
+    # CSV round trips and the generators write "TRUE"/"FALSE", "Y"/"N" or real bools
+    text = s.astype(str).str.strip().str.lower()
+    out = pd.Series(pd.NA, index=s.index, dtype=BOOL)
+    out[text.isin(_TRUE)] = True
+    out[text.isin(_FALSE)] = False
+    return out
+
+
+def convert_column(s: pd.Series, dtype: str) -> pd.Series:
+    """`s` as `dtype`; a no-op when it already has it."""
+    if dtype == CATEGORY:
+        return s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype(CATEGORY)
+    if dtype == DATE:
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return s if s.dt.tz is None else s.dt.tz_localize(None)
+        return pd.to_datetime(s, errors="coerce")
+    if dtype == BOOL:
+        return s if s.dtype == BOOL else _to_bool(s)
+    if dtype == INT:
+        return s if s.dtype == INT else pd.to_numeric(s, errors="coerce").astype(INT)
+    if s.dtype == dtype:
+        return s
+    return pd.to_numeric(s, errors="coerce").astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Cast the columns of `df` named in `table`'s policy to their compact dtypes.
+    Idempotent; returns a new frame and leaves `df` untouched.
+    """
+    policy = TABLE_SCHEMAS.get(table)
+    if not policy:
+        return df
+    converted = {
+        col: convert_column(df[col], dtype)
+        for col, dtype in policy.items()
+        if col in df.columns
+    }
+    return df.assign(**converted) if converted else df
+
+
+def concat_tables(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    pd.concat that keeps categoricals: plain concat falls back to strings when
+    the frames' categories differ, so each categorical column is first recoded
+    to the sorted union of its categories (cheap: only the codes change).
+    """
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    first = frames[0]
+    dtypes = {
+        col: pd.CategoricalDtype(sorted(set().union(*(f[col].cat.categories for f in frames))))
+        for col in first.columns
+        if isinstance(first[col].dtype, pd.CategoricalDtype)
+        and all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames)
+    }
+    if dtypes:
+        frames = [f.astype(dtypes) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """Deep memory footprint (string payloads included) in MB."""
+    return df.memory_usage(deep=True, index=False).sum() / 2 ** 20
+
+
+def memory_report(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """
+    Per-column dtype and deep memory of `df` before and after `apply_schema`,
+    with a TOTAL row.
+    """
+    after = apply_schema(df, table)
+    before_bytes = df.memory_usage(deep=True, index=False)
+    after_bytes = after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "COLUMN": list(df.columns),
+        "DTYPE_BEFORE": [str(df[c].dtype) for c in df.columns],
+        "DTYPE_AFTER": [str(after[c].dtype) for c in df.columns],
+        "MB_BEFORE": (before_bytes / 2 ** 20).to_numpy(),
+        "MB_AFTER": (after_bytes / 2 ** 20).to_numpy(),
+    })
+    total = pd.DataFrame([{
+        "COLUMN": "TOTAL", "DTYPE_BEFORE": "", "DTYPE_AFTER": "",
+        "MB_BEFORE": report["MB_BEFORE"].sum(), "MB_AFTER": report["MB_AFTER"].sum(),
+    }])
+    return pd.concat([report, total], ignore_index=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Memory of a table export before and after the dtype policy.")
+    parser.add_argument("csv")
+    parser.add_argument("table", choices=sorted(TABLE_SCHEMAS))
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.csv)
+    df = df.loc[:, ~df.columns.astype(str).str.startswith("Unnamed:")]
+    report = memory_report(df, args.table)
+    with pd.option_context("display.max_rows", None, "display.width", 120):
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    before, after = report["MB_BEFORE"].iloc[-1], report["MB_AFTER"].iloc[-1]
+    print(f"{args.table}: {before:.2f} MB -> {after:.2f} MB ({before / max(after, 1e-9):.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
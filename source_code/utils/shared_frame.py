@@ -0,0 +1,102 @@
+"""
+Share a DataFrame with worker processes through shared memory.
+
+`share_frame(df)` copies each column's values into a named
+multiprocessing.shared_memory block once and yields a small picklable spec;
+a worker's initializer calls `attach_frame(spec)` to rebuild the frame as
+views over those blocks, so no task pickles its own copy of the data.
+
+Numeric, boolean and naive datetime64 columns are shared as-is;
+categoricals share their codes (the categories travel in the spec). Any
+other column is copied into the spec, so keep those small.
+"""
+
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ColumnSpec:
+    name: str
+    kind: str  # "array" | "category" | "inline"
+    dtype: str = ""
+    length: int = 0
+    block: Optional[str] = None  # shared-memory block name
+    categories: Any = None
+    values: Any = None  # "inline" columns only
+
+
+@dataclass
+class FrameSpec:
+    columns: List[ColumnSpec] = field(default_factory=list)
+    rows: int = 0
+
+
+def _shareable(s: pd.Series) -> Optional[np.ndarray]:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy()
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufM":
+        return s.to_numpy()
+    return None
+
+
+@contextmanager
+def share_frame(df: pd.DataFrame) -> Iterator[FrameSpec]:
+    """
+    Copy `df`'s columns into shared memory for the duration of the block and
+    yield the spec workers attach with. The blocks are unlinked on exit.
+    """
+    blocks: List[shared_memory.SharedMemory] = []
+    spec = FrameSpec(rows=len(df))
+    try:
+        for name in df.columns:
+            s = df[name]
+            values = _shareable(s)
+            if values is None:
+                spec.columns.append(ColumnSpec(name, "inline", values=s))
+                continue
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(values.shape, values.dtype, buffer=block.buf)[:] = values
+            kind = "category" if isinstance(s.dtype, pd.CategoricalDtype) else "array"
+            spec.columns.append(ColumnSpec(
+                name, kind, values.dtype.str, len(values), block.name,
+                categories=s.cat.categories if kind == "category" else None,
+            ))
+        logger.debug(f"shared {len(blocks)} columns, {sum(b.size for b in blocks) / 2 ** 20:.1f} MB")
+        yield spec
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def attach_frame(spec: FrameSpec) -> Tuple[pd.DataFrame, List[shared_memory.SharedMemory]]:
+    """
+    Rebuild the shared frame as read-only views. Keep the returned handles
+    alive as long as the frame is used; the creating process owns cleanup.
+    """
+    handles, data = [], {}
+    for col in spec.columns:
+        if col.kind == "inline":
+            data[col.name] = col.values
+            continue
+        # workers share the creator's resource tracker, which unlinks the block if the creator dies
+        block = shared_memory.SharedMemory(name=col.block)
+        handles.append(block)
+        values = np.ndarray((col.length,), np.dtype(col.dtype), buffer=block.buf)
+        values.flags.writeable = False
+        if col.kind == "category":
+            data[col.name] = pd.Categorical.from_codes(values, categories=col.categories)
+        else:
+            data[col.name] = values
+    return pd.DataFrame(data, copy=False), handles
+
@@ -0,0 +1,125 @@
+"""
+Shared HTTP transport: pooled keep-alive sessions and a bounded-concurrency
+fetch path.
+
+`get_session(name)` returns one process-wide requests.Session per name, so
+every call to the same host reuses pooled TCP/TLS connections instead of
+handshaking again; `get_futures_session(name)` wraps the same session for
+clients that need a requests_futures FuturesSession (yahooquery's
+asynchronous mode). `fetch_all(fn, items)` overlaps independent blocking calls
+on an asyncio loop, at most `limit` in flight at a time.
+
+yfinance is not routed through these sessions: since 0.2.54 it keeps its own
+process-wide curl_cffi session and rejects requests sessions.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from source_code.utils.instrumentation import bind
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("TDF_HTTP_POOL", "16"))  # keep-alive connections kept per host
+MAX_CONCURRENCY = int(os.getenv("TDF_HTTP_CONCURRENCY", "8"))  # requests in flight per fetch_all
+YAHOO_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+)
+
+_sessions: Dict[str, Any] = {}
+_sessions_lock = threading.Lock()
+
+
+def _new_session(name: str):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if name == "yahoo":
+        session.headers["User-Agent"] = YAHOO_USER_AGENT
+    return session
+
+
+def get_session(name: str = "default"):
+    """
+    Shared requests.Session for `name` ("yahoo" carries Yahoo's cookies and
+    browser headers; "default" is for everything else), created on first use.
+    """
+    with _sessions_lock:
+        if name not in _sessions:
+            _sessions[name] = _new_session(name)
+            logger.debug(f"opened pooled HTTP session {name!r} ({POOL_SIZE} connections per host)")
+        return _sessions[name]
+
+
+def get_futures_session(name: str = "default"):
+    """
+    requests_futures FuturesSession over `get_session(name)`, so its requests
+    share the pooled adapter, headers and cookies; created on first use.
+    """
+    from requests_futures.sessions import FuturesSession
+
+    session = get_session(name)
+    key = f"{name}:futures"
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = FuturesSession(max_workers=MAX_CONCURRENCY, session=session)
+        return _sessions[key]
+
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+async def gather_bounded(fn: Callable[[Any], Any], items: Iterable, limit: int = MAX_CONCURRENCY) -> List[Any]:
+    """
+    Await `fn(item)` for every item, at most `limit` at a time; blocking `fn`
+    runs in worker threads. Results keep the order of `items`, with an
+    exception in place of the result for calls that raised.
+    """
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def one(item):
+        async with semaphore:
+            return await asyncio.to_thread(fn, item)
+
+    return await asyncio.gather(*(one(item) for item in items), return_exceptions=True)
+
+
+def fetch_all(fn: Callable[[Any], Any], items: Iterable, limit: Optional[int] = None) -> List[Any]:
+    """
+    Blocking front end of `gather_bounded` for synchronous callers: runs the
+    calls concurrently and returns results (or exceptions) in item order.
+    """
+    import asyncio  # on first use: it adds tens of ms to CLI startup
+
+    items = list(items)
+    limit = limit or MAX_CONCURRENCY
+    if len(items) <= 1 or limit == 1:
+        return [_call(fn, item) for item in items]
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(gather_bounded(fn, items, limit))
+    # already inside an event loop (e.g. a notebook): a plain pool gives the same bound
+    with ThreadPoolExecutor(max_workers=min(limit, len(items))) as pool:
+        return list(pool.map(bind(lambda item: _call(fn, item)), items))
+
+
+def _call(fn: Callable[[Any], Any], item: Any) -> Any:
+    try:
+        return fn(item)
+    except Exception as e:
+        return e
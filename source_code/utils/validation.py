@@ -0,0 +1,253 @@
+"""
+Pre-load data-quality and referential-integrity checks for the star schema.
+
+Every check is a column-wise array operation: keys are factorized into
+integer codes and hashed once, foreign keys are hash-set membership tests,
+and regex patterns run once per distinct value rather than once per row.
+"""
+
+import logging
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ISSUE_COLUMNS = ["TABLE", "CHECK", "COLUMN", "FAILED", "SAMPLE"]
+SAMPLE_SIZE = 5
+
+# Grain of each table (the ER diagram's PK plus the columns the loads actually key on)
+PRIMARY_KEYS: Dict[str, List[str]] = {
+    "PORTFOLIOGENERALINFORMATION":   ["PORTFOLIOCODE"],
+    "PRODUCTMASTER":                 ["PRODUCTCODE"],
+    "BENCHMARKGENERALINFORMATION":   ["BENCHMARKCODE"],
+    "HOLDINGDETAILS":                ["PORTFOLIOCODE", "TICKER", "HISTORYDATE"],
+    "PORTFOLIOPERFORMANCE":          ["PORTFOLIOCODE", "HISTORYDATE", "PERFORMANCETYPE"],
+    "BENCHMARKPERFORMANCE":          ["BENCHMARKCODE", "HISTORYDATE1"],
+    "BENCHMARKCHARACTERISTICS":      ["BENCHMARKCODE", "HISTORYDATE", "CATEGORY", "CHARACTERISTICNAME"],
+    "PORTFOLIOBENCHMARKASSOCIATION": ["PORTFOLIOCODE", "BENCHMARKCODE"],
+}
+
+# child table -> {column: (parent table, parent column)}
+FOREIGN_KEYS: Dict[str, Dict[str, tuple]] = {
+    "PORTFOLIOGENERALINFORMATION": {
+        "PRODUCTCODE":      ("PRODUCTMASTER", "PRODUCTCODE"),
+        "BASECURRENCYCODE": ("CURRENCY", "currency_code"),
+    },
+    "HOLDINGDETAILS": {
+        "PORTFOLIOCODE": ("PORTFOLIOGENERALINFORMATION", "PORTFOLIOCODE"),
+        "CURRENCYCODE":  ("CURRENCY", "currency_code"),
+    },
+    "PORTFOLIOPERFORMANCE": {
+        "PORTFOLIOCODE": ("PORTFOLIOGENERALINFORMATION", "PORTFOLIOCODE"),
+        "CURRENCYCODE":  ("CURRENCY", "currency_code"),
+    },
+    "BENCHMARKPERFORMANCE": {
+        "BENCHMARKCODE": ("BENCHMARKGENERALINFORMATION", "BENCHMARKCODE"),
+        "CURRENCYCODE":  ("CURRENCY", "currency_code"),
+    },
+    "BENCHMARKCHARACTERISTICS": {
+        "BENCHMARKCODE": ("BENCHMARKGENERALINFORMATION", "BENCHMARKCODE"),
+        "CURRENCYCODE":  ("CURRENCY", "currency_code"),
+    },
+    "PORTFOLIOBENCHMARKASSOCIATION": {
+        "PORTFOLIOCODE": ("PORTFOLIOGENERALINFORMATION", "PORTFOLIOCODE"),
+        "BENCHMARKCODE": ("BENCHMARKGENERALINFORMATION", "BENCHMARKCODE"),
+    },
+}
+
+NOT_NULL: Dict[str, List[str]] = {
+    "HOLDINGDETAILS":       ["PRICE", "QUANTITY", "MARKETVALUE"],
+    "PORTFOLIOPERFORMANCE": ["PERFORMANCEFACTOR"],
+    "BENCHMARKPERFORMANCE": ["VALUE"],
+}
+
+# column -> (min, max), both exclusive; None = unbounded
+RANGES: Dict[str, Dict[str, tuple]] = {
+    "HOLDINGDETAILS":       {"PRICE": (0, None)},
+    "PORTFOLIOPERFORMANCE": {"PERFORMANCEFACTOR": (-1, 1)},  # daily return factors
+    "BENCHMARKPERFORMANCE": {"VALUE": (0, None)},
+}
+
+CODE_PATTERNS: Dict[str, str] = {
+    "PORTFOLIOCODE":    r"PORT\d{3,}",
+    "PRODUCTCODE":      r"PRD\d{3,}",
+    "CURRENCYCODE":     r"[A-Z]{3}",
+    "BASECURRENCYCODE": r"[A-Z]{3}",
+}
+
+# Benchmark naming conventions counted by analyze_name_patterns
+NAME_PATTERNS: Dict[str, str] = {
+    "Target Date": "Target Date",
+    "S&P":         "S&P",
+    "Morningstar": "Morningstar",
+    "Bloomberg":   "Bloomberg",
+    "Composite":   "Composite",
+    "MSCI":        "MSCI",
+    "Russell":     "Russell",
+    "Equity %":    "%",
+}
+
+
+class ValidationError(Exception):
+    """Raised by validate_tables(raise_on_error=True) when any check fails."""
+
+    def __init__(self, issues: pd.DataFrame):
+        self.issues = issues
+        super().__init__(
+            "; ".join(f"{r.TABLE}.{r.COLUMN} {r.CHECK}: {r.FAILED} rows" for r in issues.itertuples())
+        )
+
+
+# ---- individual checks (each returns a boolean mask of failing rows) ----
+# Key-like checks take the column's (codes, uniques) from pd.factorize, so a
+# column shared by several checks is hashed only once.
+
+def duplicate_keys(df: pd.DataFrame, keys: List[str], factorized: Optional[Dict[str, tuple]] = None) -> np.ndarray:
+    """
+    Rows whose key repeats an earlier row. Each key column's codes are packed
+    into one int64 per row, so only a single hash pass over the rows is needed.
+    """
+    factorized = factorized or {}
+    combined, size = np.zeros(len(df), dtype=np.int64), 1
+    for col in keys:
+        codes, uniques = factorized.get(col) or pd.factorize(df[col])
+        width = len(uniques) + 1  # +1 keeps nulls (-1) as their own key value
+        if size * width >= 2 ** 62:  # re-densify before the packed key could overflow
+            combined, seen = pd.factorize(combined)
+            size = len(seen)
+        combined = combined * width + (codes + 1)
+        size *= width
+    return pd.Series(combined).duplicated().to_numpy()
+
+
+def missing_references(
+    values: pd.Series, parent_values: Iterable, factorized: Optional[tuple] = None
+) -> np.ndarray:
+    """
+    Non-null foreign-key values with no matching parent key; the hash lookup
+    runs once per distinct value.
+    """
+    codes, uniques = factorized or pd.factorize(values)
+    found = np.append(pd.Index(uniques).isin(parent_values), True)  # nulls are not orphans
+    return ~found[codes]
+
+
+def null_values(values: pd.Series, factorized: Optional[tuple] = None) -> np.ndarray:
+    if factorized is not None:
+        return factorized[0] == -1
+    return values.isna().to_numpy()
+
+
+def out_of_range(values: pd.Series, lower=None, upper=None) -> np.ndarray:
+    """
+    Non-null values outside the open interval (lower, upper); non-numeric values fail.
+    """
+    numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    bad = np.isnan(numeric) & values.notna().to_numpy()
+    with np.errstate(invalid="ignore"):
+        if lower is not None:
+            bad |= numeric <= lower
+        if upper is not None:
+            bad |= numeric >= upper
+    return bad
+
+
+def pattern_mismatches(values: pd.Series, pattern: str, factorized: Optional[tuple] = None) -> np.ndarray:
+    """
+    Non-null values that do not fully match `pattern`; the regex runs once per distinct value.
+    """
+    regex = re.compile(pattern)
+    codes, uniques = factorized or pd.factorize(values)
+    ok = np.array([isinstance(u, str) and regex.fullmatch(u) is not None for u in uniques] + [True])
+    return ~ok[codes]
+
+
+def pattern_distribution(values: pd.Series, patterns: Dict[str, str]) -> Dict[str, int]:
+    """
+    Number of values containing each substring in `patterns`, counted over distinct values.
+    """
+    counts = values.value_counts(dropna=True)
+    text = counts.index.astype(str)
+    return {
+        label: int(counts.to_numpy()[text.str.contains(needle, regex=False)].sum())
+        for label, needle in patterns.items()
+    }
+
+
+# ---- table-level stage ----
+
+def _issue(table: str, check: str, column: str, df: pd.DataFrame, mask: np.ndarray) -> Optional[dict]:
+    failed = int(mask.sum())
+    if not failed:
+        return None
+    columns = [c for c in column.split("+") if c in df]
+    rows = df.loc[mask, columns].head(SAMPLE_SIZE)
+    sample = rows[column].tolist() if len(columns) == 1 else list(rows.itertuples(index=False, name=None))
+    return {"TABLE": table, "CHECK": check, "COLUMN": column, "FAILED": failed, "SAMPLE": sample}
+
+
+def validate_table(
+    name: str, df: pd.DataFrame, parents: Optional[Dict[str, pd.DataFrame]] = None
+) -> pd.DataFrame:
+    """
+    Run every rule registered for table `name` and return one row per failing
+    check (empty when the table is clean). Foreign keys are only checked for
+    parent tables present in `parents`.
+    """
+    parents = parents or {}
+    issues = []
+
+    keys = [k for k in PRIMARY_KEYS.get(name, []) if k in df]
+    foreign = {c: ref for c, ref in FOREIGN_KEYS.get(name, {}).items() if c in df and ref[0] in parents}
+    patterns = {c: p for c, p in CODE_PATTERNS.items() if c in df}
+    factorized = {c: pd.factorize(df[c]) for c in set(keys) | set(foreign) | set(patterns)}
+
+    if keys:
+        for col in keys:
+            issues.append(_issue(name, "primary key null", col, df, null_values(df[col], factorized[col])))
+        issues.append(_issue(name, "duplicate primary key", "+".join(keys), df, duplicate_keys(df, keys, factorized)))
+
+    for col, (parent, parent_col) in foreign.items():
+        mask = missing_references(df[col], parents[parent][parent_col], factorized[col])
+        issues.append(_issue(name, f"foreign key -> {parent}", col, df, mask))
+
+    for col in NOT_NULL.get(name, []):
+        if col in df:
+            issues.append(_issue(name, "null", col, df, null_values(df[col])))
+
+    for col, (lower, upper) in RANGES.get(name, {}).items():
+        if col in df:
+            issues.append(_issue(name, f"out of range ({lower}, {upper})", col, df, out_of_range(df[col], lower, upper)))
+
+    for col, pattern in patterns.items():
+        mask = pattern_mismatches(df[col], pattern, factorized[col])
+        issues.append(_issue(name, f"pattern {pattern}", col, df, mask))
+
+    return pd.DataFrame([i for i in issues if i], columns=ISSUE_COLUMNS)
+
+
+def validate_tables(tables: Dict[str, pd.DataFrame], raise_on_error: bool = False) -> pd.DataFrame:
+    """
+    Validate a batch of tables against each other before loading.
+
+    Parameters
+    ----------
+    tables : dict
+        Table name (as in PRIMARY_KEYS, plus optional "CURRENCY") -> DataFrame.
+    raise_on_error : bool
+        Raise ValidationError instead of returning when any check fails.
+    """
+    reports = [validate_table(name, df, tables) for name, df in tables.items()]
+    issues = pd.concat([r for r in reports if len(r)], ignore_index=True) if any(len(r) for r in reports) \
+        else pd.DataFrame(columns=ISSUE_COLUMNS)
+
+    for r in issues.itertuples():
+        logger.warning(f"{r.TABLE}.{r.COLUMN}: {r.CHECK} ({r.FAILED} rows, e.g. {r.SAMPLE})")
+    if len(issues) and raise_on_error:
+        raise ValidationError(issues)
+    if not len(issues):
+        logger.info(f"Validation passed for {', '.join(tables)}")
+    return issues
@@ -0,0 +1,356 @@
+"""
+Shared warehouse sessions: one pool of authenticated connections per process.
+
+`get_warehouse()` returns the process-wide pool, opened on first use from
+$TDF_WAREHOUSE:
+
+- unset or "snowflake": Snowflake, with the credentials in local_config.env
+  (see utils/config.py) and client-side keep-alive, so sessions survive idle
+  gaps between table loads;
+- "sqlite:///path/to/file.db" or "sqlite://" (shared in-memory database): a
+  local SQL stand-in for tests and benchmarks. Its cursors accept the same
+  %s placeholders as the Snowflake connector.
+
+Loaders borrow a cursor with `with get_warehouse().cursor() as cs:`; the
+connection goes back to the pool afterwards instead of being closed, so a
+run that loads several tables authenticates once per connection rather than
+once per table. Concurrent loaders each get their own connection (at most
+`POOL_SIZE` are open; further callers wait), which keeps session-scoped temp
+tables private to the loader that created them.
+
+Statements that differ between Snowflake and SQLite (temp tables, MERGE) are
+built by the pool's methods so the same load code runs on both.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from source_code.utils.config import load_local_env
+from source_code.utils.instrumentation import provider_call
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("TDF_WAREHOUSE_POOL", "4"))  # connections kept open per process
+CHECKOUT_TIMEOUT = 300.0  # seconds a loader waits for a free connection
+PING_AFTER_IDLE = 600.0  # seconds; idle connections are checked with SELECT 1 before reuse
+TARGET_SCHEMA = "AST_MULTIASSET_DB.DBO"  # database.schema of the star-schema tables in Snowflake
+INSERT_BATCH = 16_384  # rows per executemany call
+
+_SQLITE_SHARED_MEMORY = "file:tdf_warehouse?mode=memory&cache=shared"
+
+
+class WarehousePoolTimeout(TimeoutError):
+    """No pooled connection became free within CHECKOUT_TIMEOUT."""
+
+
+class _SqliteCursor:
+    """sqlite3 cursor that takes the Snowflake connector's %s placeholders."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql: str, params: Sequence = ()):
+        self._cursor.execute(sql.replace("%s", "?"), params)
+        return self
+
+    def executemany(self, sql: str, rows):
+        self._cursor.executemany(sql.replace("%s", "?"), rows)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _SqliteConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return _SqliteCursor(self._conn.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _snowflake_connect():
+    import snowflake.connector
+
+    load_local_env()
+    return snowflake.connector.connect(
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+        database=os.getenv("SNOWFLAKE_DATABASE"),
+        schema=os.getenv("SNOWFLAKE_SCHEMA"),
+        role=os.getenv("SNOWFLAKE_ROLE"),
+        client_session_keep_alive=True,
+    )
+
+
+def _sqlite_connect(path: str):
+    import sqlite3
+
+    if path == ":memory:":
+        conn = sqlite3.connect(path, check_same_thread=False)
+    elif path:
+        conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+    else:
+        conn = sqlite3.connect(_SQLITE_SHARED_MEMORY, uri=True, timeout=30, check_same_thread=False)
+    return _SqliteConnection(conn)
+
+
+class WarehousePool:
+    """
+    Bounded pool of warehouse connections. Connections are opened lazily,
+    handed to one borrower at a time and kept open between borrows.
+    """
+
+    def __init__(self, connect: Callable[[], Any], dialect: str, size: int = POOL_SIZE):
+        self._connect = connect
+        self.dialect = dialect
+        self.size = max(1, size)
+        self._idle: List[tuple] = []  # (connection, returned_at), most recently used last
+        self._open = 0
+        self._cond = threading.Condition()
+        self._sqlite_anchor = None
+
+    # ---- checkout ----
+
+    def _acquire(self):
+        deadline = time.monotonic() + CHECKOUT_TIMEOUT
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    conn = None
+                    break
+                if not self._cond.wait(timeout=deadline - time.monotonic()):
+                    raise WarehousePoolTimeout(f"no warehouse connection free after {CHECKOUT_TIMEOUT:.0f}s")
+        if conn is not None and (time.monotonic() - returned_at < PING_AFTER_IDLE or self._alive(conn)):
+            return conn
+        if conn is not None:
+            self._close(conn)
+        try:
+            with provider_call(f"{self.dialect}.connect"):
+                conn = self._connect()
+            logger.debug(f"opened {self.dialect} connection ({self._open}/{self.size})")
+            return conn
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, conn, broken: bool = False) -> None:
+        if broken:
+            self._close(conn)
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @staticmethod
+    def _alive(conn) -> bool:
+        try:
+            cs = conn.cursor()
+            try:
+                cs.execute("SELECT 1")
+                cs.fetchone()
+            finally:
+                cs.close()
+            return True
+        except Exception as exc:
+            logger.info(f"dropping stale warehouse connection: {exc}")
+            return False
+
+    @staticmethod
+    def _rollback(conn) -> bool:
+        try:
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Borrow a connection for the block. It is committed on a clean exit,
+        rolled back if the block raises, and returned to the pool either way
+        (dropped instead if the rollback itself fails).
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            self._release(conn, broken=not self._rollback(conn))
+            raise
+        self._release(conn)
+
+    @contextmanager
+    def cursor(self) -> Iterator[Any]:
+        """A cursor on a borrowed connection; `cs.connection` is that connection."""
+        with self.connection() as conn:
+            cs = conn.cursor()
+            try:
+                yield cs
+            finally:
+                cs.close()
+
+    def close(self) -> None:
+        """Close the idle connections (at the end of a run); the pool reopens on demand."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+        if self._sqlite_anchor is not None:
+            self._close(self._sqlite_anchor)
+            self._sqlite_anchor = None
+
+    # ---- dialect-specific statements ----
+
+    def table(self, name: str) -> str:
+        """Qualified name of star-schema table `name`."""
+        return f"{TARGET_SCHEMA}.{name}" if self.dialect == "snowflake" else name
+
+    def create_temp_like(self, cs, temp: str, target: str) -> None:
+        """(Re)create session-scoped temp table `temp` with `target`'s columns."""
+        if self.dialect == "snowflake":
+            cs.execute(f"CREATE OR REPLACE TEMPORARY TABLE {temp} LIKE {self.table(target)}")
+        else:
+            cs.execute(f"DROP TABLE IF EXISTS temp.{temp}")
+            cs.execute(f"CREATE TEMP TABLE {temp} AS SELECT * FROM {self.table(target)} WHERE 0")
+
+    def ensure_table(self, cs, name: str, columns: Sequence[str], keys: Sequence[str]) -> None:
+        """
+        Create `name` on the SQLite stand-in if it is missing. Snowflake tables
+        are created by the DDL scripts, so this is a no-op there.
+        """
+        if self.dialect != "sqlite":
+            return
+        cs.execute(f"CREATE TABLE IF NOT EXISTS {name} ({', '.join(columns)}, PRIMARY KEY ({', '.join(keys)}))")
+
+    def insert_frame(self, cs, table: str, df: pd.DataFrame) -> int:
+        """Bulk insert `df` (columns by name) into `table`; returns the row count."""
+        cols = df.columns.tolist()
+        sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(['%s'] * len(cols))})"
+        rows = frame_rows(df)
+        for start in range(0, len(rows), INSERT_BATCH):
+            cs.executemany(sql, rows[start:start + INSERT_BATCH])
+        return len(rows)
+
+    def merge_sql(self, target: str, source: str, keys: Sequence[str], columns: Sequence[str],
+                  update_columns: Sequence[str] = (), changed_when: Optional[str] = None) -> str:
+        """
+        Upsert `source` into `target` on `keys`: insert unmatched rows and, when
+        `update_columns` is given, overwrite them on matched rows (only where
+        the `changed_when` column differs, NULLs included, if given).
+        """
+        insert_cols = ", ".join(columns)
+        if self.dialect == "snowflake":
+            on = " AND ".join(f"tgt.{k} = src.{k}" for k in keys)
+            sql = f"MERGE INTO {self.table(target)} AS tgt USING {source} AS src ON {on}"
+            if update_columns:
+                condition = f" AND tgt.{changed_when} IS DISTINCT FROM src.{changed_when}" if changed_when else ""
+                sets = ", ".join(f"tgt.{c} = src.{c}" for c in update_columns)
+                sql += f" WHEN MATCHED{condition} THEN UPDATE SET {sets}"
+            values = ", ".join(f"src.{c}" for c in columns)
+            return sql + f" WHEN NOT MATCHED THEN INSERT ({insert_cols}) VALUES ({values})"
+        # SQLite upsert; "WHERE true" keeps the parser from reading ON CONFLICT as a join clause
+        conflict = "DO NOTHING"
+        if update_columns:
+            sets = ", ".join(f"{c} = excluded.{c}" for c in update_columns)
+            condition = f" WHERE {changed_when} IS NOT excluded.{changed_when}" if changed_when else ""
+            conflict = f"DO UPDATE SET {sets}{condition}"
+        return (
+            f"INSERT INTO {self.table(target)} ({insert_cols}) SELECT {insert_cols} FROM {source} WHERE true "
+            f"ON CONFLICT ({', '.join(keys)}) {conflict}"
+        )
+
+
+def frame_rows(df: pd.DataFrame) -> List[tuple]:
+    """
+    `df` as plain Python tuples either driver binds: categoricals as their
+    values, datetimes as ISO strings, float32 widened, missing values as None.
+    """
+    columns = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype(s.cat.categories.dtype)
+        if pd.api.types.is_datetime64_any_dtype(s):
+            dated = (s.dropna() == s.dropna().dt.normalize()).all()
+            s = s.dt.strftime("%Y-%m-%d" if dated else "%Y-%m-%d %H:%M:%S")
+        elif s.dtype == "float32":
+            s = s.astype("float64")
+        values = s.astype(object)
+        columns[col] = values.where(s.notna(), None)
+    return list(zip(*(columns[c].tolist() for c in df.columns))) if len(df) else []
+
+
+def sqlite_pool(path: str = "", size: int = POOL_SIZE) -> WarehousePool:
+    """
+    Pool over the SQLite stand-in: the database file at `path`, or a shared
+    in-memory database when `path` is empty (":memory:" gives every connection
+    its own private database, which only suits a pool of size 1).
+    """
+    pool = WarehousePool(lambda: _sqlite_connect(path), "sqlite", size)
+    if not path:
+        # a shared in-memory database lives only while some connection to it is open
+        pool._sqlite_anchor = _sqlite_connect(path)
+    return pool
+
+
+def _pool_from_env() -> WarehousePool:
+    target = os.getenv("TDF_WAREHOUSE", "snowflake")
+    match = re.fullmatch(r"sqlite://(?:/(.+))?", target)
+    if match:
+        return sqlite_pool(match.group(1) or "")
+    if target != "snowflake":
+        raise ValueError(f"TDF_WAREHOUSE must be 'snowflake' or 'sqlite://[/path]', got {target!r}")
+    return WarehousePool(_snowflake_connect, "snowflake")
+
+
+_pool: Optional[WarehousePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_warehouse() -> WarehousePool:
+    """The process-wide warehouse pool, created from $TDF_WAREHOUSE on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _pool_from_env()
+            logger.debug(f"warehouse pool: {_pool.dialect}, up to {_pool.size} connections")
+        return _pool
+
+
+def close_warehouse() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
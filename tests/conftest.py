@@ -0,0 +1,90 @@
+"""
+Shared test setup: a throwaway cache directory and an offline market-data
+provider serving the deterministic payloads in benchmarks/fixtures.py, so
+whole pipeline runs need no network.
+"""
+
+import json
+import os
+import tempfile
+
+# before any source_code import: the caches resolve their directory on first use
+os.environ["TDF_CACHE_DIR"] = tempfile.mkdtemp(prefix="tdf_tests_")
+
+import pandas as pd
+import pytest
+
+from benchmarks import fixtures
+from source_code.utils import providers
+from source_code.utils.providers import HttpResponse, MarketDataProvider
+
+CONSTITUENTS = fixtures.symbols("C", 50)
+
+
+def _seed(symbol: str) -> int:
+    return sum(map(ord, symbol))
+
+
+def _closes(symbol: str, start=None, end=None, period=None) -> pd.DataFrame:
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(fixtures.LAST_DATE)
+    start = pd.Timestamp(start) if start is not None else end - pd.Timedelta(days=7 if period else 3650)
+    index = pd.bdate_range(start, end, name="Date")
+    return pd.DataFrame({"Close": fixtures.price_paths(1, len(index), _seed(symbol))[:, 0]}, index=index)
+
+
+class FixtureProvider(MarketDataProvider):
+    """Offline adapter: every call is answered from benchmarks/fixtures."""
+
+    name = "fixture"
+
+    def download(self, tickers, start=None, end=None, group_by=None, **kwargs):
+        if group_by == "ticker":  # columns (ticker, field)
+            return pd.concat({t: _closes(t, start, end) for t in tickers}, axis=1)
+        return _closes(tickers if isinstance(tickers, str) else tickers[0], start, end)
+
+    def ticker_info(self, symbol: str) -> dict:
+        return fixtures.ticker_infos([symbol])[symbol]
+
+    def history(self, symbol: str, start=None, end=None, period=None, **kwargs):
+        return _closes(symbol, start, end, period)
+
+    def etf_holdings(self, symbol: str):
+        return pd.DataFrame({"symbol": CONSTITUENTS})
+
+    def quote_modules(self, symbols, modules, asynchronous: bool = False) -> dict:
+        modules = [modules] if isinstance(modules, str) else list(modules)
+        out = {}
+        for symbol, held, member in zip(symbols, fixtures.holding_modules(symbols).values(),
+                                        fixtures.constituent_modules(symbols).values()):
+            out[symbol] = {m: {**member.get(m, {}), **held.get(m, {})} for m in modules}
+        return out
+
+    def fund_holding_info(self, symbols) -> dict:
+        holdings = fixtures.fund_holdings(list(symbols), per_fund=8, universe=30)
+        return {
+            fund: {"holdings": rows.drop(columns="fund").to_dict("records")}
+            for fund, rows in holdings.groupby("fund", sort=False)
+        }
+
+    def http_get(self, url, headers=None, timeout=providers.HTTP_TIMEOUT) -> HttpResponse:
+        if "restcountries" in url:
+            body = json.dumps(fixtures.countries_payload(60)).encode()
+        else:  # constituent lists
+            body = ("Symbol\n" + "\n".join(CONSTITUENTS) + "\n").encode()
+        return HttpResponse(url, 200, {}, body)
+
+
+@pytest.fixture(scope="session")
+def fixture_provider():
+    previous = providers.set_provider(FixtureProvider())
+    yield providers.get_provider()
+    providers.set_provider(previous)
+
+
+@pytest.fixture(scope="session")
+def pipeline_tables(fixture_provider):
+    """Every table of one full, offline pipeline run."""
+    from source_code import pipeline
+
+    results = pipeline.run_pipeline()
+    return {name: df for name, df in results.items() if name in pipeline.TABLES}
@@ -0,0 +1,42 @@
+"""
+CLI import-time budget, as enforced by benchmarks/bench_import_time.py:
+`python -m source_code --help` must stay within the budget and must not load
+any network/warehouse client or pandas.
+
+    python -m pytest tests
+"""
+
+import subprocess
+import sys
+from typing import Dict
+
+from benchmarks.bench_import_time import HEAVY_MODULES, ROOT
+
+BUDGET_MS = 300
+
+
+def import_times(*args: str) -> Dict[str, int]:
+    """Every module imported (nested ones included) -> cumulative import time (us)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                          capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            # nested imports are indented; their time is already in their parent's
+            times[name.strip()] = 0 if name.startswith("  ") else int(cumulative)
+    return times
+
+
+def test_cli_help_import_budget_and_dependencies():
+    startup = import_times("-c", "pass")
+    times = import_times("-m", "source_code", "--help")
+
+    total_ms = sum(t for m, t in times.items() if m not in startup) / 1000
+    assert total_ms <= BUDGET_MS, f"`source_code --help` imports take {total_ms:.0f} ms > {BUDGET_MS} ms"
+
+    heavy = sorted(m for m in times if m.split(".")[0] in HEAVY_MODULES + ("pandas",))
+    assert not heavy, f"`source_code --help` imports {', '.join(heavy)}"
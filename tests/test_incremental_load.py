@@ -0,0 +1,94 @@
+"""
+Hash-diff incremental loads (source_code/utils/incremental_load.py) against
+the SQLite stand-in: unchanged rows are skipped, changed rows are updated in
+place, new keys are inserted, and rows stored without a hash are rewritten.
+"""
+
+import pandas as pd
+import pytest
+
+from source_code.utils.incremental_load import add_row_hashes, diff_rows, load_incremental
+from source_code.utils.row_hash import ROW_HASH_COLUMN
+from source_code.utils.validation import PRIMARY_KEYS, ValidationError
+from source_code.utils.warehouse import sqlite_pool
+
+TABLE = "HOLDINGDETAILS"
+KEYS = PRIMARY_KEYS[TABLE]
+
+
+@pytest.fixture
+def holdings(pipeline_tables) -> pd.DataFrame:
+    return pipeline_tables[TABLE].reset_index(drop=True)
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = sqlite_pool(str(tmp_path / "warehouse.db"), size=1)
+    yield pool
+    pool.close()
+
+
+def _stored(pool, columns=("QUANTITY", ROW_HASH_COLUMN)) -> pd.DataFrame:
+    with pool.cursor() as cs:
+        cs.execute(f"SELECT {', '.join(KEYS)}, {', '.join(columns)} FROM {TABLE} ORDER BY {', '.join(KEYS)}")
+        return pd.DataFrame(cs.fetchall(), columns=[*KEYS, *columns])
+
+
+def test_unchanged_changed_and_new_rows(holdings, pool):
+    first = load_incremental(holdings, TABLE, pool)
+    assert (first.inserted, first.updated, first.unchanged) == (len(holdings), 0, 0)
+
+    again = load_incremental(holdings, TABLE, pool)
+    assert (again.inserted, again.updated, again.unchanged) == (0, 0, len(holdings))
+
+    batch = holdings.copy()
+    batch.loc[[0, 1], "QUANTITY"] += 1
+    next_day = holdings["HISTORYDATE"].max() + pd.Timedelta(days=1)
+    new = holdings.iloc[:3].assign(HISTORYDATE=next_day)
+    stats = load_incremental(pd.concat([batch, new], ignore_index=True), TABLE, pool)
+    assert (stats.inserted, stats.updated, stats.unchanged) == (3, 2, len(holdings) - 2)
+
+    stored = _stored(pool)
+    assert len(stored) == len(holdings) + 3
+    stored = stored[stored["HISTORYDATE"] < next_day.strftime("%Y-%m-%d")]
+    changed = stored.merge(batch.loc[[0, 1], ["PORTFOLIOCODE", "TICKER", "QUANTITY"]], on=["PORTFOLIOCODE", "TICKER"])
+    assert len(changed) == 2 and (changed["QUANTITY_x"] == changed["QUANTITY_y"]).all()
+
+
+def test_blocks_and_unsupported_tables(holdings, pool):
+    codes = holdings["PORTFOLIOCODE"].astype(str)
+    blocks = [holdings[codes == c] for c in codes.unique()]
+    stats = load_incremental(iter(blocks), TABLE, pool)
+    assert (stats.rows, stats.inserted) == (len(holdings), len(holdings))
+    with pytest.raises(ValueError):
+        load_incremental(holdings, "PRODUCTMASTER", pool)
+
+
+def test_invalid_batch_is_not_loaded(holdings, pool):
+    load_incremental(holdings, TABLE, pool)
+    with pytest.raises(ValidationError, match="duplicate primary key"):
+        load_incremental(pd.concat([holdings, holdings.iloc[:1]]), TABLE, pool)
+    assert len(_stored(pool)) == len(holdings)
+
+
+def test_diff_rows_rewrites_null_hashes(holdings):
+    df = add_row_hashes(holdings.iloc[:4], TABLE)
+    stored = df[[*KEYS, ROW_HASH_COLUMN]].astype({ROW_HASH_COLUMN: "Int64"})
+    stored.loc[1, ROW_HASH_COLUMN] = pd.NA       # loaded before ROWHASH existed
+    stored.loc[2, ROW_HASH_COLUMN] += 1          # changed since
+    stored = stored.drop(index=3)                # never loaded
+    stored["HISTORYDATE"] = stored["HISTORYDATE"].dt.strftime("%Y-%m-%d")  # as read back from SQLite
+    is_insert, is_update = diff_rows(df, stored, TABLE)
+    assert is_insert.tolist() == [False, False, False, True]
+    assert is_update.tolist() == [False, True, True, False]
+
+
+def test_merge_sql_updates_only_changed_hashes(pool):
+    with pool.cursor() as cs:
+        cs.execute("CREATE TABLE t (k, v, h, PRIMARY KEY (k))")
+        cs.execute("CREATE TEMP TABLE s (k, v, h)")
+        cs.executemany("INSERT INTO t VALUES (%s, %s, %s)", [(1, "old", 1), (2, "old", 2), (3, "old", None)])
+        cs.executemany("INSERT INTO s VALUES (%s, %s, %s)", [(1, "new", 1), (2, "new", 9), (3, "new", 3), (4, "new", 4)])
+        cs.execute(pool.merge_sql("t", "s", ["k"], ["k", "v", "h"], update_columns=["v", "h"], changed_when="h"))
+        cs.execute("SELECT k, v FROM t ORDER BY k")
+        assert cs.fetchall() == [(1, "old"), (2, "new"), (3, "new"), (4, "new")]
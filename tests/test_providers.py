@@ -0,0 +1,84 @@
+"""
+LiveProvider's yahooquery calls, against a stub `yahooquery` module: the
+asynchronous paths get a FuturesSession over the pooled Yahoo session, the
+synchronous ones the pooled session itself. Also the keyword arguments the
+generic adapters forward and record.
+"""
+
+import sys
+import types
+
+import pytest
+
+from source_code.utils import transport
+from source_code.utils.providers import HttpResponse, LiveProvider, RecordingProvider, ReplayProvider
+
+FuturesSession = pytest.importorskip("requests_futures.sessions").FuturesSession
+
+
+class StubTicker:
+    """Answers like yahooquery.Ticker and, like it, needs a FuturesSession to run asynchronously."""
+
+    calls = []
+
+    def __init__(self, symbols, asynchronous=False, session=None):
+        if asynchronous and not isinstance(session, FuturesSession):
+            raise TypeError("asynchronous=True needs a FuturesSession")
+        self.symbols = symbols
+        StubTicker.calls.append((asynchronous, session))
+
+    def get_modules(self, modules):
+        modules = [modules] if isinstance(modules, str) else modules
+        return {s: {m: {"symbol": s} for m in modules} for s in self.symbols}
+
+    @property
+    def fund_holding_info(self):
+        return {s: {"holdings": [{"symbol": f"{s}-1"}]} for s in self.symbols}
+
+
+@pytest.fixture
+def stub_ticker(monkeypatch):
+    monkeypatch.setitem(sys.modules, "yahooquery", types.SimpleNamespace(Ticker=StubTicker))
+    StubTicker.calls = []
+    yield StubTicker.calls
+    transport.close_sessions()
+
+
+def test_quote_modules_sessions(stub_ticker):
+    provider = LiveProvider()
+    assert provider.quote_modules(["A", "B"], ["price"], asynchronous=True) == {
+        "A": {"price": {"symbol": "A"}}, "B": {"price": {"symbol": "B"}},
+    }
+    assert provider.quote_modules(["A"], "price") == {"A": {"price": {"symbol": "A"}}}
+    (async_, futures), (sync, plain) = stub_ticker
+    assert async_ and isinstance(futures, FuturesSession)
+    assert futures.session is transport.get_session("yahoo")  # same pooled adapter and cookies
+    assert not sync and plain is transport.get_session("yahoo") and not isinstance(plain, FuturesSession)
+
+
+def test_fund_holding_info_sessions(stub_ticker):
+    provider = LiveProvider()
+    assert provider.fund_holding_info(["F1", "F2"])["F2"]["holdings"] == [{"symbol": "F2-1"}]
+    assert provider.fund_holding_info(["F1"]) == {"F1": {"holdings": [{"symbol": "F1-1"}]}}
+    (async_, futures), (sync, plain) = stub_ticker
+    assert async_ and isinstance(futures, FuturesSession)
+    assert not sync and plain is transport.get_session("yahoo")
+
+
+class TimeoutProvider(LiveProvider):
+    """Answers http_get offline, remembering the timeout it was given."""
+
+    def __init__(self):
+        self.timeouts = []
+
+    def http_get(self, url, headers=None, timeout=None):
+        self.timeouts.append(timeout)
+        return HttpResponse(url, 200, {}, b"ok")
+
+
+def test_http_get_forwards_timeout_and_replays_without_it(tmp_path):
+    inner = TimeoutProvider()
+    RecordingProvider(tmp_path, inner).http_get("https://example.test/a", timeout=3)
+    assert inner.timeouts == [3]
+    replayed = ReplayProvider(tmp_path, exact=True).http_get("https://example.test/a", timeout=30)
+    assert replayed.content == b"ok"
@@ -0,0 +1,38 @@
+"""
+Per-call request rates in the benchmark characteristics build: a
+`requests_per_second` run waits on its own token bucket and leaves the
+shared one alone.
+"""
+
+from source_code.Benchmark_Characteristic import BenchmarkCharacteristic_table as bc
+from source_code.utils import providers
+from source_code.utils.rate_limiter import TokenBucket
+from tests.conftest import FixtureProvider
+
+
+class RemoteFixtureProvider(FixtureProvider):
+    remote = True  # so the module throttles as it would against Yahoo
+
+
+class CountingBucket(TokenBucket):
+    def __init__(self, rate, capacity=None):
+        self.acquired = 0
+        super().__init__(rate, capacity)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        self.acquired += 1
+        return super().acquire(tokens)
+
+
+def test_prefetch_waits_on_the_given_limiter(monkeypatch):
+    shared = CountingBucket(1000.0, 10)
+    monkeypatch.setattr(bc, "_limiter", shared)
+    previous = providers.set_provider(RemoteFixtureProvider())
+    try:
+        limiter = CountingBucket(1000.0, 10)
+        bc.prefetch_benchmark_data(["RATE1", "RATE2"], max_workers=2, limiter=limiter)
+        assert limiter.acquired == 4  # info and history per ticker
+        assert shared.acquired == 0
+        assert (shared.rate, shared.capacity) == (1000.0, 10)
+    finally:
+        providers.set_provider(previous)
@@ -0,0 +1,43 @@
+"""
+Seeded table generators draw from the generator they are given, so stages
+running concurrently cannot shift each other's output through the global
+`random` / numpy state.
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+from source_code.Benchmark_General_Information.Benchmark_General_Information_table import (
+    generate_benchmark_general_information,
+)
+from source_code.Holding_Details.HoldingDetails_Table import generate_merged_holdings
+from source_code.Portfolio_General_Information.PortfolioGeneralInformation_table import generate_portfolio_general
+
+
+def test_benchmark_names_use_the_given_rng():
+    random.seed(0)
+    expected = random.random()
+    random.seed(0)
+    runs = [
+        generate_benchmark_general_information(benchmark_codes=["GSPC", "AGG"], num_records=6, rng=random.Random(7))
+        for _ in range(2)
+    ]
+    assert random.random() == expected  # global stream untouched
+    pd.testing.assert_frame_equal(*runs)
+
+
+def test_merged_holdings_use_the_given_generator(fixture_provider):
+    holdings = fixtures.fund_holdings(fixtures.FUND_TICKERS[:4], per_fund=8, universe=30)
+    portfolios = generate_portfolio_general(10, rng=random.Random(42))
+    np.random.seed(0)
+    expected = np.random.random()
+    np.random.seed(0)
+    runs = [
+        generate_merged_holdings(holdings, df_portfolios=portfolios, rng=np.random.default_rng(7)) for _ in range(2)
+    ]
+    assert np.random.random() == expected
+    pd.testing.assert_frame_equal(*runs)
+    assert runs[0]["QUANTITY_PRODUCT"].between(500, 5000).all()
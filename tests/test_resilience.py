@@ -0,0 +1,51 @@
+"""
+Retry classification and `guarded` (source_code/utils/resilience.py): only
+throttling, 5xx and network failures are retried.
+"""
+
+import pytest
+import requests
+
+from source_code.utils import resilience
+from source_code.utils.providers import LiveProvider
+from source_code.utils.resilience import ProviderError, guarded, is_transient
+
+
+def test_is_transient():
+    assert is_transient(ProviderError("HTTP 429", status_code=429))
+    assert is_transient(ProviderError("HTTP 503", status_code=503))
+    assert is_transient(ProviderError("GET failed: timed out", transient=True))
+    assert is_transient(requests.ConnectionError("reset"))
+    assert not is_transient(ProviderError("HTTP 404", status_code=404))
+    assert not is_transient(ProviderError("get_modules: Quote not found for symbol: XYZ"))
+    assert not is_transient(resilience.CircuitOpenError("open"))
+
+
+def test_error_payloads():
+    with pytest.raises(ProviderError) as raised:
+        LiveProvider._mapping("get_modules", "Quote not found for symbol: XYZ")
+    assert not is_transient(raised.value)
+    with pytest.raises(ProviderError) as raised:
+        LiveProvider._mapping("get_modules", "Too Many Requests")
+    assert is_transient(raised.value) and raised.value.status_code == 429
+
+
+def _failing(error, calls):
+    def fn():
+        calls.append(1)
+        raise error
+    return fn
+
+
+def test_guarded_retries_only_transient(monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0.0)
+    resilience.reset_guards()
+    calls = []
+    with pytest.raises(ProviderError):
+        guarded("permanent.test", _failing(ProviderError("Quote not found"), calls), attempts=3)
+    assert len(calls) == 1
+    calls = []
+    with pytest.raises(ProviderError):
+        guarded("transient.test", _failing(ProviderError("timed out", transient=True), calls), attempts=3)
+    assert len(calls) == 3
+    resilience.reset_guards()
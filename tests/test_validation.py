@@ -0,0 +1,59 @@
+"""
+Pre-load validation (source_code/utils/validation.py): the pipeline's own
+output passes, and each rule catches the defect it is written for.
+"""
+
+import pandas as pd
+import pytest
+
+from source_code.utils.validation import ValidationError, validate_table, validate_tables
+
+
+def test_full_pipeline_output_validates(pipeline_tables):
+    issues = validate_tables(pipeline_tables)
+    assert issues.empty, issues.to_string()
+
+
+def test_benchmark_codes_agree_across_tables(pipeline_tables):
+    codes = set(pipeline_tables["BENCHMARKGENERALINFORMATION"]["BENCHMARKCODE"])
+    for name in ("BENCHMARKPERFORMANCE", "BENCHMARKCHARACTERISTICS", "PORTFOLIOBENCHMARKASSOCIATION"):
+        assert set(pipeline_tables[name]["BENCHMARKCODE"]) <= codes, name
+
+
+def _checks(issues: pd.DataFrame) -> set:
+    return set(zip(issues["COLUMN"], issues["CHECK"]))
+
+
+def test_duplicate_and_null_primary_keys():
+    df = pd.DataFrame({"BENCHMARKCODE": ["GSPC", "GSPC", None], "NAME": ["a", "b", "c"]})
+    checks = _checks(validate_table("BENCHMARKGENERALINFORMATION", df))
+    assert ("BENCHMARKCODE", "duplicate primary key") in checks
+    assert ("BENCHMARKCODE", "primary key null") in checks
+
+
+def test_orphan_foreign_keys_ranges_and_patterns():
+    parents = {"PORTFOLIOGENERALINFORMATION": pd.DataFrame({"PORTFOLIOCODE": ["PORT001"]})}
+    df = pd.DataFrame({
+        "PORTFOLIOCODE":     ["PORT001", "PORT002", "P3"],
+        "HISTORYDATE":       pd.to_datetime(["2025-01-02"] * 3),
+        "PERFORMANCETYPE":   ["Portfolio Gross"] * 3,
+        "CURRENCYCODE":      ["USD"] * 3,
+        "PERFORMANCEFACTOR": [0.001, 1.5, None],
+    })
+    issues = validate_table("PORTFOLIOPERFORMANCE", df, parents)
+    assert _checks(issues) == {
+        ("PORTFOLIOCODE", "foreign key -> PORTFOLIOGENERALINFORMATION"),
+        ("PERFORMANCEFACTOR", "null"),
+        ("PERFORMANCEFACTOR", "out of range (-1, 1)"),
+        ("PORTFOLIOCODE", r"pattern PORT\d{3,}"),
+    }
+    orphans = issues.set_index("CHECK").loc["foreign key -> PORTFOLIOGENERALINFORMATION"]
+    assert orphans["FAILED"] == 2
+
+
+def test_raise_on_error():
+    df = pd.DataFrame({"PRODUCTCODE": ["PRD001", "PRD001"]})
+    with pytest.raises(ValidationError) as raised:
+        validate_tables({"PRODUCTMASTER": df}, raise_on_error=True)
+    assert list(raised.value.issues["CHECK"]) == ["duplicate primary key"]
+    assert validate_tables({"PRODUCTMASTER": df.iloc[:1]}, raise_on_error=True).empty